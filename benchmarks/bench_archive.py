@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Benchmark for SessionArchive: ingests a year of generated sessions (collection, voters and ballots) into a new
+# database and runs some queries, run with
+# python -m benchmarks.bench_archive [--sessions N] [--groups N] [--votings N] [--voters N] [--db PATH]
+
+import os
+import argparse
+import tempfile
+from time import perf_counter
+
+from stura_voting_utils import SessionArchive, parse_voting_collection, parse_voters
+
+from .generators import generate_collection, generate_voters, generate_csv
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark for SessionArchive')
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--groups', type=int, default=5)
+    parser.add_argument('--votings', type=int, default=10, help='Votings per group, must be even')
+    parser.add_argument('--options', type=int, default=5)
+    parser.add_argument('--voters', type=int, default=200)
+    parser.add_argument('--db', default=None, help='Path of the database, default is a temporary file')
+    args = parser.parse_args()
+
+    # the votings of the collection and the columns of the csv file alternate between Schulze and median votings
+    sessions = []
+    for i in range(args.sessions):
+        collection = parse_voting_collection(generate_collection(args.groups, args.votings, args.options, seed=i))
+        collection.name = 'Session %d' % (i + 1)
+        voters = list(parse_voters(generate_voters(args.voters, seed=i)))
+        ballots = generate_csv(args.voters, args.groups * args.votings, args.options, seed=i)
+        sessions.append((collection, voters, ballots))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'archive.db') if args.db is None else args.db
+        with SessionArchive(path) as archive:
+            start = perf_counter()
+            ids = []
+            for collection, voters, ballots in sessions:
+                session_id = archive.add_collection(collection)
+                archive.add_voters(session_id, voters)
+                archive.add_ballots(session_id, ballots)
+                ids.append(session_id)
+            ingest_time = perf_counter() - start
+            num_votes = archive.connection.execute('SELECT COUNT(*) FROM votes').fetchone()[0]
+            print('Ingested %d sessions (%d votes) in %.3f s (%.0f votes/s)' %
+                  (len(ids), num_votes, ingest_time, num_votes / ingest_time))
+
+            start = perf_counter()
+            found = archive.find_votings('Voting 1.1')
+            voter_sessions = archive.voter_sessions(sessions[0][1][0].name)
+            print('find_votings: %d votings, voter_sessions: %d sessions in %.3f ms' %
+                  (len(found), len(voter_sessions), 1000 * (perf_counter() - start)))
+
+            start = perf_counter()
+            for session_id in ids:
+                archive.get_collection(session_id)
+            print('get_collection: %.3f ms per session' % (1000 * (perf_counter() - start) / len(ids)))
+
+            start = perf_counter()
+            for session_id in ids:
+                archive.get_votes(session_id)
+            print('get_votes: %.3f ms per session' % (1000 * (perf_counter() - start) / len(ids)))
+
+            start = perf_counter()
+            for session_id in ids:
+                archive.evaluate(session_id)
+            print('evaluate (computed and stored): %.3f ms per session' %
+                  (1000 * (perf_counter() - start) / len(ids)))
+            start = perf_counter()
+            for session_id in ids:
+                archive.evaluate(session_id)
+            print('evaluate (stored): %.3f ms per session' % (1000 * (perf_counter() - start) / len(ids)))
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Benchmark for parse_voting_collection on a generated agenda, run with
+# python -m benchmarks.bench_collection_parser [--groups N] [--votings N] [--options N]
+
+import argparse
+import timeit
+
+from stura_voting_utils import parse_voting_collection
+
+from .generators import generate_collection
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark for parse_voting_collection')
+    parser.add_argument('--groups', type=int, default=100)
+    parser.add_argument('--votings', type=int, default=100)
+    parser.add_argument('--options', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    lines = generate_collection(args.groups, args.votings, args.options)
+    best = min(timeit.repeat(lambda: parse_voting_collection(lines), number=1, repeat=args.repeat))
+    print('parse_voting_collection: %d lines in %.3f s (%.0f lines/s)' % (len(lines), best, len(lines) / best))
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Benchmark for IncrementalCollectionParser compared to parse_voting_collection on the whole document after each
+# edit, run with python -m benchmarks.bench_incremental_collection [--groups N] [--votings N] [--edits N]
+#
+# The edits simulate typing: a character is appended to the name of a random voting, one edit per keystroke.
+
+import random
+import timeit
+import argparse
+from time import perf_counter
+
+from stura_voting_utils import parse_voting_collection, IncrementalCollectionParser
+from stura_voting_utils.incremental import same_collection
+
+from .generators import generate_collection
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark for IncrementalCollectionParser')
+    parser.add_argument('--groups', type=int, default=40)
+    parser.add_argument('--votings', type=int, default=50)
+    parser.add_argument('--options', type=int, default=5)
+    parser.add_argument('--edits', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    lines = generate_collection(args.groups, args.votings, args.options, args.seed)
+    rand = random.Random(args.seed)
+    voting_lines = [i for i, line in enumerate(lines) if line.startswith('### ')]
+    edits = []
+    for _ in range(args.edits):
+        i = rand.choice(voting_lines)
+        lines[i] += rand.choice('abcdefgh')
+        edits.append((i, lines[i]))
+    initial = generate_collection(args.groups, args.votings, args.options, args.seed)
+
+    start = perf_counter()
+    full_lines = list(initial)
+    for i, line in edits:
+        full_lines[i] = line
+        full = parse_voting_collection(full_lines)
+    full_time = perf_counter() - start
+
+    init_time = min(timeit.repeat(lambda: IncrementalCollectionParser(initial).collection(), number=1, repeat=3))
+    incremental = IncrementalCollectionParser(initial)
+    incremental.collection()
+    start = perf_counter()
+    for i, line in edits:
+        incremental.replace_lines(i, i + 1, [line])
+        res = incremental.collection()
+    incremental_time = perf_counter() - start
+
+    assert same_collection(res, full)
+    print('%d lines, %d edits' % (len(lines), len(edits)))
+    print('parse_voting_collection:     %.3f ms per edit' % (1000 * full_time / len(edits)))
+    print('IncrementalCollectionParser: %.3f ms per edit (initial parse %.3f ms)' %
+          (1000 * incremental_time / len(edits), 1000 * init_time))
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Benchmark for the computation of the strongest paths (the matrix p) of Schulze votings with many options, run with
+# python -m benchmarks.bench_strongest_paths [--options 50 200 500] [--reference-max K] [--output results.json]
+# schulze_voting.compute_p is only timed up to --reference-max options because it's very slow for large k.
+
+import sys
+import json
+import random
+import argparse
+
+from schulze_voting import compute_p, rank_p
+
+from stura_voting_utils.paths import compute_p_packed
+
+from .run import measure
+
+
+def generate_d(num_options, num_voters, seed=0):
+    """Generate the matrix d of a Schulze voting where each voter ranks all options without ties.
+
+    Args:
+        num_options (int): Number of options.
+        num_voters (int): Number of voters, the weight of each voter is 1.
+        seed (int): Seed for the random number generator.
+
+    Returns:
+        list of list of int: The matrix d.
+    """
+    rand = random.Random(seed)
+    d = [[0] * num_options for _ in range(num_options)]
+    for i in range(num_options):
+        for j in range(i + 1, num_options):
+            wins = rand.randint(0, num_voters)
+            d[i][j], d[j][i] = wins, num_voters - wins
+    return d
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark for the strongest paths of Schulze votings')
+    parser.add_argument('--options', type=int, nargs='+', default=[50, 200, 500],
+                        help='Numbers of options, default is 50 200 500')
+    parser.add_argument('--voters', type=int, default=500, help='Number of voters, default is 500')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of runs of each benchmark, default is 3')
+    parser.add_argument('--reference-max', type=int, default=200,
+                        help='Time schulze_voting.compute_p only up to this number of options, default is 200')
+    parser.add_argument('--output', '-o', help='Write the results to this file instead of stdout', default=None)
+    args = parser.parse_args()
+
+    results = dict()
+    for k in args.options:
+        d = generate_d(k, args.voters, seed=k)
+        p = compute_p_packed(d, k)
+        res = {'compute_p_packed': measure(lambda: compute_p_packed(d, k), args.repeat, k),
+               'rank_p': measure(lambda: rank_p(p, k), args.repeat, k)}
+        if k <= args.reference_max:
+            res['compute_p'] = measure(lambda: compute_p(d, k), 1, k)
+            res['speedup'] = res['compute_p']['best'] / res['compute_p_packed']['best']
+        results[str(k)] = res
+        print('k=%d: packed %.4f s, compute_p %s' % (k, res['compute_p_packed']['best'],
+                                                     '%.4f s' % res['compute_p']['best'] if 'compute_p' in res
+                                                     else 'skipped'), file=sys.stderr)
+    out = {'parameters': {'options': args.options, 'voters': args.voters, 'repeat': args.repeat}, 'results': results}
+    if args.output is None:
+        json.dump(out, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(out, f, indent=2)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Deterministic generators for synthetic input files. All generators return lists of lines (without newlines) and use
+# their own random number generator, so the same arguments always produce the same files.
+
+import random
+
+
+def generate_voters(num_voters, seed=0):
+    """Generate the lines of a voters file (see parse_voters).
+
+    Args:
+        num_voters (int): Number of voters.
+        seed (int): Seed for the random number generator.
+
+    Returns:
+        list of str: The lines of the file.
+    """
+    rand = random.Random(seed)
+    return ['* Voter %d: %d' % (i + 1, rand.randint(1, 10)) for i in range(num_voters)]
+
+
+def generate_collection(num_groups, num_votings, num_options, seed=0):
+    """Generate the lines of a voting collection (see parse_voting_collection).
+
+    Every second voting is a median voting, the others are Schulze votings with num_options options.
+
+    Args:
+        num_groups (int): Number of groups.
+        num_votings (int): Number of votings in each group.
+        num_options (int): Number of options of each Schulze voting.
+        seed (int): Seed for the random number generator.
+
+    Returns:
+        list of str: The lines of the file.
+    """
+    rand = random.Random(seed)
+    lines = ['# Generated agenda', '']
+    for g in range(num_groups):
+        lines.append('## Group %d' % (g + 1))
+        lines.append('')
+        for v in range(num_votings):
+            lines.append('### Voting %d.%d' % (g + 1, v + 1))
+            if v % 2:
+                lines.append('- %d,%02d €' % (rand.randint(0, 100000), rand.randint(0, 99)))
+            else:
+                lines.extend('* Option %d' % (o + 1) for o in range(num_options))
+            lines.append('')
+    return lines
+
+
+def generate_csv(num_voters, num_votings, num_options, median_value=10000, empty_ratio=0.05, seed=0):
+    """Generate the lines of a ballot csv file (see parse_csv and examples/cmd_example.csv).
+
+    Every second voting is a median voting with the value median_value, the others are Schulze votings with
+    num_options options.
+
+    Args:
+        num_voters (int): Number of rows (voters).
+        num_votings (int): Number of votings (columns).
+        num_options (int): Number of options of each Schulze voting.
+        median_value (int): The value of each median voting.
+        empty_ratio (float): The probability that an entry is empty.
+        seed (int): Seed for the random number generator.
+
+    Returns:
+        list of str: The lines of the file.
+    """
+    rand = random.Random(seed)
+    head = ['Name', 'Gewicht']
+    for v in range(num_votings):
+        if v % 2:
+            head.append('Median (%d)' % median_value)
+        else:
+            head.append('Schulze (%d)' % num_options)
+    lines = [','.join(head)]
+    for i in range(num_voters):
+        row = ['Voter %d' % (i + 1), str(rand.randint(1, 10))]
+        for v in range(num_votings):
+            if rand.random() < empty_ratio:
+                row.append('')
+            elif v % 2:
+                row.append(str(rand.randint(0, median_value)))
+            else:
+                row.append('/'.join(str(rand.randrange(num_options)) for _ in range(num_options)))
+        lines.append(','.join(row))
+    return lines
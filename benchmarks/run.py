@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Runs all benchmarks and writes the results as JSON, run with
+# python -m benchmarks.run [--voters N] [--votings N] [--options N] [--output results.json]
+
+import sys
+import json
+import time
+import timeit
+import argparse
+import platform
+import subprocess
+
+from stura_voting_utils import parse_voters, parse_voting_collection, parse_csv, tally_csv, evaluate_schulze_table, \
+    evaluate_median_table, SchulzeVotingSkeleton, MedianVotingSkeleton
+
+from schulze_voting import evaluate_schulze
+from median_voting import MedianStatistics
+
+from .generators import generate_voters, generate_collection, generate_csv
+
+
+def measure(func, repeat, items):
+    """Time a function (called without arguments) repeat times.
+
+    Args:
+        func (callable): The function to time.
+        repeat (int): Number of runs.
+        items (int): Number of processed items (lines, votes, ...) per run, used to compute the throughput.
+
+    Returns:
+        dict: The best and mean time (in seconds) of all runs, the number of items and the items per second of the
+        best run.
+    """
+    times = timeit.repeat(func, number=1, repeat=repeat)
+    best = min(times)
+    return {
+        'best': best,
+        'mean': sum(times) / len(times),
+        'repeat': repeat,
+        'items': items,
+        'items_per_second': items / best if best > 0 else None,
+    }
+
+
+def _git_commit():
+    try:
+        res = subprocess.run(['git', 'rev-parse', 'HEAD'], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                             universal_newlines=True)
+    except OSError:
+        return None
+    if res.returncode != 0:
+        return None
+    return res.stdout.strip()
+
+
+def run_benchmarks(num_voters, num_votings, num_options, num_groups, repeat, seed=0):
+    """Run all benchmarks.
+
+    Args:
+        num_voters (int): Number of voters (lines in the voters file and rows in the csv file).
+        num_votings (int): Number of votings in the csv file and in each group of the collection.
+        num_options (int): Number of options of each Schulze voting.
+        num_groups (int): Number of groups in the collection.
+        repeat (int): Number of runs of each benchmark.
+        seed (int): Seed for the generators.
+
+    Returns:
+        dict: The parameters, information about the environment and for each benchmark the result of measure.
+    """
+    voters_lines = generate_voters(num_voters, seed)
+    collection_lines = generate_collection(num_groups, num_votings, num_options, seed)
+    csv_lines = generate_csv(num_voters, num_votings, num_options, seed=seed)
+
+    collection = parse_voting_collection(collection_lines)
+    all_votings, votes = parse_csv(csv_lines)
+    _, table = parse_csv(csv_lines, as_table=True)
+    schulze = [(skel, voting_votes, i) for i, (skel, voting_votes) in enumerate(zip(all_votings, votes))
+               if isinstance(skel, SchulzeVotingSkeleton)]
+    median = [voting_votes for skel, voting_votes in zip(all_votings, votes)
+              if isinstance(skel, MedianVotingSkeleton)]
+    num_schulze_votes = sum(len(voting_votes) for _, voting_votes, _ in schulze)
+    num_median_votes = sum(len(voting_votes) for voting_votes in median)
+
+    results = dict()
+    results['parse_voters'] = measure(lambda: list(parse_voters(voters_lines)), repeat, len(voters_lines))
+    results['parse_voting_collection'] = measure(lambda: parse_voting_collection(collection_lines), repeat,
+                                                 len(collection_lines))
+    results['parse_csv'] = measure(lambda: parse_csv(csv_lines), repeat, len(csv_lines))
+    results['parse_csv_table'] = measure(lambda: parse_csv(csv_lines, as_table=True), repeat, len(csv_lines))
+    results['tally_csv'] = measure(lambda: tally_csv(csv_lines), repeat, len(csv_lines))
+    results['evaluate_schulze'] = measure(
+        lambda: [evaluate_schulze(voting_votes, len(skel.options)) for skel, voting_votes, _ in schulze],
+        repeat, num_schulze_votes)
+    results['evaluate_schulze_table'] = measure(
+        lambda: [evaluate_schulze_table(table, i) for _, _, i in schulze], repeat, num_schulze_votes)
+    results['median'] = measure(lambda: [MedianStatistics(voting_votes).median() for voting_votes in median],
+                                repeat, num_median_votes)
+    results['evaluate_median_table'] = measure(lambda: evaluate_median_table(table), repeat, num_median_votes)
+    results['output'] = measure(collection.output, repeat, len(collection_lines))
+
+    return {
+        'parameters': {
+            'voters': num_voters,
+            'votings': num_votings,
+            'options': num_options,
+            'groups': num_groups,
+            'repeat': repeat,
+            'seed': seed,
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'commit': _git_commit(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        },
+        'results': results,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks for the parsers and evaluation functions')
+    parser.add_argument('--voters', type=int, default=10000, help='Number of voters, default is 10000')
+    parser.add_argument('--votings', type=int, default=10, help='Number of votings, default is 10')
+    parser.add_argument('--options', type=int, default=5, help='Number of options of Schulze votings, default is 5')
+    parser.add_argument('--groups', type=int, default=100, help='Number of groups in the collection, default is 100')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of runs of each benchmark, default is 3')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the generators, default is 0')
+    parser.add_argument('--output', '-o', help='Write the results to this file instead of stdout', default=None)
+    args = parser.parse_args()
+
+    res = run_benchmarks(args.voters, args.votings, args.options, args.groups, args.repeat, args.seed)
+    if args.output is None:
+        json.dump(res, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(res, f, indent=2)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Measures the startup time of the package and the command line tool in fresh interpreters and writes the results as
+# JSON, run with
+# python -m benchmarks.startup [--repeat N] [--path DIR] [--output results.json]
+# --path is the directory containing the package, for example a checkout of another commit to compare with.
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+from .run import measure
+
+
+_examples_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'examples')
+
+# name and arguments of the python interpreter for each benchmark
+_commands = [
+    ('interpreter', ['-c', 'pass']),
+    ('import', ['-c', 'import stura_voting_utils']),
+    # what importing the package cost before the names were loaded lazily
+    ('import_all', ['-c', 'import stura_voting_utils as s\n'
+                          'for name in getattr(s, "__all__", ()): getattr(s, name)']),
+    ('cli_help', ['-m', 'stura_voting_utils.voting', '--help']),
+    ('cli_example', ['-m', 'stura_voting_utils.voting', '-f', os.path.join(_examples_dir, 'cmd_example.csv')]),
+]
+
+
+def run_startup_benchmarks(repeat, path):
+    """Run all startup benchmarks.
+
+    Args:
+        repeat (int): Number of runs of each benchmark.
+        path (str): The directory the package is imported from.
+
+    Returns:
+        dict: The parameters and for each benchmark the result of measure (items is always 1).
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = path
+    results = dict()
+    for name, args in _commands:
+        cmd = [sys.executable] + args
+        run = lambda: subprocess.run(cmd, env=env, cwd=path, stdout=subprocess.DEVNULL, check=True)
+        # the first run is not measured, it fills the page cache and writes the bytecode files
+        run()
+        results[name] = measure(run, repeat, 1)
+    return {'parameters': {'repeat': repeat, 'path': path, 'python': sys.version.split()[0]}, 'results': results}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Startup time of the package and the command line tool')
+    parser.add_argument('--repeat', type=int, default=20, help='Number of runs of each benchmark, default is 20')
+    parser.add_argument('--path', default=os.path.dirname(_examples_dir),
+                        help='The directory containing the package, default is this repository')
+    parser.add_argument('--output', '-o', help='Write the results to this file instead of stdout', default=None)
+    args = parser.parse_args()
+
+    res = run_startup_benchmarks(args.repeat, os.path.abspath(args.path))
+    for name, result in res['results'].items():
+        print('%-12s best %7.1f ms  mean %7.1f ms' % (name, 1000 * result['best'], 1000 * result['mean']),
+              file=sys.stderr)
+    if args.output is None:
+        json.dump(res, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(res, f, indent=2)
@@ -12,7 +12,14 @@ setup(
     author_email='fabianwen@posteo.eu',
     license='MIT',
     keywords='voting schulze median',
-    packages=find_packages(exclude=('docs', 'tests', 'env')),
+    packages=find_packages(exclude=('docs', 'tests', 'env', 'benchmarks')),
     include_package_data=True,
+    python_requires='>=3.7',
     install_requires=['pytest'],
+    entry_points={
+        'console_scripts': [
+            'stura-voting=stura_voting_utils.voting:main',
+            'stura-voting-server=stura_voting_utils.server:main',
+        ],
+    },
 )
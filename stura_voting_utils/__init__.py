@@ -1,5 +1,49 @@
-from .utils import WeightedVoter, VotingGroup, VotingCollection, MedianVotingSkeleton, SchulzeVotingSkeleton
-from .parser import ParseException, currency_match, parse_voters, parse_voting_collection, parse_csv, parse_currency
+import importlib
+
+# the public names of the package and the modules defining them. The modules are imported when one of their names is
+# accessed for the first time, so importing the package itself is cheap.
+_exports = {
+    'utils': ('WeightedVoter', 'VotingGroup', 'VotingCollection', 'MedianVotingSkeleton', 'SchulzeVotingSkeleton',
+              'output_currency', 'iter_voters_lines', 'write_voters'),
+    'parser': ('ParseException', 'currency_match', 'parse_voters', 'parse_voting_collection', 'parse_csv',
+               'parse_currency', 'iter_csv_votes', 'tally_csv', 'parse_csv_parallel', 'read_csv_head', 'parse_csv_row'),
+    'tally': ('SchulzeTally', 'MedianTally', 'IncrementalSchulzeTally', 'IncrementalMedianTally'),
+    'ballots': ('BallotTable',),
+    'batch': ('compute_d_batch', 'evaluate_schulze_batch', 'evaluate_schulze_table', 'evaluate_median_batch',
+              'evaluate_median_columns', 'evaluate_median_table'),
+    'paths': ('compute_p_packed', 'compute_p_fast', 'schulze_result'),
+    'aggregation': ('AggregationStats', 'aggregate_schulze_votes', 'aggregate_median_votes', 'aggregate_votes'),
+    'evaluation': ('evaluate_voting', 'evaluate_votings', 'result_to_dict', 'result_from_dict'),
+    'incremental': ('IncrementalCollectionParser',),
+    'archive': ('SessionArchive',),
+    'analysis': ('Scenario', 'ScenarioResult', 'SchulzeAnalysis', 'load_schulze_analyses'),
+    'compression': ('compression_format', 'detect_compression', 'open_binary_input', 'open_input'),
+    'binary': ('MappedBallotTable', 'write_ballot_table', 'save_ballot_table', 'load_ballot_table', 'is_ballot_file'),
+    'registry': ('VoterRegistry', 'load_voter_registry'),
+    'stats': ('StatsHooks', 'StatsRecorder', 'PhaseStats', 'VotingStats', 'get_hooks', 'set_hooks', 'record_stats'),
+    'validation': ('ValidationProblem', 'ValidationReport', 'validate_csv'),
+    'cache': ('ResultCache', 'CacheStats', 'voting_key', 'evaluate_votings_cached', 'default_cache_dir'),
+    'server': ('LiveTally', 'BallotServer', 'load_live_tally'),
+}
+
+_modules = {name: module for module, names in _exports.items() for name in names}
+
+__all__ = sorted(_modules)
+
+
+def __getattr__(name):
+    module = _modules.get(name)
+    if module is None:
+        raise AttributeError('module %r has no attribute %r' % (__name__, name))
+    value = getattr(importlib.import_module('.' + module, __name__), name)
+    # store the value, __getattr__ is only called for names not found in the module
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
 
 __title__ = 'stura_voting_utils'
 __version__ = '0.1.4'
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from time import perf_counter
+
+from .utils import MedianVotingSkeleton, SchulzeVotingSkeleton
+from .stats import get_hooks
+
+from schulze_voting import SchulzeVote
+from median_voting import MedianVote
+
+
+class AggregationStats(object):
+    """Statistics about the aggregation of the votes of a voting.
+
+    Attributes:
+        num_votes (int): The number of votes before the aggregation.
+        num_distinct (int): The number of votes after the aggregation (the number of distinct rankings / values).
+    """
+    def __init__(self, num_votes, num_distinct):
+        self.num_votes = num_votes
+        self.num_distinct = num_distinct
+
+    @property
+    def compression_ratio(self):
+        """float: The number of votes divided by the number of distinct votes (1.0 if there are no votes)."""
+        if self.num_distinct == 0:
+            return 1.0
+        return self.num_votes / self.num_distinct
+
+
+def aggregate_schulze_votes(votes):
+    """Combine all Schulze votes with the same ranking into a single vote.
+
+    The weight of the combined vote is the sum of the weights of all votes with that ranking, so the result of
+    schulze_voting.evaluate_schulze does not change. The combined votes are ordered by the first occurrence of their
+    ranking.
+
+    Args:
+        votes (iterable of schulze_voting.SchulzeVote): The votes to aggregate.
+
+    Returns:
+        (list of schulze_voting.SchulzeVote, AggregationStats): The aggregated votes and statistics.
+
+    Examples:
+        >>> from schulze_voting import SchulzeVote
+        >>> votes, stats = aggregate_schulze_votes([SchulzeVote([0, 1], 2), SchulzeVote([1, 0], 1), SchulzeVote([0, 1], 3)])
+        >>> [(vote.ranking, vote.weight) for vote in votes]
+        [([0, 1], 5), ([1, 0], 1)]
+        >>> stats.compression_ratio
+        1.5
+    """
+    weights = dict()
+    num_votes = 0
+    for vote in votes:
+        key = tuple(vote.ranking)
+        weights[key] = weights.get(key, 0) + vote.weight
+        num_votes += 1
+    res = [SchulzeVote(list(ranking), weight) for ranking, weight in weights.items()]
+    return res, AggregationStats(num_votes, len(res))
+
+
+def aggregate_median_votes(votes):
+    """Combine all median votes with the same value into a single vote.
+
+    The weight of the combined vote is the sum of the weights of all votes for that value, so the result of
+    median_voting.MedianStatistics does not change. The combined votes are ordered by the first occurrence of their
+    value.
+
+    Args:
+        votes (iterable of median_voting.MedianVote): The votes to aggregate.
+
+    Returns:
+        (list of median_voting.MedianVote, AggregationStats): The aggregated votes and statistics.
+    """
+    weights = dict()
+    num_votes = 0
+    for vote in votes:
+        weights[vote.value] = weights.get(vote.value, 0) + vote.weight
+        num_votes += 1
+    res = [MedianVote(value, weight) for value, weight in weights.items()]
+    return res, AggregationStats(num_votes, len(res))
+
+
+def aggregate_votes(all_votings, votes):
+    """Aggregate the votes of all votings, see aggregate_schulze_votes and aggregate_median_votes.
+
+    Args:
+        all_votings (list of MedianVotingSkeleton and SchulzeVotingSkeleton): The votings as returned by parse_csv.
+        votes (list of list of votes): For each voting the votes, as returned by parse_csv (a BallotTable will also
+            do).
+
+    Returns:
+        (list of list of votes, list of AggregationStats): For each voting the aggregated votes and the statistics.
+    """
+    start = perf_counter()
+    res_votes, res_stats = [], []
+    for skel, voting_votes in zip(all_votings, votes):
+        if isinstance(skel, SchulzeVotingSkeleton):
+            aggregated, stats = aggregate_schulze_votes(voting_votes)
+        elif isinstance(skel, MedianVotingSkeleton):
+            aggregated, stats = aggregate_median_votes(voting_votes)
+        else:
+            raise TypeError('Unknown voting type: %s' % type(skel).__name__)
+        res_votes.append(aggregated)
+        res_stats.append(stats)
+    hooks = get_hooks()
+    if hooks is not None:
+        hooks.phase('aggregate', perf_counter() - start)
+    return res_votes, res_stats
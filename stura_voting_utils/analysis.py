@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# What-if analysis for Schulze votings: The matrix d of a voting is the sum of the contributions of all voters, the
+# contribution of a voter is its weight times the pairwise preferences of its ranking. Thus the matrix for a scenario
+# in which some voters abstain or have another weight is computed by subtracting / adding the changed contributions,
+# and if options are withdrawn the matrix of the remaining options is a submatrix of d (the preferences between two
+# options don't depend on the other options). No ballot has to be parsed or tallied again.
+
+from collections import defaultdict
+
+from .utils import SchulzeVotingSkeleton
+from .parser import ParseException, read_csv_head, parse_csv_row
+from .paths import schulze_result
+
+
+class Scenario(object):
+    """A what-if scenario for a Schulze voting.
+
+    Attributes:
+        name (str): The name of the scenario, used in reports.
+        remove (list of str): Names of voters that abstain in this scenario.
+        weights (dict of str to int): Maps names of voters to their weight in this scenario.
+        withdraw (list of int): Indices of options withdrawn in this scenario.
+    """
+    def __init__(self, name, remove=(), weights=None, withdraw=()):
+        self.name = name
+        self.remove = list(remove)
+        self.weights = dict() if weights is None else dict(weights)
+        self.withdraw = list(withdraw)
+
+
+class ScenarioResult(object):
+    """The result of a Scenario.
+
+    Attributes:
+        scenario (Scenario): The scenario.
+        result (schulze_voting.SchulzeRes): The result of the voting with the remaining options, note that the options
+            in this result are numbered 0, ..., number of remaining options - 1.
+        ranking (list of list of int): The ranking groups (as in schulze_voting.SchulzeRes.candidate_wins) with the
+            indices of the options in the original voting.
+        flipped (bool): True if the options ranked first are not the same as in the result without changes.
+    """
+    def __init__(self, scenario, result, ranking, flipped):
+        self.scenario = scenario
+        self.result = result
+        self.ranking = ranking
+        self.flipped = flipped
+
+    @property
+    def winners(self):
+        """list of int: The options ranked first (indices in the original voting)."""
+        return self.ranking[0] if self.ranking else []
+
+    def to_dict(self):
+        """Return the result as a dict that can be serialized with json.
+
+        Returns:
+            dict: The name of the scenario ("scenario"), the ranking, the winners and if the winners changed
+            ("flipped").
+        """
+        return {'scenario': self.scenario.name, 'ranking': self.ranking, 'winners': self.winners,
+                'flipped': self.flipped}
+
+
+class SchulzeAnalysis(object):
+    """Keeps the ballots of a Schulze voting and the matrix d to evaluate what-if scenarios.
+
+    The ballots are grouped by their ranking, for each distinct ranking the pairwise preferences are computed once.
+    Evaluating a scenario costs O(n^2) for each distinct ranking of the changed voters plus the evaluation of the
+    matrix, independent of the number of voters that don't change.
+
+    Attributes:
+        skeleton (SchulzeVotingSkeleton): The voting.
+        n (int): The number of options.
+        d (list of list of int): The matrix d of all ballots.
+        voters (dict of str to (tuple of int, int)): Maps the name of each voter to its ranking and weight. The ranking
+            is None if the voter didn't vote in this voting.
+
+    Examples:
+        >>> analysis = SchulzeAnalysis(SchulzeVotingSkeleton('Chair', ['A', 'B', 'C']))
+        >>> analysis.add('G1', [0, 1, 2], 3)
+        >>> analysis.add('G2', [1, 0, 2], 2)
+        >>> analysis.add('G3', [2, 0, 1], 2)
+        >>> analysis.baseline().candidate_wins
+        [[1], [0], [2]]
+        >>> res = analysis.evaluate(Scenario('G3 abstains', remove=['G3']))
+        >>> res.ranking, res.flipped
+        ([[0], [1], [2]], True)
+        >>> [res.scenario.name for res in analysis.flips([Scenario('G1 x2', weights={'G1': 6}),
+        ...                                               Scenario('Without C', withdraw=[2])])]
+        ['G1 x2']
+    """
+    def __init__(self, skeleton):
+        self.skeleton = skeleton
+        self.n = len(skeleton.options)
+        self.d = [[0 for _ in range(self.n)] for _ in range(self.n)]
+        self.voters = dict()
+        self._pairs = dict()
+        self._baseline = None
+
+    def _get_pairs(self, ranking):
+        # all pairs (i, j) such that option i is preferred over option j in the ranking
+        pairs = self._pairs.get(ranking)
+        if pairs is None:
+            n = self.n
+            pairs = [(i, j) for i in range(n) for j in range(n) if ranking[i] < ranking[j]]
+            self._pairs[ranking] = pairs
+        return pairs
+
+    def _apply(self, d, ranking, weight):
+        for i, j in self._get_pairs(ranking):
+            d[i][j] += weight
+
+    def add(self, name, ranking, weight=1):
+        """Add the ballot of a voter.
+
+        Args:
+            name (str): The name of the voter, must be unique.
+            ranking (list of int): For each option the position in the ranking, None if the voter didn't vote (the
+                voter can be part of scenarios but they don't change the matrix).
+            weight (int): The weight of the voter.
+
+        Raises:
+            ValueError: If there is already a ballot of this voter or the ranking has the wrong length.
+        """
+        if name in self.voters:
+            raise ValueError('Voter "%s" is already part of voting "%s"' % (name, self.skeleton.name))
+        if ranking is not None:
+            if len(ranking) != self.n:
+                raise ValueError('Invalid ranking for voting "%s": Must contain exactly %d options, got %d' %
+                                 (self.skeleton.name, self.n, len(ranking)))
+            ranking = tuple(ranking)
+            self._apply(self.d, ranking, weight)
+        self.voters[name] = (ranking, weight)
+        self._baseline = None
+
+    def baseline(self):
+        """Return the result of the voting without changes.
+
+        Returns:
+            schulze_voting.SchulzeRes: The result.
+        """
+        if self._baseline is None:
+            self._baseline = schulze_result([list(row) for row in self.d], self.n)
+        return self._baseline
+
+    def scenario_matrix(self, scenario):
+        """Compute the matrix d of all options for a scenario (withdrawn options are not removed).
+
+        Args:
+            scenario (Scenario): The scenario.
+
+        Returns:
+            list of list of int: The matrix d.
+
+        Raises:
+            KeyError: If a voter in the scenario is unknown.
+            ValueError: If a voter is removed and has a new weight in the scenario.
+        """
+        # the weight differences are summed up for each distinct ranking first
+        deltas = defaultdict(int)
+        for name in scenario.remove:
+            if name in scenario.weights:
+                raise ValueError('Voter "%s" is removed and changed in scenario "%s"' % (name, scenario.name))
+            ranking, weight = self.voters[name]
+            if ranking is not None:
+                deltas[ranking] -= weight
+        for name, new_weight in scenario.weights.items():
+            ranking, weight = self.voters[name]
+            if ranking is not None:
+                deltas[ranking] += new_weight - weight
+        d = [list(row) for row in self.d]
+        for ranking, delta in deltas.items():
+            if delta:
+                self._apply(d, ranking, delta)
+        return d
+
+    def evaluate(self, scenario):
+        """Evaluate a scenario.
+
+        Args:
+            scenario (Scenario): The scenario.
+
+        Returns:
+            ScenarioResult: The result.
+
+        Raises:
+            KeyError: If a voter in the scenario is unknown.
+            ValueError: If a voter is removed and has a new weight or an option to withdraw doesn't exist.
+        """
+        for option in scenario.withdraw:
+            if not 0 <= option < self.n:
+                raise ValueError('Invalid option in scenario "%s": %d, voting "%s" has %d options' %
+                                 (scenario.name, option, self.skeleton.name, self.n))
+        d = self.scenario_matrix(scenario)
+        withdrawn = set(scenario.withdraw)
+        remaining = [option for option in range(self.n) if option not in withdrawn]
+        if withdrawn:
+            d = [[d[i][j] for j in remaining] for i in remaining]
+        result = schulze_result(d, len(remaining))
+        ranking = [[remaining[option] for option in group] for group in result.candidate_wins]
+        baseline = self.baseline().candidate_wins
+        baseline_winners = set(baseline[0]) if baseline else set()
+        winners = set(ranking[0]) if ranking else set()
+        return ScenarioResult(scenario, result, ranking, winners != baseline_winners)
+
+    def analyze(self, scenarios):
+        """Evaluate a list of scenarios, see evaluate.
+
+        Args:
+            scenarios (list of Scenario): The scenarios.
+
+        Returns:
+            list of ScenarioResult: For each scenario the result.
+        """
+        return [self.evaluate(scenario) for scenario in scenarios]
+
+    def flips(self, scenarios):
+        """Evaluate a list of scenarios and return the results of the scenarios that change the options ranked first.
+
+        Args:
+            scenarios (list of Scenario): The scenarios.
+
+        Returns:
+            list of ScenarioResult: The results with flipped set to True.
+        """
+        return [res for res in self.analyze(scenarios) if res.flipped]
+
+    def abstention_scenarios(self):
+        """Create for each voter with a ballot a scenario in which the voter abstains.
+
+        Returns:
+            list of Scenario: The scenarios, named after the voters.
+        """
+        return [Scenario(name, remove=[name]) for name, (ranking, _) in self.voters.items() if ranking is not None]
+
+    def withdrawal_scenarios(self):
+        """Create for each option a scenario in which the option is withdrawn.
+
+        Returns:
+            list of Scenario: The scenarios, named after the options.
+        """
+        return [Scenario(option, withdraw=[i]) for i, option in enumerate(self.skeleton.options)]
+
+
+def load_schulze_analyses(reader, delimiter=','):
+    """Parse a csv file (see parse_csv) and create a SchulzeAnalysis for each Schulze voting.
+
+    The first column of each row is used as the name of the voter.
+
+    Args:
+        reader: File like object to read from (a list will also do); something to iterate over and receive lines.
+        delimiter (str): The csv delimiter.
+
+    Returns:
+        (list of MedianVotingSkeleton and SchulzeVotingSkeleton, list of SchulzeAnalysis): All votings sorted by their
+        id and for each voting the analysis (None for median votings).
+
+    Raises:
+        ParseException: If there is a syntax / parse error or a name is used in more than one row.
+
+    Examples:
+        >>> votings, analyses = load_schulze_analyses(['Name,Gewicht,Schulze (2),Median (100)', 'G1,5,0/1,20',
+        ...                                            'G2,3,1/0,42', 'G3,3,1/0,'])
+        >>> [res.flipped for res in analyses[0].analyze(analyses[0].abstention_scenarios())]
+        [False, True, True]
+    """
+    all_votings, csv_reader = read_csv_head(reader, delimiter)
+    analyses = [SchulzeAnalysis(skel) if isinstance(skel, SchulzeVotingSkeleton) else None for skel in all_votings]
+    for row_num, row in enumerate(csv_reader, 2):
+        weight, entries = parse_csv_row(all_votings, row, row_num)
+        for analysis, entry in zip(analyses, entries):
+            if analysis is not None:
+                try:
+                    analysis.add(row[0].strip(), entry, weight)
+                except ValueError as e:
+                    raise ParseException('Invalid ballot in row %d: %s' % (row_num, str(e)))
+    return all_votings, analyses
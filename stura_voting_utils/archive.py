@@ -0,0 +1,542 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# An archive of sessions in a SQLite database. A session consists of a voting collection (groups and votings), the
+# list of voters and the ballots from a csv file (see parse_csv), all of them are optional. Results of the votings can
+# be stored too. Everything is inserted with executemany in one transaction per call, queries return the usual
+# objects (VotingCollection, skeletons, WeightedVoter, votes), so the text files are not needed again.
+
+import json
+import sqlite3
+from datetime import datetime
+
+from .utils import WeightedVoter, VotingGroup, VotingCollection, MedianVotingSkeleton, SchulzeVotingSkeleton
+from .parser import ParseException, parse_voters, parse_voting_collection, read_csv_head, parse_csv_row
+from .compression import open_input
+from .evaluation import evaluate_votings, result_to_dict, result_from_dict
+
+from schulze_voting import SchulzeVote
+from median_voting import MedianVote
+
+# number of csv rows inserted with one executemany
+_BATCH_ROWS = 4096
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    date TEXT,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS voting_groups (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions (id),
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS votings (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions (id),
+    group_id INTEGER NOT NULL REFERENCES voting_groups (id),
+    position INTEGER NOT NULL,
+    voting_id INTEGER,
+    type TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value INTEGER,
+    currency TEXT
+);
+CREATE TABLE IF NOT EXISTS options (
+    voting INTEGER NOT NULL REFERENCES votings (id),
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (voting, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS voters (
+    session_id INTEGER NOT NULL REFERENCES sessions (id),
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    weight INTEGER NOT NULL,
+    PRIMARY KEY (session_id, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ballots (
+    session_id INTEGER NOT NULL REFERENCES sessions (id),
+    row INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    weight INTEGER NOT NULL,
+    PRIMARY KEY (session_id, row)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS votes (
+    voting INTEGER NOT NULL REFERENCES votings (id),
+    row INTEGER NOT NULL,
+    value INTEGER,
+    ranking TEXT,
+    PRIMARY KEY (voting, row)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS results (
+    voting INTEGER PRIMARY KEY REFERENCES votings (id),
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_name ON sessions (name);
+CREATE INDEX IF NOT EXISTS voting_groups_session ON voting_groups (session_id, position);
+CREATE INDEX IF NOT EXISTS votings_session ON votings (session_id, position);
+CREATE INDEX IF NOT EXISTS votings_group ON votings (group_id);
+CREATE INDEX IF NOT EXISTS votings_name ON votings (name);
+CREATE INDEX IF NOT EXISTS voters_name ON voters (name);
+CREATE INDEX IF NOT EXISTS ballots_name ON ballots (name);
+"""
+
+
+def _date_to_str(date):
+    return None if date is None else date.isoformat()
+
+
+def _date_from_str(s):
+    return None if s is None else datetime.fromisoformat(s)
+
+
+def _skeleton_from_row(row, options):
+    _, voting_id, kind, name, value, currency = row
+    if kind == 'schulze':
+        return SchulzeVotingSkeleton(name, options, voting_id)
+    return MedianVotingSkeleton(name, value, currency, voting_id)
+
+
+def _same_type(skel, other):
+    if isinstance(skel, SchulzeVotingSkeleton):
+        return isinstance(other, SchulzeVotingSkeleton) and len(skel.options) == len(other.options)
+    return isinstance(other, MedianVotingSkeleton)
+
+
+class SessionArchive(object):
+    """An archive of sessions stored in a SQLite database.
+
+    Sessions are identified by the id returned by add_session (or add_collection), the votings of a session by their
+    position: The votings of all groups in the order of the groups, sorted by their id in each group. This is the
+    order of the columns in the csv file of the session.
+
+    The archive can be used as a context manager, the database is closed at the end.
+
+    Attributes:
+        connection (sqlite3.Connection): The connection to the database.
+
+    Examples:
+        >>> archive = SessionArchive()
+        >>> session = archive.add_collection(parse_voting_collection(['# Session', '## Finance', '### Budget',
+        ...                                                           '- 100 €', '### Chair', '* A', '* B']))
+        >>> archive.add_ballots(session, ['Name,Gewicht,Median (10000),Schulze (2)', 'G1,2,5000,1/0', 'G2,1,800,0/1'])
+        2
+        >>> archive.find_votings('Chair')[0][:2]
+        (1, 1)
+        >>> [result if isinstance(result, int) else result.candidate_wins for result in archive.evaluate(session)]
+        [5000, [[1], [0]]]
+    """
+    def __init__(self, path=':memory:'):
+        self.connection = sqlite3.connect(path)
+        # SQLite doesn't check the references between the tables unless it's enabled for each connection
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        with self.connection:
+            self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        """Close the database."""
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _add_session(self, name, date, source):
+        cur = self.connection.execute('INSERT INTO sessions (name, date, source) VALUES (?, ?, ?)',
+                                      (name, _date_to_str(date), source))
+        return cur.lastrowid
+
+    def add_session(self, name, date=None, source=None):
+        """Add an empty session, votings can be added with add_ballots.
+
+        Args:
+            name (str): The name of the session.
+            date (datetime.datetime): The date of the session, can be None.
+            source (str): Where the session comes from (for example the path of the file), can be None.
+
+        Returns:
+            int: The id of the session.
+        """
+        with self.connection:
+            return self._add_session(name, date, source)
+
+    def _add_groups(self, session_id, groups, first_group=0, first_voting=0):
+        conn = self.connection
+        position = first_voting
+        options = []
+        for group_position, group in enumerate(groups, first_group):
+            group_id = conn.execute('INSERT INTO voting_groups (session_id, position, name) VALUES (?, ?, ?)',
+                                    (session_id, group_position, group.name)).lastrowid
+            for skel in group.get_votings():
+                if isinstance(skel, SchulzeVotingSkeleton):
+                    row = (session_id, group_id, position, skel.id, 'schulze', skel.name, None, None)
+                elif isinstance(skel, MedianVotingSkeleton):
+                    row = (session_id, group_id, position, skel.id, 'median', skel.name, skel.value, skel.currency)
+                else:
+                    raise TypeError('Unknown voting type: %s' % type(skel).__name__)
+                voting = conn.execute('INSERT INTO votings (session_id, group_id, position, voting_id, type, name, '
+                                      'value, currency) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', row).lastrowid
+                if isinstance(skel, SchulzeVotingSkeleton):
+                    options.extend((voting, i, option) for i, option in enumerate(skel.options))
+                position += 1
+        conn.executemany('INSERT INTO options (voting, position, name) VALUES (?, ?, ?)', options)
+
+    def _add_collection(self, collection, source):
+        session_id = self._add_session(collection.name, collection.date, source)
+        self._add_groups(session_id, collection.groups)
+        return session_id
+
+    def add_collection(self, collection, source=None):
+        """Add a session for a voting collection.
+
+        Args:
+            collection (VotingCollection): The collection, the name and date of the session are taken from it.
+            source (str): Where the collection comes from (for example the path of the file), can be None.
+
+        Returns:
+            int: The id of the session.
+        """
+        with self.connection:
+            return self._add_collection(collection, source)
+
+    def _check_session(self, session_id):
+        if self.connection.execute('SELECT 1 FROM sessions WHERE id = ?', (session_id, )).fetchone() is None:
+            raise KeyError(session_id)
+
+    def _add_voters(self, session_id, voters):
+        self._check_session(session_id)
+        start = self.connection.execute('SELECT COUNT(*) FROM voters WHERE session_id = ?', (session_id, )).fetchone()[0]
+        self.connection.executemany('INSERT INTO voters (session_id, position, name, weight) VALUES (?, ?, ?, ?)',
+                                    ((session_id, i, voter.name, voter.weight)
+                                     for i, voter in enumerate(voters, start)))
+
+    def add_voters(self, session_id, voters):
+        """Add voters to a session.
+
+        Args:
+            session_id (int): The id of the session.
+            voters (iterable of WeightedVoter): The voters, for example from parse_voters.
+
+        Raises:
+            KeyError: If there is no session with this id.
+        """
+        with self.connection:
+            self._add_voters(session_id, voters)
+
+    def _add_ballots(self, session_id, reader, delimiter):
+        self._check_session(session_id)
+        conn = self.connection
+        csv_votings, csv_reader = read_csv_head(reader, delimiter)
+        if conn.execute('SELECT 1 FROM ballots WHERE session_id = ? LIMIT 1', (session_id, )).fetchone():
+            raise ValueError('Session %d already contains ballots' % session_id)
+        session_votings = self.get_votings(session_id)
+        if not session_votings:
+            num_groups = conn.execute('SELECT COUNT(*) FROM voting_groups WHERE session_id = ?',
+                                      (session_id, )).fetchone()[0]
+            # the votings of a csv file form a single group (as in parse_csv)
+            group = VotingGroup('Votings', [skel for skel in csv_votings if isinstance(skel, MedianVotingSkeleton)],
+                                [skel for skel in csv_votings if isinstance(skel, SchulzeVotingSkeleton)])
+            self._add_groups(session_id, [group], num_groups)
+            session_votings = csv_votings
+        elif len(session_votings) != len(csv_votings) or not all(map(_same_type, session_votings, csv_votings)):
+            raise ParseException('The votings in the csv file don\'t match the votings of session %d' % session_id)
+        ids = [row[0] for row in conn.execute('SELECT id FROM votings WHERE session_id = ? ORDER BY position',
+                                              (session_id, ))]
+        ballots, votes = [], []
+        num_rows = 0
+        for row_num, row in enumerate(csv_reader, 2):
+            weight, entries = parse_csv_row(csv_votings, row, row_num)
+            ballots.append((session_id, row_num, row[0].strip(), weight))
+            for voting, entry in zip(ids, entries):
+                if entry is None:
+                    continue
+                elif isinstance(entry, list):
+                    votes.append((voting, row_num, None, '/'.join(map(str, entry))))
+                else:
+                    votes.append((voting, row_num, entry, None))
+            num_rows += 1
+            if len(ballots) >= _BATCH_ROWS:
+                self._insert_ballots(ballots, votes)
+                ballots, votes = [], []
+        self._insert_ballots(ballots, votes)
+        return num_rows
+
+    def _insert_ballots(self, ballots, votes):
+        self.connection.executemany('INSERT INTO ballots (session_id, row, name, weight) VALUES (?, ?, ?, ?)',
+                                    ballots)
+        self.connection.executemany('INSERT INTO votes (voting, row, value, ranking) VALUES (?, ?, ?, ?)', votes)
+
+    def add_ballots(self, session_id, reader, delimiter=','):
+        """Add the ballots from a csv file (see parse_csv) to a session.
+
+        If the session has votings the columns of the csv file must match them (same number of votings, same types and
+        number of options), otherwise the votings from the head of the csv file are added to the session. A session
+        can only have one csv file.
+
+        Args:
+            session_id (int): The id of the session.
+            reader: File like object to read from (a list will also do); something to iterate over and receive lines.
+            delimiter (str): The csv delimiter.
+
+        Returns:
+            int: The number of ballots (rows) added.
+
+        Raises:
+            ParseException: If there is a syntax / parse error or the votings don't match, nothing is added in this
+                case.
+            ValueError: If the session already contains ballots.
+            KeyError: If there is no session with this id.
+        """
+        with self.connection:
+            return self._add_ballots(session_id, reader, delimiter)
+
+    def add_files(self, collection_path=None, voters_path=None, csv_path=None, delimiter=',', name=None):
+        """Add a session from its files, all files are optional and may be compressed (see open_input).
+
+        Everything is added in one transaction.
+
+        Args:
+            collection_path (str): The path of the voting collection.
+            voters_path (str): The path of the list of voters.
+            csv_path (str): The path of the csv file with the ballots.
+            delimiter (str): The csv delimiter.
+            name (str): The name of the session if there is no collection, None uses the path of the csv file.
+
+        Returns:
+            int: The id of the session.
+
+        Raises:
+            ParseException: If there is a syntax / parse error in one of the files, nothing is added in this case.
+        """
+        with self.connection:
+            if collection_path is not None:
+                with open_input(collection_path) as f:
+                    session_id = self._add_collection(parse_voting_collection(f), collection_path)
+            else:
+                session_id = self._add_session(csv_path if name is None else name, None, csv_path)
+            if voters_path is not None:
+                with open_input(voters_path) as f:
+                    self._add_voters(session_id, parse_voters(f))
+            if csv_path is not None:
+                with open_input(csv_path) as f:
+                    self._add_ballots(session_id, f, delimiter)
+            return session_id
+
+    def sessions(self):
+        """Return all sessions.
+
+        Returns:
+            list of (int, str, datetime.datetime): The id, name and date of each session.
+        """
+        return [(session_id, name, _date_from_str(date))
+                for session_id, name, date in self.connection.execute('SELECT id, name, date FROM sessions ORDER BY id')]
+
+    def find_sessions(self, name):
+        """Return the ids of all sessions with a certain name.
+
+        Args:
+            name (str): The name of the sessions.
+
+        Returns:
+            list of int: The ids of the sessions.
+        """
+        return [row[0] for row in self.connection.execute('SELECT id FROM sessions WHERE name = ? ORDER BY id',
+                                                          (name, ))]
+
+    def _options(self, where, params):
+        options = dict()
+        for voting, name in self.connection.execute(
+                'SELECT options.voting, options.name FROM options JOIN votings ON votings.id = options.voting '
+                'WHERE %s ORDER BY options.voting, options.position' % where, params):
+            options.setdefault(voting, []).append(name)
+        return options
+
+    def get_votings(self, session_id):
+        """Return the votings of a session in the order of their position.
+
+        Args:
+            session_id (int): The id of the session.
+
+        Returns:
+            list of MedianVotingSkeleton and SchulzeVotingSkeleton: The votings.
+        """
+        options = self._options('votings.session_id = ?', (session_id, ))
+        rows = self.connection.execute('SELECT id, voting_id, type, name, value, currency FROM votings '
+                                       'WHERE session_id = ? ORDER BY position', (session_id, ))
+        return [_skeleton_from_row(row, options.get(row[0], [])) for row in rows]
+
+    def get_collection(self, session_id):
+        """Return a session as a voting collection.
+
+        Args:
+            session_id (int): The id of the session.
+
+        Returns:
+            VotingCollection: The collection with all groups and votings of the session.
+
+        Raises:
+            KeyError: If there is no session with this id.
+        """
+        row = self.connection.execute('SELECT name, date FROM sessions WHERE id = ?', (session_id, )).fetchone()
+        if row is None:
+            raise KeyError(session_id)
+        groups = dict()
+        for group_id, name in self.connection.execute('SELECT id, name FROM voting_groups WHERE session_id = ? '
+                                                      'ORDER BY position', (session_id, )):
+            groups[group_id] = VotingGroup(name, [], [])
+        options = self._options('votings.session_id = ?', (session_id, ))
+        for skel_row in self.connection.execute('SELECT id, voting_id, type, name, value, currency, group_id '
+                                                'FROM votings WHERE session_id = ? ORDER BY position',
+                                                (session_id, )):
+            groups[skel_row[6]].add_voting(_skeleton_from_row(skel_row[:6], options.get(skel_row[0], [])))
+        return VotingCollection(row[0], _date_from_str(row[1]), list(groups.values()))
+
+    def find_votings(self, name):
+        """Find votings by name in all sessions.
+
+        Args:
+            name (str): The name of the votings.
+
+        Returns:
+            list of (int, int, MedianVotingSkeleton or SchulzeVotingSkeleton): The id of the session, the position of
+            the voting and the voting.
+        """
+        options = self._options('votings.name = ?', (name, ))
+        return [(session_id, position, _skeleton_from_row(row, options.get(row[0], [])))
+                for session_id, position, *row in self.connection.execute(
+                    'SELECT session_id, position, id, voting_id, type, name, value, currency FROM votings '
+                    'WHERE name = ? ORDER BY session_id, position', (name, ))]
+
+    def get_voters(self, session_id):
+        """Return the voters of a session.
+
+        Args:
+            session_id (int): The id of the session.
+
+        Returns:
+            list of WeightedVoter: The voters in the order they were added.
+        """
+        return [WeightedVoter(name, weight) for name, weight in self.connection.execute(
+            'SELECT name, weight FROM voters WHERE session_id = ? ORDER BY position', (session_id, ))]
+
+    def voter_sessions(self, name):
+        """Return the sessions a voter was part of (in the list of voters or with a ballot).
+
+        Args:
+            name (str): The name of the voter.
+
+        Returns:
+            list of int: The ids of the sessions.
+        """
+        return [row[0] for row in self.connection.execute(
+            'SELECT session_id FROM voters WHERE name = ? UNION SELECT session_id FROM ballots WHERE name = ? '
+            'ORDER BY session_id', (name, name))]
+
+    def get_votes(self, session_id):
+        """Return the votes of a session in the same format as parse_csv.
+
+        Args:
+            session_id (int): The id of the session.
+
+        Returns:
+            (list of MedianVotingSkeleton and SchulzeVotingSkeleton, list of list of votes): The votings and for each
+            voting the list of votes (median_voting.MedianVote or schulze_voting.SchulzeVote) in the order of the rows.
+        """
+        all_votings = self.get_votings(session_id)
+        votes = [[] for _ in all_votings]
+        rows = self.connection.execute(
+            'SELECT votings.position, ballots.weight, votes.value, votes.ranking FROM votes '
+            'JOIN votings ON votings.id = votes.voting '
+            'JOIN ballots ON ballots.session_id = votings.session_id AND ballots.row = votes.row '
+            'WHERE votings.session_id = ? ORDER BY votings.position, votes.row', (session_id, ))
+        for position, weight, value, ranking in rows:
+            if ranking is None:
+                votes[position].append(MedianVote(value, weight))
+            else:
+                votes[position].append(SchulzeVote([int(x) for x in ranking.split('/')], weight))
+        return all_votings, votes
+
+    def _voting_ids(self, session_id):
+        return [row[0] for row in self.connection.execute('SELECT id FROM votings WHERE session_id = ? '
+                                                          'ORDER BY position', (session_id, ))]
+
+    def store_results(self, session_id, results):
+        """Store the results of the votings of a session, existing results are replaced.
+
+        Args:
+            session_id (int): The id of the session.
+            results (list): For each voting the result as returned by evaluate_votings, None entries for Schulze
+                votings are skipped.
+
+        Raises:
+            KeyError: If there is no session with this id.
+        """
+        self._check_session(session_id)
+        all_votings = self.get_votings(session_id)
+        rows = [(voting, json.dumps(result_to_dict(skel, result)))
+                for voting, skel, result in zip(self._voting_ids(session_id), all_votings, results)
+                if result is not None or isinstance(skel, MedianVotingSkeleton)]
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO results (voting, result) VALUES (?, ?)', rows)
+
+    def get_results(self, session_id):
+        """Return the stored results of a session.
+
+        Args:
+            session_id (int): The id of the session.
+
+        Returns:
+            dict of int to result: Maps the position of each voting with a stored result to the result
+            (schulze_voting.SchulzeRes or the agreed value as returned by evaluate_voting).
+        """
+        return {position: result_from_dict(json.loads(result)) for position, result in self.connection.execute(
+            'SELECT votings.position, results.result FROM results JOIN votings ON votings.id = results.voting '
+            'WHERE votings.session_id = ?', (session_id, ))}
+
+    def evaluate(self, session_id, jobs=1):
+        """Return the results of all votings of a session, results that are not stored are computed and stored.
+
+        Args:
+            session_id (int): The id of the session.
+            jobs (int): Number of worker processes, see evaluate_votings.
+
+        Returns:
+            list: For each voting the result as described in evaluate_voting.
+        """
+        stored = self.get_results(session_id)
+        num_votings = self.connection.execute('SELECT COUNT(*) FROM votings WHERE session_id = ?',
+                                               (session_id, )).fetchone()[0]
+        missing = [i for i in range(num_votings) if i not in stored]
+        if missing:
+            all_votings, votes = self.get_votes(session_id)
+            computed = evaluate_votings([all_votings[i] for i in missing], [votes[i] for i in missing], jobs)
+            stored.update(zip(missing, computed))
+            self.store_results(session_id, [stored[i] for i in range(num_votings)])
+        return [stored[i] for i in range(num_votings)]
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from array import array
+
+from .utils import MedianVotingSkeleton, SchulzeVotingSkeleton
+
+from schulze_voting import SchulzeVote
+from median_voting import MedianVote
+
+# typecode used for all arrays in a BallotTable (signed 64 bit int)
+TYPECODE = 'q'
+
+# value stored for an empty entry (the voter did not take part in the voting)
+MISSING = -(2 ** 63)
+
+
+class BallotTable(object):
+    """A column oriented store for all votes from a csv file.
+
+    Instead of one object for each vote the table stores one array per voting and a weight vector shared by all
+    votings. For a Schulze voting with n options the array contains n entries for each row (the ranking of that row),
+    for a median voting it contains the value of each row. Empty entries are stored as MISSING, so MISSING itself
+    (-2 ** 63) can't be stored as a value or position.
+
+    The table can be used in place of the list of votes returned by parse_csv: table[i] returns the list of votes
+    (median_voting.MedianVote or schulze_voting.SchulzeVote) of the i-th voting, the objects are created on each
+    access.
+
+    Attributes:
+        votings (list of MedianVotingSkeleton and SchulzeVotingSkeleton): The votings, sorted by their id.
+        weights (array of int): The weight of each row.
+        columns (list of array of int): The entries for each voting as described above.
+    """
+    def __init__(self, votings, weights=None, columns=None):
+        self.votings = votings
+        self.weights = array(TYPECODE) if weights is None else weights
+        if columns is None:
+            columns = [array(TYPECODE) for _ in votings]
+        self.columns = columns
+
+    @property
+    def num_rows(self):
+        """int: The number of rows (voters) in the table."""
+        return len(self.weights)
+
+    def append_row(self, weight, entries):
+        """Append a row to the table.
+
+        Args:
+            weight (int): Weight of the voter.
+            entries (list): For each voting the ranking (list of int) for Schulze votings, the value (int) for median
+                votings or None if the entry is empty.
+
+        Raises:
+            ValueError: If an entry contains MISSING, nothing is appended in this case.
+            OverflowError: If a value doesn't fit into a signed 64 bit int.
+        """
+        for skel, entry in zip(self.votings, entries):
+            if entry is None:
+                continue
+            if MISSING in entry if isinstance(skel, SchulzeVotingSkeleton) else entry == MISSING:
+                raise ValueError('%d is reserved for empty entries' % MISSING)
+        self.weights.append(weight)
+        for skel, col, entry in zip(self.votings, self.columns, entries):
+            if isinstance(skel, SchulzeVotingSkeleton):
+                if entry is None:
+                    col.extend([MISSING] * len(skel.options))
+                else:
+                    col.extend(entry)
+            else:
+                col.append(MISSING if entry is None else entry)
+
+    def num_options(self, i):
+        """Return the number of entries per row in the column of the i-th voting.
+
+        Args:
+            i (int): Index of the voting.
+
+        Returns:
+            int: The number of options for Schulze votings and 1 for median votings.
+        """
+        skel = self.votings[i]
+        if isinstance(skel, SchulzeVotingSkeleton):
+            return len(skel.options)
+        return 1
+
+    def option_column(self, i, option):
+        """Return the ranking position of a single option for each row.
+
+        Args:
+            i (int): Index of the Schulze voting.
+            option (int): The option.
+
+        Returns:
+            array of int: For each row the position of the option in the ranking (MISSING for empty entries).
+        """
+        return self.columns[i][option::self.num_options(i)]
+
+    def iter_votes(self, i):
+        """Iterate over the votes of the i-th voting, empty entries are skipped.
+
+        Args:
+            i (int): Index of the voting.
+
+        Yields:
+            median_voting.MedianVote or schulze_voting.SchulzeVote: All votes of the voting.
+        """
+        skel = self.votings[i]
+        col = self.columns[i]
+        if isinstance(skel, SchulzeVotingSkeleton):
+            n = len(skel.options)
+            for row, weight in enumerate(self.weights):
+                start = row * n
+                if n == 0 or col[start] == MISSING:
+                    continue
+                yield SchulzeVote(list(col[start:start + n]), weight)
+        elif isinstance(skel, MedianVotingSkeleton):
+            for value, weight in zip(col, self.weights):
+                if value == MISSING:
+                    continue
+                yield MedianVote(value, weight)
+        else:
+            assert False
+
+    def __len__(self):
+        return len(self.votings)
+
+    def __getitem__(self, i):
+        return list(self.iter_votes(i))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
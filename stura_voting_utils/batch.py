@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import sys
+from array import array
+from bisect import bisect_right
+from itertools import compress, accumulate
+from operator import lt, gt
+
+from .utils import MedianVotingSkeleton
+from .ballots import TYPECODE, MISSING
+from .paths import schulze_result
+
+
+# maximal number of rows processed at once by compute_d_batch
+_BLOCK_ROWS = 1 << 16
+
+# upper bound in bytes for the temporary data of one block: the masks of _add_d_masks contain one byte per row for
+# each option and distinct position, so blocks with many options or positions are split into smaller blocks
+_MASK_BUDGET = 32 << 20
+
+
+def _popcount(x):
+    return bin(x).count('1')
+
+
+if hasattr(int, 'bit_count'):
+    _popcount = int.bit_count
+
+
+def _table(pred):
+    return bytes(1 if pred(x) else 0 for x in range(256))
+
+
+# translation tables for bytes.translate, computed on demand
+_eq_tables = {}
+_gt_tables = {}
+_bit_tables = {}
+_nonzero_table = _table(lambda x: x != 0)
+_high_table = _table(lambda x: x == 0x80)
+_shift_table = bytes((x + 1) & 0xff for x in range(256))
+
+
+def _eq_table(p):
+    if p not in _eq_tables:
+        _eq_tables[p] = _table(lambda x: x == p)
+    return _eq_tables[p]
+
+
+def _gt_table(p):
+    if p not in _gt_tables:
+        _gt_tables[p] = _table(lambda x: x > p)
+    return _gt_tables[p]
+
+
+def _bit_table(shift):
+    if shift not in _bit_tables:
+        _bit_tables[shift] = _table(lambda x: (x >> shift) & 1)
+    return _bit_tables[shift]
+
+
+def _int64_bytes(values):
+    # the bytes of values as 64 bit ints split by their byte position, index 0 is the least significant byte
+    try:
+        view = memoryview(values)
+        if view.format != TYPECODE:
+            raise TypeError('Not a buffer of 64 bit ints')
+    except TypeError:
+        view = memoryview(array(TYPECODE, values))
+    raw = view.tobytes()
+    if sys.byteorder == 'little':
+        return [raw[k::8] for k in range(8)]
+    return [raw[7 - k::8] for k in range(8)]
+
+
+def _encode_positions(values):
+    # encodes each value into a single byte: MISSING becomes 0, 0 <= v <= 254 becomes v + 1, this keeps the order of
+    # the values. Returns None if there is a value that can't be encoded this way.
+    parts = _int64_bytes(values)
+    low, high = parts[0], parts[7]
+    for mid in parts[1:7]:
+        if mid.count(0) != len(mid):
+            return None
+    if high.count(0) + high.count(0x80) != len(high):
+        return None
+    missing = int.from_bytes(high.translate(_high_table), 'little')
+    if missing & int.from_bytes(low.translate(_nonzero_table), 'little'):
+        return None
+    if low.count(0xff):
+        return None
+    encoded = int.from_bytes(low.translate(_shift_table), 'little') - missing
+    return encoded.to_bytes(len(low), 'little')
+
+
+def _weight_masks(weights):
+    # for each bit b of the weights a mask that contains a 1 byte for each row with bit b set, None for negative
+    # weights
+    if not len(weights):
+        return []
+    if min(weights) < 0:
+        return None
+    parts = _int64_bytes(weights)
+    return [int.from_bytes(parts[b // 8].translate(_bit_table(b % 8)), 'little')
+            for b in range(max(weights).bit_length())]
+
+
+def _add_d_generic(res, column, weights, n):
+    positions = [column[option::n] for option in range(n)]
+    for i in range(n):
+        pos_i = positions[i]
+        res_i = res[i]
+        for j in range(i + 1, n):
+            pos_j = positions[j]
+            res_i[j] += sum(compress(weights, map(lt, pos_i, pos_j)))
+            res[j][i] += sum(compress(weights, map(gt, pos_i, pos_j)))
+
+
+def _add_d_masks(res, encoded, weight_masks, n, values):
+    positions = [encoded[option::n] for option in range(n)]
+    # for each option and value p a mask containing the rows in which the option is ranked worse than p
+    worse = [[int.from_bytes(pos.translate(_gt_table(p)), 'little') for p in values] for pos in positions]
+    for i in range(n):
+        pos_i = positions[i]
+        equal = [(k, int.from_bytes(pos_i.translate(_eq_table(p)), 'little')) for k, p in enumerate(values)]
+        equal = [(k, mask) for k, mask in equal if mask]
+        res_i = res[i]
+        for j in range(n):
+            if i == j:
+                continue
+            worse_j = worse[j]
+            # all rows in which i is ranked better than j
+            better = 0
+            for k, mask in equal:
+                better |= mask & worse_j[k]
+            if better:
+                res_i[j] += sum(_popcount(better & w_mask) << b for b, w_mask in enumerate(weight_masks))
+
+
+def compute_d_batch(column, weights, n):
+    """Compute the matrix d for a whole column of Schulze rankings at once.
+
+    Instead of iterating over the votes and comparing all pairs of options for each vote (as
+    schulze_voting.compute_d does) this function compares the positions of two options for a whole block of rows
+    at once.
+
+    If all positions are between 0 and 254 (this is the case for all usual rankings) each block is encoded with one
+    byte per entry and the comparisons are done with bit masks over all rows (bytes.translate and operations on big
+    ints), so there is no Python code executed per row at all. Otherwise each pair of options is compared row by
+    row in C code (map and itertools.compress).
+
+    Rows in which all entries are equal (for example the MISSING entries of a BallotTable) don't change the result.
+
+    Args:
+        column (sequence of int): The rankings of all rows one after another, i.e. the ranking of row r is
+            column[r * n:(r + 1) * n]. The column of a BallotTable has this form.
+        weights (sequence of int): The weight of each row.
+        n (int): The number of options.
+
+    Returns:
+        list of list of int: The matrix d.
+
+    Examples:
+        >>> from schulze_voting import SchulzeVote, compute_d
+        >>> rankings = [[0, 1, 2], [2, 0, 1], [1, 1, 0], [0, 2, 1]]
+        >>> weights = [3, 2, 4, 1]
+        >>> column = [pos for ranking in rankings for pos in ranking]
+        >>> compute_d_batch(column, weights, 3)
+        [[0, 4, 4], [2, 0, 5], [6, 5, 0]]
+        >>> compute_d([SchulzeVote(r, w) for r, w in zip(rankings, weights)], 3)
+        [[0, 4, 4], [2, 0, 5], [6, 5, 0]]
+    """
+    res = [[0 for _ in range(n)] for _ in range(n)]
+    if n == 0:
+        return res
+    # the bytes of a block are copied twice while encoding it (16 bytes per entry)
+    block_rows = max(1, min(_BLOCK_ROWS, _MASK_BUDGET // (16 * n)))
+    for start in range(0, len(weights), block_rows):
+        block_weights = weights[start:start + block_rows]
+        _add_d_block(res, column[start * n:(start + len(block_weights)) * n], block_weights, n)
+    return res
+
+
+def _add_d_block(res, block, weights, n):
+    weight_masks = _weight_masks(weights)
+    encoded = None if weight_masks is None else _encode_positions(block)
+    if encoded is None:
+        _add_d_generic(res, block, weights, n)
+        return
+    values = sorted(set(encoded))
+    rows = max(1, _MASK_BUDGET // (n * len(values)))
+    if rows >= len(weights):
+        _add_d_masks(res, encoded, weight_masks, n, values)
+        return
+    # the masks would exceed the budget, the smaller blocks have at most as many distinct positions
+    for start in range(0, len(weights), rows):
+        sub_weights = weights[start:start + rows]
+        _add_d_block(res, block[start * n:(start + len(sub_weights)) * n], sub_weights, n)
+
+
+def evaluate_schulze_batch(column, weights, n):
+    """Evaluate a Schulze voting given a whole column of rankings, see compute_d_batch.
+
+    The result is the same as schulze_voting.evaluate_schulze returns for the votes in the column.
+
+    Args:
+        column (sequence of int): The rankings of all rows one after another.
+        weights (sequence of int): The weight of each row.
+        n (int): The number of options.
+
+    Returns:
+        schulze_voting.SchulzeRes: All (intermediate) results for the voting.
+    """
+    return schulze_result(compute_d_batch(column, weights, n), n)
+
+
+def evaluate_schulze_table(table, i):
+    """Evaluate the i-th voting (a Schulze voting) of a BallotTable, see evaluate_schulze_batch.
+
+    Args:
+        table (BallotTable): The table containing the votes.
+        i (int): Index of the voting.
+
+    Returns:
+        schulze_voting.SchulzeRes: All (intermediate) results for the voting.
+    """
+    return evaluate_schulze_batch(table.columns[i], table.weights, table.num_options(i))
+
+
+def evaluate_median_batch(column, weights, votes_required=None):
+    """Compute the agreed value of a median voting given its column of values.
+
+    The result is the same as median_voting.MedianStatistics(votes).median(votes_required) for the votes in the
+    column. Instead of creating a vote object for each row the non-empty rows are sorted by their value (an argsort),
+    the weights are accumulated in this order and the first position where the accumulated weight is greater than
+    votes_required is found by a binary search.
+
+    Args:
+        column (sequence of int): The value of each row, MISSING for empty entries.
+        weights (sequence of int): The weight of each row.
+        votes_required (int): The number of votes required for a majority, strictly more are required. If it is not
+            given it is set to the weight sum // 2.
+
+    Returns:
+        int: The agreed value or None if no value was agreed upon.
+
+    Examples:
+        >>> evaluate_median_batch([20, 20, MISSING, 30, 100], [5, 5, 8, 3, 7])
+        20
+        >>> evaluate_median_batch([20, 30], [1, 1], votes_required=2) is None
+        True
+    """
+    present = list(map(MISSING.__ne__, column))
+    values = list(compress(column, present))
+    row_weights = list(compress(weights, present))
+    # sorted with reverse=True is stable, rows with equal values stay in their order as in MedianStatistics
+    order = sorted(range(len(values)), key=values.__getitem__, reverse=True)
+    acc = list(accumulate(map(row_weights.__getitem__, order)))
+    if votes_required is None:
+        votes_required = (acc[-1] if acc else 0) // 2
+    if min(row_weights, default=0) >= 0:
+        # the accumulated weights are non-decreasing
+        index = bisect_right(acc, votes_required)
+        if index == len(acc):
+            return None
+        return values[order[index]]
+    for index, weight in zip(order, acc):
+        if weight > votes_required:
+            return values[index]
+    return None
+
+
+def evaluate_median_columns(columns, weights, votes_required=None):
+    """Compute the agreed values of multiple median votings sharing the same rows, see evaluate_median_batch.
+
+    Args:
+        columns (list of sequence of int): For each voting the value of each row, MISSING for empty entries.
+        weights (sequence of int): The weight of each row.
+        votes_required (int): The number of votes required for a majority in each voting, None uses the weight sum
+            of the voting // 2.
+
+    Returns:
+        list of int: For each voting the agreed value or None if no value was agreed upon.
+    """
+    if not isinstance(weights, list):
+        # the weights are iterated once per voting, iterating a list is faster than an array or memoryview
+        weights = list(weights)
+    return [evaluate_median_batch(column, weights, votes_required) for column in columns]
+
+
+def evaluate_median_table(table):
+    """Evaluate all median votings of a BallotTable, see evaluate_median_batch.
+
+    Args:
+        table (BallotTable): The table containing the votes.
+
+    Returns:
+        dict of int to int: Maps the index of each median voting to its agreed value (None if no value was agreed
+        upon).
+    """
+    indices = [i for i, skel in enumerate(table.votings) if isinstance(skel, MedianVotingSkeleton)]
+    values = evaluate_median_columns([table.columns[i] for i in indices], table.weights)
+    return dict(zip(indices, values))
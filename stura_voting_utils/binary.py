@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# A binary format for BallotTable objects. A file has the following layout (all integers little endian):
+#
+# - the magic bytes MAGIC (8 bytes)
+# - the length of the header in bytes (unsigned 64 bit)
+# - the header: a JSON object containing the format version, the number of rows and the skeletons of all votings
+# - padding with zero bytes to a multiple of 8
+# - the weights of all rows (signed 64 bit each)
+# - the columns of all votings one after another (signed 64 bit each), the layout is the same as in BallotTable
+#
+# The loader maps the file into memory and the weights and columns are memoryviews of the mapped file, so nothing is
+# copied when the file is opened.
+
+import sys
+import json
+import mmap
+import struct
+from time import perf_counter
+from array import array
+
+from .utils import MedianVotingSkeleton, SchulzeVotingSkeleton
+from .ballots import BallotTable, TYPECODE
+from .parser import ParseException
+from .stats import get_hooks
+
+MAGIC = b'STURABAL'
+VERSION = 1
+
+_length_struct = struct.Struct('<Q')
+
+
+def _skeleton_to_dict(skel):
+    if isinstance(skel, SchulzeVotingSkeleton):
+        return {'type': 'schulze', 'name': skel.name, 'options': skel.options, 'id': skel.id}
+    elif isinstance(skel, MedianVotingSkeleton):
+        return {'type': 'median', 'name': skel.name, 'value': skel.value, 'currency': skel.currency, 'id': skel.id}
+    else:
+        raise TypeError('Unknown voting type: %s' % type(skel).__name__)
+
+
+def _skeleton_from_dict(d):
+    if d['type'] == 'schulze':
+        return SchulzeVotingSkeleton(d['name'], d['options'], d['id'])
+    elif d['type'] == 'median':
+        return MedianVotingSkeleton(d['name'], d['value'], d['currency'], d['id'])
+    else:
+        raise ParseException('Invalid voting type in binary ballot file: %s' % d['type'])
+
+
+def _write_array(f, values):
+    if sys.byteorder == 'little' and isinstance(values, memoryview) and values.format == TYPECODE:
+        f.write(values)
+        return
+    values = array(TYPECODE, values)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    f.write(values)
+
+
+def write_ballot_table(f, table):
+    """Write a BallotTable in the binary format.
+
+    Args:
+        f: A file opened in binary mode.
+        table (BallotTable): The table to write, for example the result of parse_csv(..., as_table=True).
+    """
+    header = {'version': VERSION,
+              'num_rows': table.num_rows,
+              'votings': [_skeleton_to_dict(skel) for skel in table.votings]}
+    header_bytes = json.dumps(header).encode('utf-8')
+    f.write(MAGIC)
+    f.write(_length_struct.pack(len(header_bytes)))
+    f.write(header_bytes)
+    f.write(bytes(-(len(MAGIC) + _length_struct.size + len(header_bytes)) % 8))
+    for values in [table.weights] + list(table.columns):
+        _write_array(f, values)
+
+
+def save_ballot_table(path, table):
+    """Write a BallotTable to a file in the binary format, see write_ballot_table.
+
+    Args:
+        path (str): The path of the file.
+        table (BallotTable): The table to write.
+    """
+    with open(path, 'wb') as f:
+        write_ballot_table(f, table)
+
+
+def is_ballot_file(path):
+    """Check if a file is in the binary ballot format (by checking the magic bytes).
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        bool: True if the file starts with the magic bytes.
+    """
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class MappedBallotTable(BallotTable):
+    """A BallotTable whose weights and columns are memoryviews of a memory mapped binary ballot file.
+
+    The table should be closed when it's no longer needed, it can also be used as a context manager.
+    """
+    def __init__(self, votings, weights, columns, mapped):
+        super().__init__(votings, weights, columns)
+        self._mapped = mapped
+
+    def append_row(self, weight, entries):
+        raise TypeError('Can\'t append rows to a memory mapped ballot table')
+
+    def close(self):
+        """Release the memoryviews and close the mapped file."""
+        if self._mapped is None:
+            return
+        for values in [self.weights] + list(self.columns):
+            if isinstance(values, memoryview):
+                values.release()
+        self._mapped.close()
+        self._mapped = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def load_ballot_table(path):
+    """Open a file in the binary ballot format.
+
+    The file is memory mapped, on little endian machines the arrays of the table are views of the file, so no data
+    is copied or parsed (on big endian machines the arrays are copied and the byte order is swapped).
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        (list of MedianVotingSkeleton and SchulzeVotingSkeleton, MappedBallotTable): All votings and the table.
+
+    Raises:
+        ParseException: If the file is not a valid binary ballot file.
+    """
+    start = perf_counter()
+    with open(path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise ParseException('Invalid binary ballot file: File is empty')
+    try:
+        votings, table = _load_mapped(mapped)
+    except BaseException:
+        mapped.close()
+        raise
+    hooks = get_hooks()
+    if hooks is not None:
+        hooks.phase('load_binary', perf_counter() - start, table.num_rows)
+    return votings, table
+
+
+def _load_mapped(mapped):
+    offset = len(MAGIC) + _length_struct.size
+    if len(mapped) < offset or mapped[:len(MAGIC)] != MAGIC:
+        raise ParseException('Invalid binary ballot file: Magic bytes not found')
+    header_len, = _length_struct.unpack_from(mapped, len(MAGIC))
+    try:
+        header = json.loads(mapped[offset:offset + header_len].decode('utf-8'))
+    except ValueError as e:
+        raise ParseException('Invalid header in binary ballot file: %s' % str(e))
+    if not isinstance(header, dict):
+        raise ParseException('Invalid header in binary ballot file: Must be a JSON object')
+    if header.get('version') != VERSION:
+        raise ParseException('Unsupported binary ballot file version: %s' % str(header.get('version')))
+    for key in ('votings', 'num_rows'):
+        if key not in header:
+            raise ParseException('Invalid header in binary ballot file: Entry "%s" is missing' % key)
+    num_rows = header['num_rows']
+    if not isinstance(num_rows, int) or num_rows < 0:
+        raise ParseException('Invalid header in binary ballot file: Invalid number of rows: %s' % str(num_rows))
+    try:
+        votings = [_skeleton_from_dict(d) for d in header['votings']]
+    except (KeyError, TypeError) as e:
+        raise ParseException('Invalid header in binary ballot file: Invalid voting: %s' % str(e))
+    offset += header_len
+    offset += -offset % 8
+    data = memoryview(mapped)
+    arrays = []
+    lengths = [num_rows] + [num_rows * len(skel.options) if isinstance(skel, SchulzeVotingSkeleton) else num_rows
+                            for skel in votings]
+    if offset + 8 * sum(lengths) > len(mapped):
+        data.release()
+        raise ParseException('Invalid binary ballot file: File is truncated')
+    for length in lengths:
+        values = data[offset:offset + 8 * length].cast(TYPECODE)
+        if sys.byteorder != 'little':
+            swapped = array(TYPECODE, values)
+            swapped.byteswap()
+            values.release()
+            values = swapped
+        arrays.append(values)
+        offset += 8 * length
+    data.release()
+    table = MappedBallotTable(votings, arrays[0], arrays[1:], mapped)
+    return votings, table
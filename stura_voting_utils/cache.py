@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# An on-disk cache for the results of votings.
+#
+# The key of a voting is the SHA-256 hash of its skeleton and its votes, so the result of a voting is found again as
+# long as neither its definition nor its votes change, no matter what happens to the other votings of the file. Each
+# result is stored in its own JSON file in the cache directory, the modification time of a file is the time it was
+# last used and the least recently used results are deleted when the directory grows too big.
+
+import os
+import json
+import hashlib
+import tempfile
+from array import array
+from itertools import chain
+from operator import attrgetter
+from time import perf_counter, time
+
+from .utils import SchulzeVotingSkeleton
+from .tally import SchulzeTally, MedianTally
+from .ballots import BallotTable, TYPECODE
+from .binary import _skeleton_to_dict
+from .evaluation import _evaluate_reported, result_to_dict, result_from_dict
+from .stats import get_hooks
+
+# changing the key or the format of the cache files requires a new version, old entries are never found again
+_KEY_VERSION = 1
+
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+# entries are written to temporary files first, temporary files older than _STALE_SECONDS are removed by evict
+_TMP_SUFFIX = '.tmp'
+_STALE_SECONDS = 3600
+
+
+def default_cache_dir():
+    """Return the default cache directory: stura_voting_utils in $XDG_CACHE_HOME (or ~/.cache).
+
+    Returns:
+        str: The path of the directory.
+    """
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'stura_voting_utils')
+
+
+def _hash_ints(h, values):
+    # values may be an iterator, the array stops reading it at the first value that doesn't fit, so the fallback
+    # needs its own copy of all values
+    values = list(values)
+    try:
+        h.update(array(TYPECODE, values))
+    except (OverflowError, TypeError):
+        # weights or values that don't fit into the array (for example floats)
+        h.update(repr(values).encode('utf-8'))
+
+
+def voting_key(skel, votes, weights=None):
+    """Compute the cache key of a voting.
+
+    Args:
+        skel (SchulzeVotingSkeleton or MedianVotingSkeleton): The voting.
+        votes: The votes of the voting: a list of votes (as returned by parse_csv), a tally (as returned by
+            tally_csv) or a column of a BallotTable (then weights must be given).
+        weights: The weights of the BallotTable if votes is a column.
+
+    Returns:
+        str: The key (a hex digest), different representations of the same votes (list, tally, column) have
+        different keys.
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps([_KEY_VERSION, _skeleton_to_dict(skel)], sort_keys=True).encode('utf-8'))
+    if weights is not None:
+        h.update(b'table')
+        for values in (weights, votes):
+            if isinstance(values, (array, memoryview)):
+                h.update(values)
+            else:
+                _hash_ints(h, values)
+    elif isinstance(votes, SchulzeTally):
+        h.update(b'schulze-tally')
+        _hash_ints(h, chain.from_iterable(votes.d))
+    elif isinstance(votes, MedianTally):
+        h.update(b'median-tally')
+        _hash_ints(h, chain.from_iterable(sorted(votes.weights.items())))
+    elif isinstance(skel, SchulzeVotingSkeleton):
+        h.update(b'schulze-votes %d' % len(votes))
+        _hash_ints(h, map(attrgetter('weight'), votes))
+        _hash_ints(h, chain.from_iterable(map(attrgetter('ranking'), votes)))
+    else:
+        h.update(b'median-votes %d' % len(votes))
+        _hash_ints(h, map(attrgetter('weight'), votes))
+        _hash_ints(h, map(attrgetter('value'), votes))
+    return h.hexdigest()
+
+
+class CacheStats(object):
+    """Hits and misses of evaluate_votings_cached.
+
+    Attributes:
+        hits (int): The number of votings found in the cache.
+        misses (int): The number of votings that were evaluated.
+        cached (list of bool): For each voting True if the result was found in the cache.
+    """
+
+    def __init__(self, cached):
+        self.cached = cached
+        self.hits = sum(cached)
+        self.misses = len(cached) - self.hits
+
+
+class ResultCache(object):
+    """A directory of voting results with least recently used eviction.
+
+    The cache can be shared by multiple processes, entries are written atomically.
+
+    Attributes:
+        directory (str): The cache directory, created if it doesn't exist.
+        max_size (int): The maximal size of all entries in bytes, see evict.
+    """
+
+    def __init__(self, directory=None, max_size=DEFAULT_MAX_SIZE):
+        if directory is None:
+            directory = default_cache_dir()
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, key):
+        """Return the cached result for a key and mark it as used.
+
+        Args:
+            key (str): The key, see voting_key.
+
+        Returns:
+            schulze_voting.SchulzeRes or int: The result (as in evaluate_voting).
+
+        Raises:
+            KeyError: If the key is not in the cache.
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                d = json.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            raise KeyError(key)
+        except ValueError:
+            # a damaged entry, it's removed and evaluated again
+            self._remove(path)
+            raise KeyError(key)
+        return result_from_dict(d)
+
+    def put(self, key, skel, result):
+        """Store the result of a voting, call evict to keep the size of the cache below max_size.
+
+        Args:
+            key (str): The key, see voting_key.
+            skel (SchulzeVotingSkeleton or MedianVotingSkeleton): The voting.
+            result: The result of the voting, as returned by evaluate_voting.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=_TMP_SUFFIX)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(result_to_dict(skel, result), f)
+            os.replace(tmp_path, self._path(key))
+        finally:
+            # after the file was replaced there's nothing left to remove
+            self._remove(tmp_path)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _entries(self, suffix='.json'):
+        res = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(suffix):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    res.append((stat.st_mtime, stat.st_size, entry.path))
+        return res
+
+    def _remove_stale(self):
+        # removes temporary files left behind by processes that were killed while writing an entry, the files of
+        # running writers are younger. Returns the size of the remaining temporary files.
+        limit = time() - _STALE_SECONDS
+        size = 0
+        for mtime, tmp_size, path in self._entries(_TMP_SUFFIX):
+            if mtime < limit:
+                self._remove(path)
+            else:
+                size += tmp_size
+        return size
+
+    def size(self):
+        """Return the size of all entries in bytes."""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Delete the least recently used entries until the size of the cache is at most max_size.
+
+        Temporary files left behind by interrupted writes are deleted too.
+
+        Returns:
+            int: The number of deleted entries.
+        """
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries) + self._remove_stale()
+        removed = 0
+        if total <= self.max_size:
+            return removed
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        """Delete all entries and temporary files."""
+        for _, _, path in self._entries() + self._entries(_TMP_SUFFIX):
+            self._remove(path)
+
+
+def _select(votes, indices):
+    if isinstance(votes, BallotTable):
+        return BallotTable([votes.votings[i] for i in indices], votes.weights, [votes.columns[i] for i in indices])
+    return [votes[i] for i in indices]
+
+
+def evaluate_votings_cached(all_votings, votes, cache, jobs=1, prepare=None):
+    """Evaluate all votings (see evaluate_votings), results found in the cache are not computed again.
+
+    Args:
+        all_votings (list of MedianVotingSkeleton and SchulzeVotingSkeleton): The votings as returned by parse_csv.
+        votes: For each voting the votes or tally, or a BallotTable (see evaluate_votings).
+        cache (ResultCache): The cache, None evaluates all votings without a cache.
+        jobs (int): Number of worker processes used for the votings not in the cache.
+        prepare (callable): If given it's called with the votings that are not in the cache and their votes (a list
+            or a BallotTable) before they're evaluated and must return the votes to evaluate, for example
+            aggregate_votes can be used here. The keys are always computed from the original votes.
+
+    Returns:
+        (list, CacheStats): For each voting the result as described in evaluate_voting and the hits and misses.
+    """
+    if cache is None:
+        missing = list(range(len(all_votings)))
+        keys = None
+        results = [None] * len(all_votings)
+    else:
+        start = perf_counter()
+        if isinstance(votes, BallotTable):
+            keys = [voting_key(skel, column, votes.weights) for skel, column in zip(all_votings, votes.columns)]
+        else:
+            keys = [voting_key(skel, voting_votes) for skel, voting_votes in zip(all_votings, votes)]
+        results, missing = [], []
+        for i, key in enumerate(keys):
+            try:
+                results.append(cache.get(key))
+            except KeyError:
+                results.append(None)
+                missing.append(i)
+        hooks = get_hooks()
+        if hooks is not None:
+            hooks.phase('cache_lookup', perf_counter() - start)
+    cached = [True] * len(all_votings)
+    if missing:
+        sub_votings = [all_votings[i] for i in missing]
+        sub_votes = _select(votes, missing)
+        if prepare is not None:
+            sub_votes = prepare(sub_votings, sub_votes)
+        for i, result in zip(missing, _evaluate_reported(sub_votings, sub_votes, jobs, missing)):
+            results[i] = result
+            cached[i] = False
+            if cache is not None:
+                cache.put(keys[i], all_votings[i], result)
+        if cache is not None:
+            cache.evict()
+    return results, CacheStats(cached)
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Reading of compressed input files: gzip, bz2 and xz files are detected by their magic bytes and decompressed while
+# the file is read, so they can be passed to all parsers like uncompressed files. Nothing is decompressed to disk or
+# completely into memory.
+
+import io
+import importlib
+
+# the size of the buffers used for reading the (compressed) file and the decompressed data
+DEFAULT_BUFFER_SIZE = 1 << 20
+
+# magic bytes of the supported formats and the modules to decompress them
+_formats = (
+    ('gzip', b'\x1f\x8b', 'gzip'),
+    ('bz2', b'BZh', 'bz2'),
+    ('xz', b'\xfd7zXZ\x00', 'lzma'),
+)
+
+_magic_len = max(len(magic) for _, magic, _ in _formats)
+_format_modules = {name: module for name, _, module in _formats}
+
+
+class _DecompressedReader(io.BufferedReader):
+    # reads from a decompressing file object and also closes the compressed file when closed
+    def __init__(self, stream, source, buffer_size):
+        super().__init__(stream, buffer_size)
+        self._source = source
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._source.close()
+
+
+def compression_format(data):
+    """Return the compression format of data given its first bytes.
+
+    Args:
+        data (bytes): The first bytes of the data (at least 6 bytes if available).
+
+    Returns:
+        str: "gzip", "bz2" or "xz", None if the data is not compressed in one of these formats.
+
+    Examples:
+        >>> import gzip
+        >>> compression_format(gzip.compress(b'Name,Gewicht'))
+        'gzip'
+        >>> print(compression_format(b'Name,Gewicht'))
+        None
+    """
+    for name, magic, _ in _formats:
+        if data.startswith(magic):
+            return name
+    return None
+
+
+def detect_compression(path):
+    """Return the compression format of a file, see compression_format.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        str: "gzip", "bz2" or "xz", None if the file is not compressed in one of these formats.
+    """
+    with open(path, 'rb') as f:
+        return compression_format(f.read(_magic_len))
+
+
+def open_binary_input(path, buffer_size=DEFAULT_BUFFER_SIZE):
+    """Open a file for reading in binary mode, if the file is compressed (see compression_format) it is decompressed
+    while reading.
+
+    Args:
+        path (str): The path of the file.
+        buffer_size (int): The size of the read buffers.
+
+    Returns:
+        io.BufferedReader: The (decompressed) content of the file.
+    """
+    f = open(path, 'rb', buffering=buffer_size)
+    try:
+        fmt = compression_format(f.peek(_magic_len)[:_magic_len])
+        if fmt is None:
+            return f
+        module = importlib.import_module(_format_modules[fmt])
+        return _DecompressedReader(module.open(f, 'rb'), f, buffer_size)
+    except BaseException:
+        f.close()
+        raise
+
+
+def open_input(path, encoding='utf-8', buffer_size=DEFAULT_BUFFER_SIZE):
+    """Open a text file for reading, if the file is compressed (see compression_format) it is decompressed while
+    reading.
+
+    The result can be passed to all parsers, for example parse_csv, parse_voters or parse_voting_collection.
+
+    Args:
+        path (str): The path of the file.
+        encoding (str): The encoding of the (decompressed) file.
+        buffer_size (int): The size of the read buffers.
+
+    Returns:
+        io.TextIOWrapper: The (decompressed) content of the file.
+    """
+    return io.TextIOWrapper(open_binary_input(path, buffer_size), encoding=encoding)
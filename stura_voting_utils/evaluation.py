@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from array import array
+from time import perf_counter
+
+from .utils import MedianVotingSkeleton, SchulzeVotingSkeleton
+from .tally import SchulzeTally, MedianTally
+from .ballots import BallotTable, TYPECODE
+from .batch import evaluate_schulze_batch, evaluate_median_batch
+from .paths import schulze_result
+from .stats import get_hooks
+
+from schulze_voting import compute_d, SchulzeRes
+from median_voting import MedianStatistics
+
+
+def evaluate_voting(skel, votes):
+    """Evaluate a single voting.
+
+    Args:
+        skel (SchulzeVotingSkeleton or MedianVotingSkeleton): The voting.
+        votes: The votes of the voting, either a list of votes (as returned by parse_csv) or a tally (as returned by
+            tally_csv).
+
+    Returns:
+        schulze_voting.SchulzeRes or int: The result for Schulze votings, the agreed value (None if no value was
+        agreed upon) for median votings.
+    """
+    if isinstance(skel, SchulzeVotingSkeleton):
+        if isinstance(votes, SchulzeTally):
+            return votes.evaluate()
+        return schulze_result(compute_d(votes, len(skel.options)), len(skel.options))
+    elif isinstance(skel, MedianVotingSkeleton):
+        if isinstance(votes, MedianTally):
+            return votes.median()
+        return MedianStatistics(votes).median()
+    else:
+        raise TypeError('Unknown voting type: %s' % type(skel).__name__)
+
+
+def _evaluate_column(skel, column, weights):
+    # evaluates a voting given its column and the weights from a BallotTable
+    if isinstance(skel, SchulzeVotingSkeleton):
+        return evaluate_schulze_batch(column, weights, len(skel.options))
+    elif isinstance(skel, MedianVotingSkeleton):
+        return evaluate_median_batch(column, weights)
+    else:
+        raise TypeError('Unknown voting type: %s' % type(skel).__name__)
+
+
+def _num_vote_objects(skel, votes, weights=None):
+    # number of vote objects allocated to evaluate a voting, weights is given if votes is a column of a BallotTable
+    if weights is not None or isinstance(votes, (SchulzeTally, MedianTally)):
+        return 0
+    return len(votes)
+
+
+def _evaluate_serial(all_votings, votes, evaluate, hooks, weights=None, indices=None):
+    # evaluates all votings in this process and reports each voting to the hooks with its index from indices
+    if indices is None:
+        indices = range(len(all_votings))
+    res = []
+    start = perf_counter()
+    for i, skel, voting_votes in zip(indices, all_votings, votes):
+        voting_start = perf_counter()
+        res.append(evaluate(skel, voting_votes) if weights is None else evaluate(skel, voting_votes, weights))
+        seconds = perf_counter() - voting_start
+        name = 'evaluate_schulze' if isinstance(skel, SchulzeVotingSkeleton) else 'evaluate_median'
+        hooks.phase(name, seconds)
+        hooks.voting(i, skel, seconds, _num_vote_objects(skel, voting_votes, weights))
+    hooks.phase('evaluate', perf_counter() - start)
+    return res
+
+
+def result_to_dict(skel, result):
+    """Convert the result of a voting into a dict that can be serialized with json, see result_from_dict.
+
+    Args:
+        skel (SchulzeVotingSkeleton or MedianVotingSkeleton): The voting.
+        result: The result of the voting, as returned by evaluate_voting.
+
+    Returns:
+        dict: The type of the voting ("type") and the result: "d", "p" and "candidate_wins" for Schulze votings and
+        "value" for median votings.
+    """
+    if isinstance(skel, SchulzeVotingSkeleton):
+        return {'type': 'schulze', 'd': result.d, 'p': result.p, 'candidate_wins': result.candidate_wins}
+    return {'type': 'median', 'value': result}
+
+
+def result_from_dict(d):
+    """Convert a dict created by result_to_dict back into a result.
+
+    Args:
+        d (dict): The dict.
+
+    Returns:
+        schulze_voting.SchulzeRes or int: The result (as in evaluate_voting).
+
+    Examples:
+        >>> result_from_dict(result_to_dict(MedianVotingSkeleton('Budget', 100, '€'), 42))
+        42
+    """
+    if d['type'] == 'schulze':
+        res = SchulzeRes()
+        res.d, res.p, res.candidate_wins = d['d'], d['p'], d['candidate_wins']
+        return res
+    return d['value']
+
+
+def evaluate_votings(all_votings, votes, jobs=1):
+    """Evaluate all votings, see evaluate_voting.
+
+    The votings are independent of each other, so with jobs > 1 they are evaluated in a pool of worker processes.
+    The results are always returned in the order of the votings.
+
+    Args:
+        all_votings (list of MedianVotingSkeleton and SchulzeVotingSkeleton): The votings as returned by parse_csv.
+        votes: For each voting the votes (or tally), as returned by parse_csv or tally_csv. This can also be a
+            BallotTable, in this case the columns of the table are evaluated directly (see evaluate_schulze_batch).
+        jobs (int): Number of worker processes, 1 evaluates all votings in this process. None uses the number of
+            processors.
+
+    Returns:
+        list: For each voting the result as described in evaluate_voting.
+    """
+    return _evaluate_reported(all_votings, votes, jobs)
+
+
+def _evaluate_reported(all_votings, votes, jobs, indices=None):
+    # evaluate_votings, the votings are reported to the stats hooks with their index from indices (default 0, 1, ...),
+    # used if only some votings of a file are evaluated
+    hooks = get_hooks()
+    if hooks is not None and (jobs == 1 or len(all_votings) <= 1):
+        if isinstance(votes, BallotTable):
+            return _evaluate_serial(all_votings, votes.columns, _evaluate_column, hooks, votes.weights, indices)
+        return _evaluate_serial(all_votings, votes, evaluate_voting, hooks, indices=indices)
+    if hooks is not None:
+        start = perf_counter()
+        res = _evaluate_votings(all_votings, votes, jobs)
+        hooks.phase('evaluate', perf_counter() - start)
+        return res
+    return _evaluate_votings(all_votings, votes, jobs)
+
+
+def _evaluate_votings(all_votings, votes, jobs):
+    if jobs == 1 or len(all_votings) <= 1:
+        if isinstance(votes, BallotTable):
+            return [_evaluate_column(skel, column, votes.weights) for skel, column in zip(all_votings, votes.columns)]
+        return [evaluate_voting(skel, voting_votes) for skel, voting_votes in zip(all_votings, votes)]
+    # imported here because it takes longer to import than all other modules of this package
+    from concurrent.futures import ProcessPoolExecutor
+    if isinstance(votes, BallotTable):
+        # the columns may be views of a memory mapped file, they're copied to arrays to send them to the workers
+        weights = array(TYPECODE, votes.weights)
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            return list(executor.map(_evaluate_column, all_votings,
+                                     (array(TYPECODE, column) for column in votes.columns),
+                                     [weights] * len(all_votings)))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(evaluate_voting, all_votings, votes))
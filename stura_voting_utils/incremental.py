@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Incremental parsing of voting collections (see parse_voting_collection) for documents that are edited line by line.
+#
+# A document is split into segments: the head (all lines before the first group) and one segment for each group,
+# starting with its "## <GROUP>" line. The state of the parser at the beginning of a group line doesn't matter (it
+# is either valid there or not), so each segment can be parsed on its own. After an edit only the segments containing
+# the changed lines are split and parsed again, all other segments keep their groups.
+
+from bisect import bisect_right
+
+from .utils import VotingCollection, SchulzeVotingSkeleton
+from .parser import ParseException, _classify_line, _parse_collection_lines, _head_state, _group_state, \
+    _group_line, _state_kinds, _state_errors
+
+
+def _is_group_line(line):
+    line = line.strip()
+    return bool(line) and line[0] == '#' and _classify_line(line)[0] == _group_line
+
+
+def _voting_key(voting):
+    if isinstance(voting, SchulzeVotingSkeleton):
+        return 'schulze', voting.name, list(voting.options), voting.id
+    return 'median', voting.name, voting.value, voting.currency, voting.id
+
+
+def _group_key(group):
+    return (group.name, [_voting_key(voting) for voting in group.median_votings],
+            [_voting_key(voting) for voting in group.schulze_votings])
+
+
+def same_collection(first, second):
+    """Compare two voting collections by value.
+
+    The classes of the collections compare by identity, this function compares the names, dates, groups and votings.
+
+    Args:
+        first (VotingCollection): The first collection.
+        second (VotingCollection): The second collection.
+
+    Returns:
+        bool: True if both collections contain the same groups and votings.
+    """
+    return (first.name == second.name and first.date == second.date and
+            [_group_key(group) for group in first.groups] == [_group_key(group) for group in second.groups])
+
+
+def _reuse_votings(new, old):
+    # replaces votings in the list new by the voting at the same position in old if they're equal
+    for i, (new_voting, old_voting) in enumerate(zip(new, old)):
+        if new_voting is not old_voting and _voting_key(new_voting) == _voting_key(old_voting):
+            new[i] = old_voting
+
+
+class _Segment(object):
+    # a range of lines of the document and the result of parsing it
+    __slots__ = ('start', 'length', 'head', 'title', 'group', 'state', 'error', 'parsed_start')
+
+    def __init__(self, start, length, head):
+        self.start = start
+        self.length = length
+        self.head = head
+        self.title = ''
+        self.group = None
+        self.state = None
+        self.error = None
+        self.parsed_start = start
+
+
+class IncrementalCollectionParser(object):
+    """Parses a voting collection (see parse_voting_collection) that is edited line by line.
+
+    After an edit (see replace_lines) only the groups containing changed lines are parsed again, the other groups are
+    reused. Votings of a group that was parsed again are also reused if they didn't change. The result of collection
+    is always equal to parse_voting_collection on the current lines (or the same ParseException is raised).
+
+    Note that the collections returned share the unchanged groups and votings, they must not be modified.
+
+    Examples:
+        >>> parser = IncrementalCollectionParser(['# Session', '## Finance', '### Budget', '- 100 €',
+        ...                                       '## Elections', '### Chair', '* A', '* B'])
+        >>> collection = parser.collection()
+        >>> parser.replace_lines(3, 4, ['- 200 €'])
+        >>> new_collection = parser.collection()
+        >>> new_collection.groups[0].median_votings[0].value
+        20000
+        >>> new_collection.groups[1] is collection.groups[1]
+        True
+    """
+    def __init__(self, lines=()):
+        self._lines = list(lines)
+        self._segments = self._split(0, len(self._lines), True)
+        self._collection = None
+
+    @property
+    def lines(self):
+        """list of str: A copy of the current lines of the document."""
+        return list(self._lines)
+
+    def __len__(self):
+        return len(self._lines)
+
+    def _parse(self, start, end, head):
+        segment = _Segment(start, end - start, head)
+        res = VotingCollection('', None, [])
+        try:
+            segment.state, _ = _parse_collection_lines(self._lines[start:end], res,
+                                                       _head_state if head else _group_state, start + 1)
+        except ParseException as e:
+            segment.error = e
+        segment.title = res.name
+        if res.groups:
+            segment.group = res.groups[0]
+        return segment
+
+    def _split(self, start, end, head):
+        # splits lines[start:end] at the group lines and parses the segments, start must be 0 (head is True) or the
+        # position of a group line
+        lines = self._lines
+        bounds = [start]
+        bounds.extend(i for i in range(start if head else start + 1, end) if _is_group_line(lines[i]))
+        bounds.append(end)
+        return [self._parse(bounds[k], bounds[k + 1], head and k == 0) for k in range(len(bounds) - 1)]
+
+    def _find(self, pos):
+        # index of the last segment starting at or before pos
+        return bisect_right([segment.start for segment in self._segments], pos) - 1
+
+    def replace_lines(self, start, end, lines):
+        """Replace the lines start, ..., end - 1 (counted from 0) by new lines.
+
+        Inserting lines is done with start == end, deleting lines with an empty list of lines.
+
+        Args:
+            start (int): The first line to replace.
+            end (int): The line after the last line to replace.
+            lines (list of str): The new lines.
+
+        Raises:
+            IndexError: If the range of lines is invalid.
+        """
+        if not 0 <= start <= end <= len(self._lines):
+            raise IndexError('Invalid range of lines: %d to %d, the document has %d lines' %
+                             (start, end, len(self._lines)))
+        lines = list(lines)
+        segments = self._segments
+        first = self._find(start)
+        # lines inserted before a group line may belong to the previous group
+        if first > 0 and segments[first].start == start:
+            first -= 1
+        last = max(first, self._find(max(start, end - 1)))
+        region_start = segments[first].start
+        region_end = segments[last].start + segments[last].length
+        delta = len(lines) - (end - start)
+        self._lines[start:end] = lines
+        new_segments = self._split(region_start, region_end + delta, first == 0)
+        old_groups = [segment.group for segment in segments[first:last + 1] if segment.group is not None]
+        new_groups = [segment for segment in new_segments if segment.group is not None]
+        for segment, old_group in zip(new_groups, old_groups):
+            if _group_key(segment.group) == _group_key(old_group):
+                segment.group = old_group
+            else:
+                _reuse_votings(segment.group.median_votings, old_group.median_votings)
+                _reuse_votings(segment.group.schulze_votings, old_group.schulze_votings)
+                segment.group.invalidate()
+        for segment in segments[last + 1:]:
+            segment.start += delta
+        segments[first:last + 1] = new_segments
+        self._collection = None
+
+    def collection(self):
+        """Return the collection for the current lines.
+
+        Returns:
+            VotingCollection: The parsed collection, the same as parse_voting_collection(lines) (see same_collection).
+
+        Raises:
+            ParseException: If there is a syntax / parse error.
+        """
+        if self._collection is not None:
+            return self._collection
+        state = None
+        groups = []
+        for i, segment in enumerate(self._segments):
+            if not segment.head and _group_line not in _state_kinds[state]:
+                raise ParseException(_state_errors[state] % (segment.start + 1))
+            if segment.error is not None and segment.parsed_start != segment.start:
+                # the line numbers in the error changed, parse the segment again
+                segment = self._parse(segment.start, segment.start + segment.length, segment.head)
+                self._segments[i] = segment
+            if segment.error is not None:
+                raise ParseException(str(segment.error))
+            if segment.group is not None:
+                groups.append(segment.group)
+            state = segment.state
+        self._collection = VotingCollection(self._segments[0].title, None, groups)
+        return self._collection
@@ -22,10 +22,17 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import io
+import os
 import re
 import csv
+from time import perf_counter
 
 from .utils import *
+from .tally import tally_for
+from .ballots import BallotTable
+from .stats import get_hooks
+from .compression import detect_compression, open_input
 from schulze_voting import SchulzeVote
 from median_voting import MedianVote
 
@@ -131,15 +138,6 @@ def parse_currency(s):
     return currency_match(_currency_rx.match(s))
 
 
-# states for the collection parser
-_head_state = 'start'
-_group_state = 'group'
-_voting_state = 'voting'
-_option_state = 'option'
-_group_or_voting_state = 'group-or-voting'
-_schulze_option_state = 'schulze-option'
-
-
 # tries to match the string s against a list of regexes, returns first index and the match object. Returns -1 and None
 # on failure.
 def _match_first(s, *args):
@@ -150,11 +148,76 @@ def _match_first(s, *args):
     return -1, None
 
 
+# kinds of lines in a voting collection
+_invalid_line = 0
+_title_line = 1
+_group_line = 2
+_voting_line = 3
+_schulze_option_line = 4
+_median_option_line = 5
+
+# maps the number of leading # to the kind of the line and the regex to match it
+_heading_kinds = {1: (_title_line, _head_rx), 2: (_group_line, _group_rx), 3: (_voting_line, _voting_rx)}
+
+
+def _classify_line(line):
+    # classifies a (stripped, non-empty) line by its leading marker and matches it against the regex for this kind,
+    # returns the kind and the match (_invalid_line and None if the line is invalid)
+    first = line[0]
+    if first == '#':
+        level = len(line) - len(line.lstrip('#'))
+        if level not in _heading_kinds:
+            return _invalid_line, None
+        kind, rx = _heading_kinds[level]
+    elif first == '*':
+        kind, rx = _schulze_option_line, _schulze_option_rx
+    elif first == '-':
+        kind, rx = _median_option_line, _median_option_rx
+    else:
+        return _invalid_line, None
+    m = rx.match(line)
+    if not m:
+        return _invalid_line, None
+    return kind, m
+
+
+# states for the collection parser
+_head_state = 'start'
+_group_state = 'group'
+_voting_state = 'voting'
+_option_state = 'option'
+_group_or_voting_state = 'group-or-voting'
+_schulze_option_state = 'schulze-option'
+
+# error messages if a line is not valid in a state
+_state_errors = {
+    _head_state: 'Invalid head line in line %d, must be "# <TITLE>"',
+    _group_state: 'Invalid group in line %d, must be "## <GROUP>"',
+    _voting_state: 'Invalid voting in line %d, must be "### <VOTING>"',
+    _option_state: 'Invalid voting option in line %d, must be a Median or Schulze option',
+    _group_or_voting_state: 'Invalid syntax in line %d: Must be either a group or a voting',
+    _schulze_option_state: 'Invalid syntax in line %d: Must be a Schulze option, group or new voting',
+}
+
+# the kinds of lines that are allowed in each state
+_state_kinds = {
+    _head_state: (_title_line, ),
+    _group_state: (_group_line, ),
+    _voting_state: (_voting_line, ),
+    _option_state: (_schulze_option_line, _median_option_line),
+    _group_or_voting_state: (_group_line, _voting_line),
+    _schulze_option_state: (_schulze_option_line, _group_line, _voting_line),
+}
+
+
 def parse_voting_collection(reader):
     """Parse a voting collection from a list of strings (or a file).
 
     For syntax information see the wiki.
 
+    Each line is classified once by its leading marker ("#", "##", "###", "*" or "-") and matched against the regex
+    for this kind of line only.
+
     Args:
         reader: File like object to read from (a list will also do); something to iterate over and receive lines.
 
@@ -164,124 +227,60 @@ def parse_voting_collection(reader):
     Raises:
         ParseException: If there is a syntax / parse error.
     """
+    start = perf_counter()
     res = VotingCollection('', None, [])
-    state = _head_state
+    _, line_num = _parse_collection_lines(reader, res)
+    hooks = get_hooks()
+    if hooks is not None:
+        hooks.phase('collection', perf_counter() - start, line_num)
+    return res
+
+
+def _parse_collection_lines(lines, res, state=_head_state, first_line=1):
+    # parses the lines of a voting collection starting in the given state, the title and the groups are added to res.
+    # Returns the state after the last line and the number of the last line.
+    last_group = res.groups[-1] if res.groups else None
     last_voting_name = None
-    for line_num, line in enumerate(reader, 1):
+    line_num = first_line - 1
+    for line_num, line in enumerate(lines, first_line):
         line = line.strip()
         if not line:
             continue
-        if state == _head_state:
-            m = _head_rx.match(line)
-            if not m:
-                raise ParseException('Invalid head line in line %d, must be "# <TITLE>"' % line_num)
+        kind, m = _classify_line(line)
+        if kind not in _state_kinds[state]:
+            raise ParseException(_state_errors[state] % line_num)
+        if kind == _schulze_option_line:
+            option = m.group('option')
+            if state == _option_state:
+                # create a new schulze voting (this is the first time we parsed an option)
+                last_group.schulze_votings.append(
+                    SchulzeVotingSkeleton(last_voting_name, [option, ], id=len(last_group)))
+                state = _schulze_option_state
+            else:
+                last_group.schulze_votings[-1].options.append(option)
+        elif kind == _median_option_line:
+            # we parsed the value of a median voting, transform to int
+            parse_res = currency_match(m)
+            if not parse_res:
+                # should never happen
+                raise ParseException('Internal error: Unable to parse value for median voting in line %d' % line_num)
+            val, currency = parse_res
+            last_group.median_votings.append(MedianVotingSkeleton(last_voting_name, val, currency, id=len(last_group)))
+            # now we must parse a group or a voting
+            state = _group_or_voting_state
+        elif kind == _voting_line:
+            last_voting_name = m.group('voting')
+            state = _option_state
+        elif kind == _group_line:
+            last_group = VotingGroup(m.group('group'), [], [])
+            res.groups.append(last_group)
+            state = _voting_state
+        elif kind == _title_line:
             res.name = m.group('title')
             state = _group_state
-        elif state == _group_state:
-            state = _handle_group_state(res, line, line_num)
-        elif state == _voting_state:
-            # parse a voting name
-            last_voting_name, state = _handle_voting_state(res, line, line_num)
-        elif state == _option_state:
-            state = _handle_option_state(res, last_voting_name, line, line_num)
-        elif state == _group_or_voting_state:
-            last_voting_name, state = _handle_group_or_voting_state(res, last_voting_name, line, line_num)
-        elif state == _schulze_option_state:
-            last_voting_name, state = _handle_schulze_option_state(res, last_voting_name, line, line_num)
         else:
-            raise ParseException('Internal error: Invalid state while parsing voting collection: %s' % str(state))
-    return res
-
-
-# The following block contains state parse methods
-def _handle_group_state(res, line, line_num):
-    # parse a new group name
-    m = _group_rx.match(line)
-    if not m:
-        raise ParseException('Invalid group in line %d, must be "## <GROUP>"' % line_num)
-    # create new group
-    group = VotingGroup(m.group('group'), [], [])
-    # append group to result
-    res.groups.append(group)
-    return _voting_state
-
-
-def _handle_voting_state(res, line, line_num):
-    # parse a voting name
-    m = _voting_rx.match(line)
-    if not m:
-        raise ParseException('Invalid voting in line %d, must be "### <VOTING>"' % line_num)
-    last_voting_name = m.group('voting')
-    state = _option_state
-    return last_voting_name, state
-
-
-def _handle_option_state(res, last_voting_name, line, line_num):
-    if not res.groups or last_voting_name == "" or last_voting_name is None:
-        # should not happen, just to be sure
-        raise ParseException('Internal error: Illegal state while parsing voting options in line %d' % line_num)
-    last_group = res.groups[-1]
-    # parse either a median or schulze option
-    # there must be an option now
-    id, m = _match_first(line, _schulze_option_rx, _median_option_rx)
-    if id < 0:
-        raise ParseException('Invalid voting option in line %d, must be a Median or Schulze option' % line_num)
-    elif id == 0:
-        # we parsed a schulze option
-        # create a new schulze voting (this is the first time we parsed an option)
-        option = m.group('option')
-        schulze_skel = SchulzeVotingSkeleton(last_voting_name, [option, ], id=len(last_group))
-        last_group.schulze_votings.append(schulze_skel)
-        # now parse more schulze options or new group / voting
-        state = _schulze_option_state
-    elif id == 1:
-        # we parsed the value of a median voting, transform to int
-        parse_res = currency_match(m)
-        if not parse_res:
-            # should never happen
-            raise ParseException('Internal error: Unable to parse value for median voting in line %d' % line_num)
-        val, currency = parse_res
-        median_skel = MedianVotingSkeleton(last_voting_name, val, currency, id=len(last_group))
-        last_group.median_votings.append(median_skel)
-        # now we must parse a group or a voting
-        state = _group_or_voting_state
-    else:
-        assert False
-    return state
-
-
-def _handle_group_or_voting_state(res, last_voting_name, line, line_num):
-    # first try to handle as group
-    try:
-        return last_voting_name, _handle_group_state(res, line, line_num)
-    except ParseException as e:
-        pass
-    try:
-        return _handle_voting_state(res, line, line_num)
-    except ParseException as e:
-        raise ParseException('Invalid syntax in line %d: Must be either a group or a voting' % line_num)
-
-
-def _handle_schulze_option_state(res, last_voting_name, line, line_num):
-    # now we must parse either a new schulze option or an new group or voting
-    m = _schulze_option_rx.match(line)
-    if m:
-        # code duplication but ok
-        if not res.groups:
-            # should not happen
-            raise ParseException('Internal error: Invalid syntax in line %d: No group given.' % line_num)
-        last_group = res.groups[-1]
-        skel = last_group.schulze_votings[-1]
-        skel.options.append(m.group('option'))
-        # state does not change
-        state = _schulze_option_state
-        return last_voting_name, state
-    else:
-        # now it must be a group or a new voting
-        try:
-            return _handle_group_or_voting_state(res, last_voting_name, line, line_num)
-        except ParseException as e:
-            raise ParseException('Invalid syntax in line %d: Must be a Schulze option, group or new voting' % line_num)
+            assert False
+    return state, line_num
 
 
 _csv_median_head_rx = re.compile(r'[Mm]edian\s*\((?P<value>\d+)\)\s*$')
@@ -314,51 +313,334 @@ def _parse_csv_head(head_row):
     return res
 
 
-def _parse_csv_body(collection, rows):
+def _csv_votings(collection):
     # ugly but ok
-    all_votings = sorted(collection.groups[0].median_votings + collection.groups[0].schulze_votings,
-                         key=lambda v: v.id)
+    return sorted(collection.groups[0].median_votings + collection.groups[0].schulze_votings,
+                  key=lambda v: v.id)
+
+
+def _iter_csv_rows(all_votings, rows, first_row=2):
+    # yields (row number, weight, entries) for each row, entries contains for each voting the parsed entry: a list of
+    # int for Schulze votings, an int for median votings and None for empty entries
     num_votings = len(all_votings)
-    # stores all votes
-    votes = [[] for _ in all_votings]
-    for row_num, row in enumerate(rows, 2):
+    for row_num, row in enumerate(rows, first_row):
         if num_votings != (len(row) - 2):
-            raise ParseException('Invalid syntax in row %d: Not enough votings' % row)
+            raise ParseException('Invalid syntax in row %d: Not enough votings' % row_num)
         # parse weight, we ignore the name
         try:
             weight = int(row[1])
         except ValueError as e:
-            raise ParseException("Can't parse weight as int: %s" % str(e))
+            raise ParseException("Can't parse weight as int in row %d: %s" % (row_num, str(e)))
         # everything okay, now we can parse all votings
-        for i, (skel, entry) in enumerate(zip(all_votings, row[2:])):
+        entries = []
+        for skel, entry in zip(all_votings, row[2:]):
             if not entry:
-                continue
-            if isinstance(skel, SchulzeVotingSkeleton):
+                entries.append(None)
+            elif isinstance(skel, SchulzeVotingSkeleton):
                 try:
                     options = [int(as_str) for as_str in entry.split('/')]
-                    if len(options) != len(skel.options):
-                        raise ParseException('Invalid options in row %d: Must contain exactly as many options as defined in voting' % row_num)
-                    v = SchulzeVote(options, weight)
-                    votes[i].append(v)
                 except ValueError as option_err:
-                    raise ParseException("Can't parse options for Schulze voting: %s" % str(option_err))
+                    raise ParseException("Can't parse options for Schulze voting in row %d: %s" % (row_num, str(option_err)))
+                if len(options) != len(skel.options):
+                    raise ParseException('Invalid options in row %d: Must contain exactly as many options as defined in voting' % row_num)
+                entries.append(options)
             elif isinstance(skel, MedianVotingSkeleton):
                 try:
                     value = int(entry)
                 except ValueError as median_err:
-                    raise ParseException('Invalid value for median voting: %s' % str(median_err))
-                v = MedianVote(value, weight)
-                votes[i].append(v)
+                    raise ParseException('Invalid value for median voting in row %d: %s' % (row_num, str(median_err)))
+                entries.append(value)
             else:
                 assert False
+        yield row_num, weight, entries
+
+
+def _iter_csv_body(all_votings, rows, first_row=2):
+    # yields (index of voting, weight, parsed entry) for each non-empty entry
+    for _, weight, entries in _iter_csv_rows(all_votings, rows, first_row):
+        for i, entry in enumerate(entries):
+            if entry is not None:
+                yield i, weight, entry
+
+
+def _parse_csv_body(collection, rows):
+    start = perf_counter()
+    all_votings = _csv_votings(collection)
+    # stores all votes
+    votes = [[] for _ in all_votings]
+    for i, weight, entry in _iter_csv_body(all_votings, rows):
+        if isinstance(entry, list):
+            votes[i].append(SchulzeVote(entry, weight))
+        else:
+            votes[i].append(MedianVote(entry, weight))
+    hooks = get_hooks()
+    if hooks is not None:
+        hooks.phase('csv_body', perf_counter() - start, rows.line_num - 1)
     return all_votings, votes
 
 
-def parse_csv(reader, delimiter=','):
+def _parse_csv_table(collection, rows):
+    start = perf_counter()
+    all_votings = _csv_votings(collection)
+    table = BallotTable(all_votings)
+    for row_num, weight, entries in _iter_csv_rows(all_votings, rows):
+        try:
+            table.append_row(weight, entries)
+        except (OverflowError, ValueError) as e:
+            raise ParseException('Invalid entry in row %d: %s' % (row_num, str(e)))
+    hooks = get_hooks()
+    if hooks is not None:
+        hooks.phase('csv_table', perf_counter() - start, table.num_rows)
+    return all_votings, table
+
+
+def _read_csv_head(reader, delimiter):
+    start = perf_counter()
     csv_reader = csv.reader(reader, delimiter=delimiter)
     try:
         head = next(csv_reader)
     except StopIteration:
         raise ParseException('No header found in csv file')
     votings = _parse_csv_head(head)
+    hooks = get_hooks()
+    if hooks is not None:
+        hooks.phase('csv_head', perf_counter() - start)
+    return votings, csv_reader
+
+
+def parse_csv(reader, delimiter=',', as_table=False):
+    """Parse a csv file containing the votes for a list of votings.
+
+    The first row must be the head, the first two columns are ignored (name and weight of the voter), all other
+    columns must be of the form "Median(<VALUE>)" or "Schulze(<NUM-OPTIONS>)". Each following row contains the name of
+    the voter, its weight and for each voting the vote (an int for median votings and a ranking of the form "0/2/1"
+    for Schulze votings). Empty entries are ignored.
+
+    All votes are stored in memory, for big files see iter_csv_votes and tally_csv. If as_table is True the votes are
+    stored in a BallotTable instead of one object per vote, which requires much less memory.
+
+    Args:
+        reader: File like object to read from (a list will also do); something to iterate over and receive lines.
+        delimiter (str): The csv delimiter.
+        as_table (bool): If True return a BallotTable instead of the lists of votes.
+
+    Returns:
+        (list of MedianVotingSkeleton and SchulzeVotingSkeleton, list of list of votes): All votings sorted by their id
+        and for each voting the list of votes (median_voting.MedianVote or schulze_voting.SchulzeVote). If as_table
+        is True the second element is a BallotTable.
+
+    Raises:
+        ParseException: If there is a syntax / parse error.
+    """
+    votings, csv_reader = _read_csv_head(reader, delimiter)
+    if as_table:
+        return _parse_csv_table(votings, csv_reader)
     return _parse_csv_body(votings, csv_reader)
+
+
+def iter_csv_votes(reader, delimiter=','):
+    """Parse a csv file (see parse_csv) but don't store the votes, instead return an iterator over all votes.
+
+    The rows are read lazily while iterating, so only one row is kept in memory at a time. The head is parsed
+    immediately.
+
+    Args:
+        reader: File like object to read from (a list will also do); something to iterate over and receive lines.
+        delimiter (str): The csv delimiter.
+
+    Returns:
+        (list of MedianVotingSkeleton and SchulzeVotingSkeleton, iterator of (int, int, list of int or int)): All
+        votings sorted by their id and an iterator yielding tuples (voting_index, weight, entry). entry is the ranking
+        (list of int) for Schulze votings and the value (int) for median votings.
+
+    Raises:
+        ParseException: If there is a syntax / parse error, errors in the body are raised while iterating.
+
+    Examples:
+        >>> votings, it = iter_csv_votes(['Name,Gewicht,Schulze (2),Median (100)', 'G1,5,0/1,20', 'G2,3,,42'])
+        >>> list(it)
+        [(0, 5, [0, 1]), (1, 5, 20), (1, 3, 42)]
+    """
+    votings, csv_reader = _read_csv_head(reader, delimiter)
+    all_votings = _csv_votings(votings)
+    return all_votings, _iter_csv_body(all_votings, csv_reader)
+
+
+def read_csv_head(reader, delimiter=','):
+    """Parse the head of a csv file (see parse_csv), the rows of the body are not read.
+
+    Together with parse_csv_row this allows processing the ballots of a file one by one.
+
+    Args:
+        reader: File like object to read from (a list will also do); something to iterate over and receive lines.
+        delimiter (str): The csv delimiter.
+
+    Returns:
+        (list of MedianVotingSkeleton and SchulzeVotingSkeleton, iterator of list of str): All votings sorted by their
+        id and an iterator over the remaining rows of the file (the first one is row 2), each row is a list of columns.
+
+    Raises:
+        ParseException: If the head is invalid.
+    """
+    votings, csv_reader = _read_csv_head(reader, delimiter)
+    return _csv_votings(votings), csv_reader
+
+
+def parse_csv_row(all_votings, row, row_num=2):
+    """Parse a row of the body of a csv file (see parse_csv).
+
+    Args:
+        all_votings (list of MedianVotingSkeleton and SchulzeVotingSkeleton): The votings, as returned by
+            read_csv_head.
+        row (list of str): The columns of the row: name, weight and one entry for each voting.
+        row_num (int): The row number used in error messages.
+
+    Returns:
+        (int, list): The weight and for each voting the ranking (list of int) for Schulze votings, the value (int) for
+        median votings or None if the entry is empty.
+
+    Raises:
+        ParseException: If the row is invalid.
+
+    Examples:
+        >>> all_votings, rows = read_csv_head(['Name,Gewicht,Schulze (2),Median (100)', 'G1,5,0/1,'])
+        >>> parse_csv_row(all_votings, next(rows))
+        (5, [[0, 1], None])
+    """
+    (_, weight, entries), = _iter_csv_rows(all_votings, [row], row_num)
+    return weight, entries
+
+
+def tally_csv(reader, delimiter=','):
+    """Parse a csv file (see parse_csv) and accumulate the votes into a tally for each voting.
+
+    In contrast to parse_csv the votes are not stored, so the memory required depends only on the number of votings
+    and options, not on the number of rows.
+
+    Args:
+        reader: File like object to read from (a list will also do); something to iterate over and receive lines.
+        delimiter (str): The csv delimiter.
+
+    Returns:
+        (list of MedianVotingSkeleton and SchulzeVotingSkeleton, list of SchulzeTally and MedianTally): All votings
+        sorted by their id and for each voting the tally containing all votes.
+
+    Raises:
+        ParseException: If there is a syntax / parse error.
+    """
+    votings, csv_reader = _read_csv_head(reader, delimiter)
+    start = perf_counter()
+    all_votings = _csv_votings(votings)
+    tallies = _tally_votes(all_votings, _iter_csv_body(all_votings, csv_reader))
+    hooks = get_hooks()
+    if hooks is not None:
+        hooks.phase('csv_tally', perf_counter() - start, csv_reader.line_num - 1)
+    return all_votings, tallies
+
+
+def _tally_votes(all_votings, it):
+    tallies = [tally_for(skel) for skel in all_votings]
+    for i, weight, entry in it:
+        tallies[i].add(entry, weight)
+    return tallies
+
+
+# approximate number of chunks each worker of parse_csv_parallel processes and the maximal size of a chunk
+_chunks_per_worker = 4
+_max_chunk_bytes = 1 << 26
+
+
+def _count_newlines(f, num_bytes, block_size=1 << 20):
+    res = 0
+    while num_bytes > 0:
+        block = f.read(min(block_size, num_bytes))
+        if not block:
+            break
+        res += block.count(b'\n')
+        num_bytes -= len(block)
+    return res
+
+
+def _tally_csv_chunk(path, start, end, first_row, all_votings, delimiter, encoding):
+    # tallies the rows in the byte range [start, end) of the file, first_row is the number of the first row in it
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    lines = io.TextIOWrapper(io.BytesIO(data), encoding=encoding)
+    csv_reader = csv.reader(lines, delimiter=delimiter)
+    return _tally_votes(all_votings, _iter_csv_body(all_votings, csv_reader, first_row))
+
+
+def parse_csv_parallel(path, workers=None, delimiter=',', encoding='utf-8'):
+    """Parse and tally a csv file (see tally_csv) in a pool of worker processes.
+
+    The body of the file is split at line boundaries into chunks, each chunk is parsed and tallied by a worker and
+    the tallies are merged afterwards. The head is parsed only once. Row numbers in error messages are the row
+    numbers in the whole file, if there are multiple errors the first one in the file is reported.
+
+    Because the file is split at newlines the rows must be separated by "\\n" (or "\\r\\n") and entries must not
+    contain newlines. Compressed files (see open_input) can't be split, they are tallied in this process.
+
+    Args:
+        path (str): Path of the csv file.
+        workers (int): Number of worker processes, None uses the number of processors. With 1 the file is parsed in
+            this process.
+        delimiter (str): The csv delimiter.
+        encoding (str): The encoding of the file.
+
+    Returns:
+        (list of MedianVotingSkeleton and SchulzeVotingSkeleton, list of SchulzeTally and MedianTally): All votings
+        sorted by their id and for each voting the tally containing all votes.
+
+    Raises:
+        ParseException: If there is a syntax / parse error.
+    """
+    if detect_compression(path) is not None:
+        with open_input(path, encoding) as f:
+            return tally_csv(f, delimiter)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    size = os.path.getsize(path)
+    start_time = perf_counter()
+    with open(path, 'rb') as f:
+        head_line = f.readline()
+        body_start = f.tell()
+        head_reader = io.TextIOWrapper(io.BytesIO(head_line), encoding=encoding)
+        votings, _ = _read_csv_head(head_reader, delimiter)
+        all_votings = _csv_votings(votings)
+        # compute the chunks and the number of the first row in each chunk
+        chunk_size = min(max(1, (size - body_start) // (workers * _chunks_per_worker)), _max_chunk_bytes)
+        chunks = []
+        start, row_num = body_start, 2
+        while start < size:
+            f.seek(min(start + chunk_size, size))
+            f.readline()
+            end = f.tell()
+            f.seek(start)
+            chunks.append((start, end, row_num))
+            row_num += _count_newlines(f, end - start)
+            start = end
+    hooks = get_hooks()
+    if hooks is not None:
+        split_time = perf_counter()
+        hooks.phase('csv_split', split_time - start_time)
+        start_time = split_time
+    if workers == 1 or len(chunks) <= 1:
+        partial = [_tally_csv_chunk(path, start, end, first_row, all_votings, delimiter, encoding)
+                   for start, end, first_row in chunks]
+    else:
+        # imported here because it takes longer to import than all other modules of this package
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_tally_csv_chunk, path, start, end, first_row, all_votings, delimiter,
+                                       encoding)
+                       for start, end, first_row in chunks]
+            # result raises the exception of the worker, so the first error in the file is reported
+            partial = [future.result() for future in futures]
+    tallies = [tally_for(skel) for skel in all_votings]
+    for chunk_tallies in partial:
+        for tally, chunk_tally in zip(tallies, chunk_tallies):
+            tally.merge(chunk_tally)
+    if hooks is not None:
+        hooks.phase('csv_tally', perf_counter() - start_time, row_num - 2)
+    return all_votings, tallies
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Strongest paths (the matrix p) for Schulze votings with many options.
+#
+# schulze_voting.compute_p runs the Floyd-Warshall algorithm on nested lists, that is k^3 iterations of the
+# interpreter for k options. Here each row of p is packed into a single int: option j occupies the bits
+# [w * j, w * (j + 1)) of the row, the highest bit of each field is a guard bit that is always zero in the values.
+# The relaxation of a whole row (row_j = max(row_j, min(p[j][i], row_i))) then needs a handful of int operations:
+# comparing all fields of a and b at once is ((a | guard bits) - b) & guard bits, the guard bit of a field is set
+# iff the field of a is >= the field of b (a field never borrows from its neighbour), and this is turned into a mask
+# selecting the fields of a or b.
+
+import sys
+from array import array
+
+from schulze_voting import SchulzeRes, compute_p, rank_p
+
+# from this number of options on compute_p_fast uses compute_p_packed
+PACKED_MIN_OPTIONS = 8
+
+_typecodes = {8: 'B', 16: 'H', 32: 'I', 64: 'Q'}
+
+
+def _field_width(max_value):
+    bits = max_value.bit_length() + 1
+    for width in (8, 16, 32, 64):
+        if bits <= width:
+            return width
+    return None
+
+
+def _pack(values, typecode):
+    a = array(typecode, values)
+    if sys.byteorder != 'little':
+        a.byteswap()
+    return int.from_bytes(a.tobytes(), 'little')
+
+
+def _unpack(packed, typecode, n):
+    a = array(typecode)
+    a.frombytes(packed.to_bytes(n * a.itemsize, 'little'))
+    if sys.byteorder != 'little':
+        a.byteswap()
+    return a.tolist()
+
+
+def compute_p_packed(d, n):
+    """Compute the matrix p given the matrix d, the result is the same as schulze_voting.compute_p(d, n).
+
+    The rows of p are packed into ints and relaxed as a whole, see the comment at the top of this module. Rows j with
+    p[j][i] = 0 can't be improved by the pivot i and are skipped. The matrix must contain only non-negative entries
+    less than 2^63, otherwise schulze_voting.compute_p is used.
+
+    Args:
+        d (list of list of int): The matrix d.
+        n (int): Number of options in the vote.
+
+    Returns:
+        list of list of int: The matrix p.
+
+    Examples:
+        >>> d = [[0, 4, 4], [2, 0, 5], [6, 5, 0]]
+        >>> compute_p_packed(d, 3) == compute_p(d, 3)
+        True
+        >>> compute_p_packed(d, 3)
+        [[0, 4, 0], [0, 0, 0], [6, 4, 0]]
+    """
+    init = [[d[i][j] if i != j and d[i][j] > d[j][i] else 0 for j in range(n)] for i in range(n)]
+    if n == 0:
+        return init
+    max_value = max(max(row) for row in init)
+    min_value = min(min(row) for row in init)
+    width = _field_width(max_value)
+    if min_value < 0 or width is None:
+        return compute_p(d, n)
+    typecode = _typecodes[width]
+    bits = width - 1
+    field = (1 << bits) - 1
+    ones = _pack([1] * n, typecode)
+    guard = ones << bits
+    rows = [_pack(row, typecode) for row in init]
+    for i in range(n):
+        row_i = rows[i]
+        if not row_i:
+            continue
+        shift = width * i
+        for j in range(n):
+            row_j = rows[j]
+            c = (row_j >> shift) & field
+            if not c or j == i:
+                continue
+            # m = min(c, row_i) for each field
+            c *= ones
+            ge = ((c | guard) - row_i) & guard
+            m = c ^ ((c ^ row_i) & (ge - (ge >> bits)))
+            # row_j = max(row_j, m) for each field
+            ge = ((row_j | guard) - m) & guard
+            rows[j] = m ^ ((m ^ row_j) & (ge - (ge >> bits)))
+    res = []
+    for j, row in enumerate(rows):
+        values = _unpack(row, typecode, n)
+        # the diagonal may have been set by the relaxation, it doesn't influence any other entry
+        values[j] = 0
+        res.append(values)
+    return res
+
+
+def compute_p_fast(d, n):
+    """Compute the matrix p given the matrix d: With compute_p_packed for n >= PACKED_MIN_OPTIONS and
+    schulze_voting.compute_p otherwise.
+
+    Args:
+        d (list of list of int): The matrix d.
+        n (int): Number of options in the vote.
+
+    Returns:
+        list of list of int: The matrix p.
+    """
+    if n >= PACKED_MIN_OPTIONS:
+        return compute_p_packed(d, n)
+    return compute_p(d, n)
+
+
+def schulze_result(d, n):
+    """Compute p (with compute_p_fast) and the ranking from the matrix d.
+
+    Args:
+        d (list of list of int): The matrix d.
+        n (int): Number of options in the vote.
+
+    Returns:
+        schulze_voting.SchulzeRes: All (intermediate) results for the voting, d is the given matrix.
+    """
+    res = SchulzeRes()
+    res.d = d
+    res.p = compute_p_fast(d, n)
+    res.candidate_wins = rank_p(res.p, n)
+    return res
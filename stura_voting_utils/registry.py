@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import sys
+from array import array
+
+from .utils import WeightedVoter
+from .parser import ParseException, parse_voters
+
+
+class VoterRegistry(object):
+    """A compact registry of voters with lookup by name.
+
+    Instead of a WeightedVoter object per voter the registry stores the (interned) names in a list and the weights
+    in an array, a dictionary maps each name to its position. Looking up a voter and the total weight take O(1).
+
+    Attributes:
+        names (list of str): The names of all voters in the order they were added.
+        weights (array of int): The weights of all voters in the order they were added.
+        total_weight (int): The sum of all weights.
+
+    Examples:
+        >>> registry = load_voter_registry(['* Fachbereich Bla: 2', '* Initiative Blubb: 1'])
+        >>> registry.weight('Fachbereich Bla')
+        2
+        >>> registry.total_weight
+        3
+    """
+    def __init__(self):
+        self.names = []
+        self.weights = array('q')
+        self.total_weight = 0
+        self._index = dict()
+
+    def add(self, name, weight):
+        """Add a voter to the registry.
+
+        Args:
+            name (str): Name of the voter.
+            weight (int): Weight of the voter.
+
+        Raises:
+            ValueError: If there already is a voter with this name.
+        """
+        if name in self._index:
+            raise ValueError('Duplicate voter "%s"' % name)
+        name = sys.intern(name)
+        self._index[name] = len(self.names)
+        self.names.append(name)
+        self.weights.append(weight)
+        self.total_weight += weight
+
+    def index(self, name):
+        """Return the position of a voter in the registry.
+
+        Args:
+            name (str): Name of the voter.
+
+        Returns:
+            int: The position of the voter.
+
+        Raises:
+            KeyError: If there is no voter with this name.
+        """
+        return self._index[name]
+
+    def weight(self, name):
+        """Return the weight of a voter.
+
+        Args:
+            name (str): Name of the voter.
+
+        Returns:
+            int: The weight of the voter.
+
+        Raises:
+            KeyError: If there is no voter with this name.
+        """
+        return self.weights[self._index[name]]
+
+    def get(self, name):
+        """Return a voter as WeightedVoter object.
+
+        Args:
+            name (str): Name of the voter.
+
+        Returns:
+            WeightedVoter: The voter or None if there is no voter with this name.
+        """
+        i = self._index.get(name)
+        if i is None:
+            return None
+        return WeightedVoter(self.names[i], self.weights[i])
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __iter__(self):
+        for name, weight in zip(self.names, self.weights):
+            yield WeightedVoter(name, weight)
+
+
+def load_voter_registry(reader):
+    """Parse a voters file (see parse_voters) into a VoterRegistry.
+
+    Args:
+        reader (iterable of string): Anything to iterate over and receive lines (file opened with open, list of strings)
+
+    Returns:
+        VoterRegistry: The registry containing all voters.
+
+    Raises:
+        ParseException: If there is a syntax error or a voter name is not unique.
+    """
+    line_num = 0
+
+    def counted_lines():
+        # parse_voters yields each voter directly after reading its line, so line_num is the line of the last voter
+        nonlocal line_num
+        for line_num, line in enumerate(reader, 1):
+            yield line
+
+    res = VoterRegistry()
+    for voter in parse_voters(counted_lines()):
+        if voter.name in res:
+            raise ParseException('Duplicate voter "%s" in line %d, voter names must be unique' % (voter.name, line_num))
+        res.add(voter.name, voter.weight)
+    return res
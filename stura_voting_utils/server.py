@@ -0,0 +1,408 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# A local server that collects ballots while a session is running and keeps a live tally of all votings.
+#
+# Clients connect via TCP or a unix socket and send commands, one per line (UTF-8). Each command is answered with
+# exactly one line:
+#
+# - "VOTE <row>": Submit a ballot, row has the same format as a row in the body of a csv file accepted by parse_csv
+#   ("<name>,<weight>,<entry>,..."). The answer is "OK <number of ballots>" or "ERROR <message>". If a voter submits
+#   another ballot it replaces the previous one.
+# - "RETRACT <name>": Remove the ballot of a voter, answered with "OK <number of ballots>" or "ERROR <message>".
+# - "RESULTS": Answered with "RESULTS <json>", the JSON object is the one returned by LiveTally.to_dict.
+# - "QUIT": Close the connection (answered with "BYE").
+#
+# All clients are served by one event loop, a command is processed completely before the next one, so the tallies
+# need no locking. Adding a ballot costs O(n^2) for each Schulze voting and O(log value) for each median voting,
+# results are cached by the tallies until they change, so requesting results doesn't stall the ingestion.
+#
+# Run with stura-voting-server -f <csv file> [--port PORT | --unix PATH] (or python -m stura_voting_utils.server), the
+# votings are read from the head of the csv file, ballots already in the file are added before the server starts.
+
+import sys
+import csv
+import json
+import asyncio
+import argparse
+
+from .utils import MedianVotingSkeleton, SchulzeVotingSkeleton
+from .parser import ParseException, read_csv_head, parse_csv_row
+from .tally import IncrementalSchulzeTally, IncrementalMedianTally
+from .compression import open_input
+
+
+class LiveTally(object):
+    """The ballots of a running session and the tallies of all votings.
+
+    Attributes:
+        all_votings (list of MedianVotingSkeleton and SchulzeVotingSkeleton): The votings, as returned by parse_csv.
+        tallies (list of IncrementalSchulzeTally and IncrementalMedianTally): For each voting the tally.
+        ballots (dict of str to (int, list)): Maps the name of each voter to the weight and the entries (as returned
+            by parse_row) of its ballot.
+
+    Examples:
+        >>> live = LiveTally([SchulzeVotingSkeleton('Chair', ['A', 'B'], 0), MedianVotingSkeleton('Budget', 100, '€', 1)])
+        >>> live.submit_row('Alice,2,1/0,50')
+        1
+        >>> live.submit_row('Bob,1,0/1,')
+        2
+        >>> live.submit_row('Alice,2,0/1,80')
+        2
+        >>> live.results()[0].candidate_wins, live.results()[1]
+        ([[0], [1]], 80)
+    """
+    def __init__(self, all_votings):
+        self.all_votings = all_votings
+        self.tallies = []
+        for skel in all_votings:
+            if isinstance(skel, SchulzeVotingSkeleton):
+                self.tallies.append(IncrementalSchulzeTally(skel))
+            elif isinstance(skel, MedianVotingSkeleton):
+                self.tallies.append(IncrementalMedianTally(skel))
+            else:
+                raise TypeError('Unknown voting type: %s' % type(skel).__name__)
+        self.ballots = dict()
+
+    def parse_row(self, row, row_num=1):
+        """Parse and validate a ballot.
+
+        Args:
+            row (list of str): The columns of the ballot: name, weight and one entry for each voting.
+            row_num (int): The row number used in error messages.
+
+        Returns:
+            (str, int, list): The name of the voter, its weight and for each voting the ranking (list of int), the
+            value (int) or None if the voter didn't vote.
+
+        Raises:
+            ParseException: If the ballot is invalid.
+        """
+        weight, entries = parse_csv_row(self.all_votings, row, row_num)
+        name = row[0].strip()
+        if not name:
+            raise ParseException('Invalid ballot in row %d: Name of the voter is missing' % row_num)
+        if weight < 0:
+            raise ParseException('Invalid ballot in row %d: Weight must not be negative' % row_num)
+        for skel, entry in zip(self.all_votings, entries):
+            if entry is None:
+                continue
+            if isinstance(skel, MedianVotingSkeleton) and not 0 <= entry <= skel.value:
+                raise ParseException('Invalid value for median voting in row %d: Must be between 0 and %d' %
+                                     (row_num, skel.value))
+        return name, weight, entries
+
+    def _apply(self, weight, entries, sign):
+        for tally, entry in zip(self.tallies, entries):
+            if entry is None:
+                continue
+            if sign > 0:
+                tally.add(entry, weight)
+            elif isinstance(tally, IncrementalSchulzeTally):
+                tally.retract(entry, weight)
+            else:
+                tally.remove(entry, weight)
+
+    def submit(self, name, weight, entries):
+        """Add a parsed ballot (see parse_row), a previous ballot of the same voter is replaced.
+
+        Args:
+            name (str): The name of the voter.
+            weight (int): The weight of the voter.
+            entries (list): For each voting the entry.
+
+        Returns:
+            int: The number of ballots.
+        """
+        prev = self.ballots.get(name)
+        if prev is not None:
+            self._apply(prev[0], prev[1], -1)
+        self._apply(weight, entries, 1)
+        self.ballots[name] = (weight, entries)
+        return len(self.ballots)
+
+    def submit_row(self, line, delimiter=',', row_num=1):
+        """Parse a ballot given as a line of a csv file and add it, see parse_row and submit.
+
+        Args:
+            line (str): The line.
+            delimiter (str): The csv delimiter.
+            row_num (int): The row number used in error messages.
+
+        Returns:
+            int: The number of ballots.
+
+        Raises:
+            ParseException: If the ballot is invalid, the tallies are not changed in this case.
+        """
+        rows = list(csv.reader([line], delimiter=delimiter))
+        if len(rows) != 1:
+            raise ParseException('Invalid ballot in row %d: Must be exactly one row' % row_num)
+        return self.submit(*self.parse_row(rows[0], row_num))
+
+    def retract(self, name):
+        """Remove the ballot of a voter.
+
+        Args:
+            name (str): The name of the voter.
+
+        Returns:
+            int: The number of ballots.
+
+        Raises:
+            KeyError: If there is no ballot of the voter.
+        """
+        weight, entries = self.ballots.pop(name)
+        self._apply(weight, entries, -1)
+        return len(self.ballots)
+
+    def results(self):
+        """Return the current results.
+
+        Returns:
+            list: For each voting the result as in evaluate_voting (schulze_voting.SchulzeRes or the agreed value).
+        """
+        res = []
+        for tally in self.tallies:
+            if isinstance(tally, IncrementalSchulzeTally):
+                res.append(tally.evaluate())
+            else:
+                res.append(tally.median())
+        return res
+
+    def to_dict(self):
+        """Return the current results as a dict that can be serialized with json.
+
+        Returns:
+            dict: The number of ballots ("ballots") and for each voting ("votings") its id, name, type, number of
+            votes and the ranking (Schulze votings) or the agreed value (median votings, None if no value was agreed
+            upon).
+        """
+        votings = []
+        for skel, tally, result in zip(self.all_votings, self.tallies, self.results()):
+            d = {'id': skel.id, 'name': skel.name, 'votes': tally.num_votes}
+            if isinstance(tally, IncrementalSchulzeTally):
+                d['type'] = 'schulze'
+                d['ranking'] = result.candidate_wins
+            else:
+                d['type'] = 'median'
+                d['weight_sum'] = tally.weight_sum()
+                d['value'] = result
+            votings.append(d)
+        return {'ballots': len(self.ballots), 'votings': votings}
+
+
+class BallotServer(object):
+    """Serves a LiveTally via TCP or a unix socket, the protocol is described at the top of this module.
+
+    Attributes:
+        live (LiveTally): The tally the ballots are added to.
+        delimiter (str): The csv delimiter of the ballots.
+        backlog (int): The maximal number of pending connections, should be at least the number of clients that
+            connect at the same time.
+
+    Examples:
+        >>> async def session():
+        ...     server = BallotServer(LiveTally([SchulzeVotingSkeleton('Chair', ['A', 'B'], 0)]))
+        ...     srv = await server.start('127.0.0.1', 0)
+        ...     reader, writer = await asyncio.open_connection('127.0.0.1', srv.sockets[0].getsockname()[1])
+        ...     answers = []
+        ...     for command in ['VOTE Alice,2,1/0', 'VOTE Bob,1,0', 'RESULTS', 'QUIT']:
+        ...         writer.write(command.encode('utf-8') + b'\\n')
+        ...         answers.append((await reader.readline()).decode('utf-8').rstrip())
+        ...     writer.close()
+        ...     srv.close()
+        ...     await srv.wait_closed()
+        ...     return answers
+        >>> for answer in asyncio.run(session()): print(answer)
+        OK 1
+        ERROR Invalid options in row 2: Must contain exactly as many options as defined in voting
+        RESULTS {"ballots": 1, "votings": [{"id": 0, "name": "Chair", "votes": 1, "type": "schulze", "ranking": [[1], [0]]}]}
+        BYE
+    """
+    def __init__(self, live, delimiter=',', backlog=1024):
+        self.live = live
+        self.delimiter = delimiter
+        self.backlog = backlog
+
+    def handle_command(self, line, row_num=1):
+        """Process a single command and return the answer (without newline).
+
+        Args:
+            line (str): The command.
+            row_num (int): The number of the command on its connection, used in error messages.
+
+        Returns:
+            str: The answer, None for QUIT.
+        """
+        command, _, arg = line.partition(' ')
+        if command == 'VOTE':
+            try:
+                return 'OK %d' % self.live.submit_row(arg, self.delimiter, row_num)
+            except ParseException as e:
+                return 'ERROR %s' % ' '.join(str(e).split())
+        elif command == 'RETRACT':
+            try:
+                return 'OK %d' % self.live.retract(arg.strip())
+            except KeyError:
+                return 'ERROR No ballot for voter %s' % arg.strip()
+        elif command == 'RESULTS':
+            return 'RESULTS %s' % json.dumps(self.live.to_dict())
+        elif command == 'QUIT':
+            return None
+        else:
+            return 'ERROR Unknown command: %s' % command
+
+    async def handle_client(self, reader, writer):
+        """Serve a single connection until the client sends QUIT or closes the connection."""
+        row_num = 0
+        try:
+            while True:
+                data = await reader.readline()
+                if not data:
+                    break
+                row_num += 1
+                try:
+                    line = data.decode('utf-8').rstrip('\r\n')
+                except UnicodeDecodeError:
+                    answer = 'ERROR Command is not valid UTF-8'
+                else:
+                    answer = self.handle_command(line, row_num)
+                if answer is None:
+                    writer.write(b'BYE\n')
+                    await writer.drain()
+                    break
+                writer.write(answer.encode('utf-8') + b'\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            # the client disconnected or sent a line that is too long
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def start(self, host='127.0.0.1', port=0):
+        """Start serving via TCP.
+
+        Args:
+            host (str): The address to listen on.
+            port (int): The port, 0 chooses a free port (see the sockets attribute of the returned server).
+
+        Returns:
+            asyncio.AbstractServer: The server.
+        """
+        return await asyncio.start_server(self.handle_client, host, port, backlog=self.backlog)
+
+    async def start_unix(self, path):
+        """Start serving via a unix socket.
+
+        Args:
+            path (str): The path of the socket.
+
+        Returns:
+            asyncio.AbstractServer: The server.
+        """
+        return await asyncio.start_unix_server(self.handle_client, path, backlog=self.backlog)
+
+
+def load_live_tally(reader, delimiter=','):
+    """Create a LiveTally from a csv file (see parse_csv): The votings are read from the head, all rows are added as
+    ballots.
+
+    Each row is a ballot of its own (as in parse_csv), so a voter must not appear in more than one row. Rows the live
+    tally can't represent are rejected instead of being counted differently than by parse_csv: rows without a name, a
+    repeated name, a negative weight or a median value that is not between 0 and the value of the voting.
+
+    Args:
+        reader: File like object to read from (a list will also do); something to iterate over and receive lines.
+        delimiter (str): The csv delimiter.
+
+    Returns:
+        LiveTally: The tally.
+
+    Raises:
+        ParseException: If there is a syntax / parse error.
+    """
+    all_votings, csv_reader = read_csv_head(reader, delimiter)
+    live = LiveTally(all_votings)
+    rows = dict()
+    for row_num, row in enumerate(csv_reader, 2):
+        name, weight, entries = live.parse_row(row, row_num)
+        if name in rows:
+            raise ParseException('Invalid ballot in row %d: Voter %s already voted in row %d' %
+                                 (row_num, name, rows[name]))
+        rows[name] = row_num
+        live.submit(name, weight, entries)
+    return live
+
+
+async def _serve(server, args):
+    if args.unix is not None:
+        srv = await server.start_unix(args.unix)
+    else:
+        srv = await server.start(args.host, args.port)
+    for sock in srv.sockets:
+        print('Listening on', sock.getsockname())
+    async with srv:
+        await srv.serve_forever()
+
+
+def main(argv=None):
+    """Run the server until it's interrupted.
+
+    Args:
+        argv (list of str): The arguments, None uses sys.argv.
+
+    Returns:
+        int: The exit status, 1 if the csv file is invalid.
+    """
+    parser = argparse.ArgumentParser(description='Server collecting ballots and computing live results')
+    parser.add_argument('--file', '-f', help='Path to the csv file containing the head (and possibly ballots), may be compressed',
+                        required=True)
+    parser.add_argument('--delimiter', help='The csv file delimiter, default is ","', default=',')
+    parser.add_argument('--encoding', help='The encoding of the csv file, default is "utf-8"', default='utf-8')
+    parser.add_argument('--host', help='The address to listen on, default is 127.0.0.1', default='127.0.0.1')
+    parser.add_argument('--port', help='The port to listen on, default is 8765', type=int, default=8765)
+    parser.add_argument('--unix', help='Listen on this unix socket instead of a TCP port', default=None)
+    args = parser.parse_args(argv)
+
+    try:
+        with open_input(args.file, args.encoding) as f:
+            live = load_live_tally(f, args.delimiter)
+    except ParseException as e:
+        print('Error while parsing csv file:')
+        print(e)
+        return 1
+    try:
+        asyncio.run(_serve(BallotServer(live, args.delimiter), args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Instrumentation of the parsers and evaluation functions.
+#
+# The functions of this package report the time spent in each phase (parsing the csv head, parsing the body,
+# evaluating a voting, ...) to the installed hooks object, see set_hooks and record_stats. If no hooks are installed
+# (the default) the only cost is one lookup of the hooks object per phase, nothing is reported per row or vote.
+
+import json
+from contextlib import contextmanager
+
+from .utils import MedianVotingSkeleton, SchulzeVotingSkeleton
+
+_hooks = None
+
+
+def get_hooks():
+    """Return the installed hooks object.
+
+    Returns:
+        StatsHooks: The installed hooks, None if no hooks are installed.
+    """
+    return _hooks
+
+
+def set_hooks(hooks):
+    """Install a hooks object, the hooks are global for all threads of this process.
+
+    Worker processes (for example of evaluate_votings with jobs > 1) don't report to the hooks of the main process,
+    only the total time of the parallel phase is reported.
+
+    Args:
+        hooks (StatsHooks): The hooks to install, None removes the installed hooks.
+
+    Returns:
+        StatsHooks: The previously installed hooks (or None).
+    """
+    global _hooks
+    prev = _hooks
+    _hooks = hooks
+    return prev
+
+
+class StatsHooks(object):
+    """Base class for hooks, the methods are called by the instrumented functions and do nothing by default.
+
+    The names of the phases are:
+    "csv_head", "csv_body", "csv_table", "csv_tally" and "csv_split" (the split of the file in parse_csv_parallel),
+    "collection" (parse_voting_collection), "validate" (validate_csv), "load_binary", "aggregate", "evaluate" (all
+    votings in evaluate_votings) and "evaluate_schulze" / "evaluate_median" (a single voting, also reported by the
+    voting method).
+    """
+
+    def phase(self, name, seconds, rows=None):
+        """Called when a phase has finished.
+
+        Args:
+            name (str): The name of the phase.
+            seconds (float): The wall time of the phase in seconds.
+            rows (int): The number of processed rows (or lines), None if the phase doesn't process rows.
+        """
+        pass
+
+    def voting(self, index, skel, seconds, votes=None):
+        """Called when a single voting has been evaluated.
+
+        Args:
+            index (int): The index of the voting.
+            skel (SchulzeVotingSkeleton or MedianVotingSkeleton): The voting.
+            seconds (float): The wall time of the evaluation in seconds.
+            votes (int): The number of vote objects (SchulzeVote or MedianVote) that were allocated for the voting,
+                0 if the voting was evaluated from a tally or a column without creating vote objects.
+        """
+        pass
+
+
+class PhaseStats(object):
+    """Accumulated statistics of one phase.
+
+    Attributes:
+        name (str): The name of the phase.
+        calls (int): How often the phase was reported.
+        seconds (float): The total wall time in seconds.
+        rows (int): The total number of processed rows, None if the phase doesn't process rows.
+    """
+
+    __slots__ = ('name', 'calls', 'seconds', 'rows')
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.rows = None
+
+    @property
+    def rows_per_second(self):
+        if self.rows is None or self.seconds <= 0:
+            return None
+        return self.rows / self.seconds
+
+    def to_dict(self):
+        return {'name': self.name, 'calls': self.calls, 'seconds': self.seconds, 'rows': self.rows,
+                'rows_per_second': self.rows_per_second}
+
+
+class VotingStats(object):
+    """Statistics of the evaluation of one voting.
+
+    Attributes:
+        index (int): The index of the voting.
+        name (str): The name of the voting.
+        type (str): "schulze" or "median".
+        seconds (float): The wall time of the evaluation in seconds.
+        votes (int): The number of vote objects allocated for the voting.
+    """
+
+    __slots__ = ('index', 'name', 'type', 'seconds', 'votes')
+
+    def __init__(self, index, name, type, seconds, votes):
+        self.index = index
+        self.name = name
+        self.type = type
+        self.seconds = seconds
+        self.votes = votes
+
+    def to_dict(self):
+        return {'index': self.index, 'name': self.name, 'type': self.type, 'seconds': self.seconds,
+                'votes': self.votes}
+
+
+def _voting_type(skel):
+    if isinstance(skel, SchulzeVotingSkeleton):
+        return 'schulze'
+    elif isinstance(skel, MedianVotingSkeleton):
+        return 'median'
+    return type(skel).__name__
+
+
+class StatsRecorder(StatsHooks):
+    """Hooks that record all reported phases and votings.
+
+    Attributes:
+        phases (dict of str to PhaseStats): The statistics of each phase, in the order they were first reported.
+        votings (list of VotingStats): The statistics of all evaluated votings.
+    """
+
+    def __init__(self):
+        self.phases = dict()
+        self.votings = []
+
+    def phase(self, name, seconds, rows=None):
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = PhaseStats(name)
+            self.phases[name] = stats
+        stats.calls += 1
+        stats.seconds += seconds
+        if rows is not None:
+            stats.rows = rows if stats.rows is None else stats.rows + rows
+
+    def voting(self, index, skel, seconds, votes=None):
+        self.votings.append(VotingStats(index, skel.name, _voting_type(skel), seconds, votes))
+
+    def to_dict(self):
+        """Return all statistics as a dict that can be serialized with json."""
+        return {'phases': [stats.to_dict() for stats in self.phases.values()],
+                'votings': [stats.to_dict() for stats in self.votings]}
+
+    def dump(self, f):
+        """Write all statistics as JSON to a file like object."""
+        json.dump(self.to_dict(), f, indent=2)
+
+    def summary(self):
+        """Return a human readable summary of all statistics.
+
+        Returns:
+            str: The summary (multiple lines).
+        """
+        lines = ['%-18s %6s %10s %10s %12s' % ('Phase', 'Calls', 'Time (s)', 'Rows', 'Rows/s')]
+        for stats in self.phases.values():
+            rows = '' if stats.rows is None else str(stats.rows)
+            rows_per_second = stats.rows_per_second
+            rows_per_second = '' if rows_per_second is None else '%.0f' % rows_per_second
+            lines.append('%-18s %6d %10.4f %10s %12s' % (stats.name, stats.calls, stats.seconds, rows,
+                                                          rows_per_second))
+        if self.votings:
+            lines.append('')
+            lines.append('%-6s %-8s %10s %10s  %s' % ('Voting', 'Type', 'Votes', 'Time (s)', 'Name'))
+            for stats in self.votings:
+                votes = '' if stats.votes is None else str(stats.votes)
+                lines.append('%-6d %-8s %10s %10.4f  %s' % (stats.index + 1, stats.type, votes, stats.seconds,
+                                                            stats.name))
+        return '\n'.join(lines)
+
+
+@contextmanager
+def record_stats():
+    """Context manager that installs a new StatsRecorder and restores the previous hooks on exit.
+
+    Examples:
+        >>> from stura_voting_utils import parse_csv
+        >>> with record_stats() as recorder:
+        ...     _ = parse_csv(['Name,Gewicht,Median (100)', 'G1,5,20', 'G2,3,42'])
+        >>> [(stats.name, stats.calls, stats.rows) for stats in recorder.phases.values()]
+        [('csv_head', 1, None), ('csv_body', 1, 2)]
+    """
+    recorder = StatsRecorder()
+    prev = set_hooks(recorder)
+    try:
+        yield recorder
+    finally:
+        set_hooks(prev)
@@ -0,0 +1,421 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from array import array
+from collections import defaultdict
+
+from .utils import MedianVotingSkeleton, SchulzeVotingSkeleton
+from .paths import schulze_result
+
+
+class SchulzeTally(object):
+    """Accumulates Schulze votes into the matrix d without storing the votes themselves.
+
+    The memory required only depends on the number of options n, not on the number of votes added.
+
+    Attributes:
+        n (int): The number of options in the voting.
+        d (list of list of int): The matrix d, d[i][j] is the weight of all voters that prefer option i over option j.
+        num_votes (int): The number of votes added.
+    """
+    def __init__(self, n):
+        self.n = n
+        self.d = [[0 for _ in range(n)] for _ in range(n)]
+        self.num_votes = 0
+
+    def add(self, ranking, weight=1):
+        """Add a ranking to the tally.
+
+        Args:
+            ranking (list of int): For each option the position in the ranking, must have length n.
+            weight (int): Weight of the voter.
+        """
+        self._update(ranking, weight)
+        self.num_votes += 1
+
+    def _update(self, ranking, weight):
+        n = self.n
+        d = self.d
+        for i in range(n):
+            r_i = ranking[i]
+            d_i = d[i]
+            for j in range(i + 1, n):
+                r_j = ranking[j]
+                if r_i < r_j:
+                    d_i[j] += weight
+                elif r_j < r_i:
+                    d[j][i] += weight
+
+    def add_vote(self, vote):
+        """Add a schulze_voting.SchulzeVote to the tally.
+
+        Args:
+            vote (schulze_voting.SchulzeVote): The vote to add.
+        """
+        self.add(vote.ranking, vote.weight)
+
+    def merge(self, other):
+        """Add all votes from another tally (with the same number of options) to this tally.
+
+        Args:
+            other (SchulzeTally): The tally to merge into this one.
+        """
+        if other.n != self.n:
+            raise ValueError('Can\'t merge tallies with %d and %d options' % (self.n, other.n))
+        for d_i, other_i in zip(self.d, other.d):
+            for j, val in enumerate(other_i):
+                d_i[j] += val
+        self.num_votes += other.num_votes
+
+    def evaluate(self):
+        """Compute the result of the voting from the matrix d.
+
+        Returns:
+            schulze_voting.SchulzeRes: The result, the same as schulze_voting.evaluate_schulze would return for all
+            votes added.
+        """
+        return schulze_result([list(row) for row in self.d], self.n)
+
+
+class IncrementalSchulzeTally(SchulzeTally):
+    """A SchulzeTally for a single voting that also supports retracting votes, for example if ballots are corrected.
+
+    Adding or retracting a vote costs O(n^2), the result is computed from the matrix d when requested (and cached
+    until the next change), so no votes have to be replayed.
+
+    Note that retracting a ranking that was never added is not detected (the tally does not store the votes).
+
+    Attributes:
+        skeleton (SchulzeVotingSkeleton): The voting the tally belongs to.
+    """
+    def __init__(self, skeleton):
+        super().__init__(len(skeleton.options))
+        self.skeleton = skeleton
+        self._result = None
+
+    def _check_ranking(self, ranking):
+        if len(ranking) != self.n:
+            raise ValueError('Invalid ranking for voting "%s": Must contain exactly %d options, got %d' %
+                             (self.skeleton.name, self.n, len(ranking)))
+
+    def add(self, ranking, weight=1):
+        """Add a ranking to the tally.
+
+        Args:
+            ranking (list of int): For each option the position in the ranking, must have length n.
+            weight (int): Weight of the voter.
+
+        Raises:
+            ValueError: If the ranking has the wrong length.
+        """
+        self._check_ranking(ranking)
+        super().add(ranking, weight)
+        self._result = None
+
+    def retract(self, ranking, weight=1):
+        """Retract a ranking that was added before.
+
+        Args:
+            ranking (list of int): The ranking that was added.
+            weight (int): The weight the ranking was added with.
+
+        Raises:
+            ValueError: If the ranking has the wrong length or there are no votes in the tally.
+        """
+        self._check_ranking(ranking)
+        if self.num_votes <= 0:
+            raise ValueError('Can\'t retract a vote from voting "%s": No votes added' % self.skeleton.name)
+        self._update(ranking, -weight)
+        self.num_votes -= 1
+        self._result = None
+
+    def retract_vote(self, vote):
+        """Retract a schulze_voting.SchulzeVote that was added before.
+
+        Args:
+            vote (schulze_voting.SchulzeVote): The vote to retract.
+        """
+        self.retract(vote.ranking, vote.weight)
+
+    def merge(self, other):
+        super().merge(other)
+        self._result = None
+
+    def evaluate(self):
+        """Return the current result of the voting, it is only computed again if votes were added or retracted.
+
+        Returns:
+            schulze_voting.SchulzeRes: The current result.
+        """
+        if self._result is None:
+            self._result = super().evaluate()
+        return self._result
+
+    def ranking(self):
+        """Return the current ranking of the options.
+
+        Returns:
+            list of list of int: The ranking groups as in schulze_voting.SchulzeRes.candidate_wins.
+        """
+        return self.evaluate().candidate_wins
+
+
+class MedianTally(object):
+    """Accumulates median votes into a mapping value -> weight without storing the votes themselves.
+
+    The memory required only depends on the number of distinct values voted for, which is bounded by the value
+    of the voting.
+
+    Attributes:
+        weights (dict of int to int): Maps each value to the weight of all votes for that value.
+        num_votes (int): The number of votes added.
+    """
+    def __init__(self):
+        self.weights = defaultdict(int)
+        self.num_votes = 0
+
+    def add(self, value, weight=1):
+        """Add a vote to the tally.
+
+        Args:
+            value (int): The value voted for.
+            weight (int): Weight of the voter.
+        """
+        self.weights[value] += weight
+        self.num_votes += 1
+
+    def add_vote(self, vote):
+        """Add a median_voting.MedianVote to the tally.
+
+        Args:
+            vote (median_voting.MedianVote): The vote to add.
+        """
+        self.add(vote.value, vote.weight)
+
+    def merge(self, other):
+        """Add all votes from another tally to this tally.
+
+        Args:
+            other (MedianTally): The tally to merge into this one.
+        """
+        for value, weight in other.weights.items():
+            self.weights[value] += weight
+        self.num_votes += other.num_votes
+
+    def weight_sum(self):
+        """Returns the sum of all weights added.
+
+        Returns:
+            int: The sum of the weights.
+        """
+        return sum(self.weights.values())
+
+    def median(self, votes_required=None):
+        """Computes the median, i.e. the greatest value with a majority.
+
+        The semantics are the same as in median_voting.MedianStatistics.median.
+
+        Args:
+            votes_required (int): The number of votes required for a majority. That is: > than (strictly!) this value
+                are required. If it is not given it set to the weight sum // 2.
+
+        Returns:
+            int: The agreed value or None if no value was agreed upon.
+        """
+        if votes_required is None:
+            votes_required = self.weight_sum() // 2
+        weight = 0
+        for value in sorted(self.weights, reverse=True):
+            weight += self.weights[value]
+            if weight > votes_required:
+                return value
+        return None
+
+
+class IncrementalMedianTally(object):
+    """A tally for a single median voting that supports adding and removing votes and median queries in O(log n).
+
+    The values voted for must be between 0 and the value of the voting (in cents), each of these values is a bucket
+    in two Fenwick trees (binary indexed trees), one for the weights and one for the number of votes. Thus the memory
+    required is 16 bytes per cent of the voting's value. Weights must not be negative.
+
+    The results of median are the same as median_voting.MedianStatistics.median for all votes added.
+
+    Attributes:
+        skeleton (MedianVotingSkeleton): The voting the tally belongs to.
+        num_votes (int): The number of votes in the tally.
+
+    Examples:
+        >>> tally = IncrementalMedianTally(MedianVotingSkeleton('Finance', 1000, '€'))
+        >>> tally.add(500, 2)
+        >>> tally.add(300, 1)
+        >>> tally.add(1000, 1)
+        >>> tally.median()
+        500
+        >>> tally.remove(500, 2)
+        >>> tally.median()
+        300
+    """
+    def __init__(self, skeleton):
+        self.skeleton = skeleton
+        self.num_votes = 0
+        self._weight_sum = 0
+        self._size = skeleton.value + 1
+        # bucket i (1-based) holds the value skeleton.value - (i - 1), so prefix sums contain all values >= some value
+        self._weights = array('q', bytes(8 * (self._size + 1)))
+        self._counts = array('q', bytes(8 * (self._size + 1)))
+
+    def _index(self, value):
+        if not 0 <= value <= self.skeleton.value:
+            raise ValueError('Invalid value for voting "%s": %d, must be between 0 and %d' %
+                             (self.skeleton.name, value, self.skeleton.value))
+        return self.skeleton.value - value + 1
+
+    def _update(self, index, weight, count):
+        weights, counts = self._weights, self._counts
+        size = self._size
+        while index <= size:
+            weights[index] += weight
+            counts[index] += count
+            index += index & (-index)
+
+    def _prefix(self, tree, index):
+        res = 0
+        while index > 0:
+            res += tree[index]
+            index -= index & (-index)
+        return res
+
+    def _search(self, tree, bound):
+        # smallest index with prefix sum > bound (or size + 1 if there is none), requires non-negative entries
+        pos = 0
+        step = 1 << self._size.bit_length()
+        while step:
+            next_pos = pos + step
+            if next_pos <= self._size and tree[next_pos] <= bound:
+                pos = next_pos
+                bound -= tree[next_pos]
+            step >>= 1
+        return pos + 1
+
+    def add(self, value, weight=1):
+        """Add a vote to the tally.
+
+        Args:
+            value (int): The value voted for.
+            weight (int): Weight of the voter.
+
+        Raises:
+            ValueError: If the value is not between 0 and the value of the voting or the weight is negative.
+        """
+        index = self._index(value)
+        if weight < 0:
+            raise ValueError('Invalid weight for voting "%s": %d, must be >= 0' % (self.skeleton.name, weight))
+        self._update(index, weight, 1)
+        self._weight_sum += weight
+        self.num_votes += 1
+
+    def add_vote(self, vote):
+        """Add a median_voting.MedianVote to the tally.
+
+        Args:
+            vote (median_voting.MedianVote): The vote to add.
+        """
+        self.add(vote.value, vote.weight)
+
+    def remove(self, value, weight=1):
+        """Remove a vote that was added before.
+
+        Args:
+            value (int): The value that was voted for.
+            weight (int): The weight the vote was added with.
+
+        Raises:
+            ValueError: If the value is invalid or there is no vote with this value and weight in the tally.
+        """
+        index = self._index(value)
+        bucket_count = self._prefix(self._counts, index) - self._prefix(self._counts, index - 1)
+        bucket_weight = self._prefix(self._weights, index) - self._prefix(self._weights, index - 1)
+        if bucket_count <= 0 or bucket_weight < weight or weight < 0:
+            raise ValueError('Can\'t remove vote for value %d with weight %d from voting "%s": No such vote' %
+                             (value, weight, self.skeleton.name))
+        self._update(index, -weight, -1)
+        self._weight_sum -= weight
+        self.num_votes -= 1
+
+    def remove_vote(self, vote):
+        """Remove a median_voting.MedianVote that was added before.
+
+        Args:
+            vote (median_voting.MedianVote): The vote to remove.
+        """
+        self.remove(vote.value, vote.weight)
+
+    def weight_sum(self):
+        """Returns the sum of all weights in the tally.
+
+        Returns:
+            int: The sum of the weights.
+        """
+        return self._weight_sum
+
+    def median(self, votes_required=None):
+        """Computes the median, i.e. the greatest value with a majority.
+
+        The semantics are the same as in median_voting.MedianStatistics.median.
+
+        Args:
+            votes_required (int): The number of votes required for a majority. That is: > than (strictly!) this value
+                are required. If it is not given it set to the weight sum // 2.
+
+        Returns:
+            int: The agreed value or None if no value was agreed upon.
+        """
+        if votes_required is None:
+            votes_required = self._weight_sum // 2
+        if votes_required < 0:
+            # the first vote is enough, this is the greatest value voted for (if there is a vote)
+            index = self._search(self._counts, 0)
+        else:
+            index = self._search(self._weights, votes_required)
+        if index > self._size:
+            return None
+        return self.skeleton.value - index + 1
+
+
+def tally_for(skel):
+    """Create an empty tally for a voting skeleton.
+
+    Args:
+        skel (SchulzeVotingSkeleton or MedianVotingSkeleton): The voting to create the tally for.
+
+    Returns:
+        SchulzeTally or MedianTally: An empty tally for the voting.
+    """
+    if isinstance(skel, SchulzeVotingSkeleton):
+        return SchulzeTally(len(skel.options))
+    elif isinstance(skel, MedianVotingSkeleton):
+        return MedianTally()
+    else:
+        raise TypeError('Unknown voting type: %s' % type(skel).__name__)
@@ -22,6 +22,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+from weakref import WeakSet
+
 
 def output_currency(val, currency=None, delim=','):
     """Format a value in cents in a currency.
@@ -49,24 +51,70 @@ def output_currency(val, currency=None, delim=','):
 
         >>> output_currency(4284)
         '42,84'
+
+        >>> output_currency(-5, '€')
+        '-0,05 €'
     """
-    if currency is None:
-        currency = ''
-    else:
-        currency = ' ' + currency
+    # format the value with at least three digits and insert the delimiter before the last two
     if val < 0:
-        return '-' + output_currency(-val, currency, delim)
-    elif val < 10:
-        return '0%s0%d%s' % (delim, val, currency)
-    elif val < 100:
-        return '0%s%d%s' % (delim, val, currency)
+        digits = '%03d' % -val
+        sign = '-'
     else:
-        euro = val // 100
-        cent = val % 100
-        if cent < 10:
-            return '%d%s0%d%s' % (euro, delim, cent, currency)
+        digits = '%03d' % val
+        sign = ''
+    if currency is None:
+        return sign + digits[:-2] + delim + digits[-2:]
+    return sign + digits[:-2] + delim + digits[-2:] + ' ' + currency
+
+
+def _join_blocks(blocks):
+    # yields the lines of all blocks (iterables of lines) separated by an empty line, as '\n\n'.join would do for
+    # the blocks as strings. Yields a single empty line if there are no blocks.
+    first = True
+    for block in blocks:
+        if not first:
+            yield ''
+        first = False
+        yield from block
+    if first:
+        yield ''
+
+
+def _write_lines(lines, stream):
+    # writes the lines separated by '\n' (without a trailing newline)
+    first = True
+    for line in lines:
+        if first:
+            stream.write(line)
+            first = False
         else:
-            return '%d%s%d%s' % (euro, delim, cent, currency)
+            stream.write('\n')
+            stream.write(line)
+
+
+def iter_voters_lines(voters):
+    """Iterate over the lines of a list of voters in the Markdown-like format (see WeightedVoter.output).
+
+    Args:
+        voters (iterable of WeightedVoter): The voters.
+
+    Yields:
+        str: The line of each voter (without newline).
+    """
+    for voter in voters:
+        yield voter.output()
+
+
+def write_voters(voters, stream):
+    """Write voters in the Markdown-like format to a stream, one voter per line.
+
+    The output can be parsed with parse_voters, there is no trailing newline.
+
+    Args:
+        voters (iterable of WeightedVoter): The voters.
+        stream: A file like object opened for writing text.
+    """
+    _write_lines(iter_voters_lines(voters), stream)
 
 
 class WeightedVoter(object):
@@ -76,6 +124,7 @@ class WeightedVoter(object):
         name (str): Name of the voter.
         weight (int): Weight of the voter in votings.
     """
+    __slots__ = ('name', 'weight')
 
     def __init__(self, name, weight):
         self.name = name
@@ -93,6 +142,11 @@ class WeightedVoter(object):
 class VotingCollection(object):
     """A class for representing a collection of groups (the groups contain the actual votes).
 
+    The collection keeps an index of all votings by name, it is built when needed. Changes made with add_group,
+    remove_group, VotingGroup.add_voting and VotingGroup.remove_voting or by assigning new lists drop the index.
+    Other changes (modifying the lists directly, renaming a voting or changing its id) must be followed by a call to
+    invalidate().
+
     Attributes:
         name (str): The name of the collection, for example 'Votings on day XXX'.
         date (datetime.datetime): The date when the voting takes place, can be None.
@@ -102,8 +156,107 @@ class VotingCollection(object):
 
         self.name = name
         self.date = date
+        self._version = 0
+        self._name_index = None
+        self._index_version = None
         self.groups = groups
 
+    def __reduce__(self):
+        return self.__class__, (self.name, self.date, self._groups)
+
+    @property
+    def groups(self):
+        return self._groups
+
+    @groups.setter
+    def groups(self, groups):
+        self._groups = groups
+        self._changed()
+
+    def _changed(self):
+        # called by the groups of the collection whenever their votings change
+        self._version += 1
+
+    def invalidate(self):
+        """Drop the index of the votings and the cached order of the votings in all groups."""
+        for group in self._groups:
+            group.invalidate()
+        self._changed()
+
+    def _get_name_index(self):
+        if self._index_version != self._version:
+            index = dict()
+            for group in self._groups:
+                group._collections.add(self)
+                for voting in group._sorted_votings():
+                    index.setdefault(voting.name, []).append(voting)
+            self._name_index = index
+            self._index_version = self._version
+        return self._name_index
+
+    def add_group(self, group):
+        """Append a group to the collection.
+
+        Args:
+            group (VotingGroup): The group to add.
+        """
+        self._groups.append(group)
+        self._changed()
+
+    def remove_group(self, group):
+        """Remove a group from the collection.
+
+        Args:
+            group (VotingGroup): The group to remove.
+
+        Raises:
+            ValueError: If the group is not in the collection.
+        """
+        self._groups.remove(group)
+        group._collections.discard(self)
+        self._changed()
+
+    def get_voting(self, group, id):
+        """Get a voting by the position of its group and its id.
+
+        Args:
+            group (int): The position of the group in groups.
+            id (int): The id of the voting.
+
+        Returns:
+            MedianVotingSkeleton or SchulzeVotingSkeleton: The voting, None if there is no voting with this id.
+
+        Raises:
+            IndexError: If there is no group at this position.
+        """
+        return self.groups[group].get_voting(id)
+
+    def find_votings(self, name):
+        """Get all votings with a certain name.
+
+        Args:
+            name (str): The name of the votings.
+
+        Returns:
+            list of MedianVotingSkeleton and SchulzeVotingSkeleton: All votings with this name (in the order of the
+            groups and ids).
+        """
+        return list(self._get_name_index().get(name, ()))
+
+    def find_voting(self, name):
+        """Get the first voting with a certain name, see find_votings.
+
+        Args:
+            name (str): The name of the voting.
+
+        Returns:
+            MedianVotingSkeleton or SchulzeVotingSkeleton: The first voting with this name, None if there is none.
+        """
+        votings = self._get_name_index().get(name)
+        if not votings:
+            return None
+        return votings[0]
+
     def output(self):
         """Return the collection in the Markdown-like format.
 
@@ -115,28 +268,138 @@ class VotingCollection(object):
         groups_str = '\n\n'.join( group.output() for group in self.groups )
         return '# %s\n\n%s' % (self.name, groups_str)
 
+    def iter_lines(self):
+        """Iterate over the lines of the collection in the Markdown-like format.
+
+        Joining the lines with '\\n' gives the same string as output(), but the document is never built in memory.
+
+        Yields:
+            str: The lines (without newline).
+        """
+        yield '# %s' % self.name
+        yield ''
+        yield from _join_blocks(group.iter_lines() for group in self.groups)
+
+    def write_to(self, stream):
+        """Write the collection in the Markdown-like format to a stream, line by line.
+
+        The written text is the same as output() returns.
+
+        Args:
+            stream: A file like object opened for writing text.
+        """
+        _write_lines(self.iter_lines(), stream)
+
 
 class VotingGroup(object):
     """A group consists of different median and schulze votings.
 
+    The group caches the votings sorted according to their id. Changes made with add_voting and remove_voting or by
+    assigning new lists drop the cache (and the index of the collections containing the group). Other changes
+    (modifying the lists directly or changing the id of a voting) must be followed by a call to invalidate().
+
     Attributes:
         name (str): The name of the group, e.g. 'Financial Votings'.
         median_votings (list of MedianVotingSkeleton): All median votings in the group.
         schulze_votings (list of SchulzeVotingSkeleton) Alle Schulze votings in the group.
     """
+    __slots__ = ('name', '_median_votings', '_schulze_votings', '_votings', '_by_id', '_collections')
+
     def __init__(self, name, median_votings, schulze_votings):
         self.name = name
+        # the collections whose index contains the votings of this group
+        self._collections = WeakSet()
         self.median_votings = median_votings
         self.schulze_votings = schulze_votings
 
+    def __reduce__(self):
+        return self.__class__, (self.name, self._median_votings, self._schulze_votings)
+
+    @property
+    def median_votings(self):
+        return self._median_votings
+
+    @median_votings.setter
+    def median_votings(self, votings):
+        self._median_votings = votings
+        self.invalidate()
+
+    @property
+    def schulze_votings(self):
+        return self._schulze_votings
+
+    @schulze_votings.setter
+    def schulze_votings(self, votings):
+        self._schulze_votings = votings
+        self.invalidate()
+
+    def invalidate(self):
+        """Drop the cached order of the votings and the index of the collections containing the group."""
+        self._votings = None
+        self._by_id = None
+        for collection in self._collections:
+            collection._changed()
+
+    def _sorted_votings(self):
+        if self._votings is None:
+            self._votings = sorted(self._median_votings + self._schulze_votings,
+                                   key=lambda v: v.id if v.id is not None else 0)
+        return self._votings
+
     def get_votings(self):
         """Get all votings (median and Schulze) sorted according to their id.
 
         Returns:
             list of MedianVotingSkeleton and SchulzeVotingSkeleton: All votings sorted according to their id.
         """
-        return sorted(self.median_votings + self.schulze_votings,
-                      key=lambda v: v.id if v.id is not None else 0)
+        return list(self._sorted_votings())
+
+    def get_voting(self, id):
+        """Get the voting with a certain id.
+
+        Args:
+            id (int): The id of the voting.
+
+        Returns:
+            MedianVotingSkeleton or SchulzeVotingSkeleton: The voting, None if there is no voting with this id.
+        """
+        if self._by_id is None:
+            by_id = dict()
+            for voting in self._sorted_votings():
+                by_id.setdefault(voting.id, voting)
+            self._by_id = by_id
+        return self._by_id.get(id)
+
+    def add_voting(self, voting):
+        """Add a voting to the group (to median_votings or schulze_votings depending on the type).
+
+        Args:
+            voting (MedianVotingSkeleton or SchulzeVotingSkeleton): The voting to add.
+        """
+        if isinstance(voting, MedianVotingSkeleton):
+            self.median_votings.append(voting)
+        elif isinstance(voting, SchulzeVotingSkeleton):
+            self.schulze_votings.append(voting)
+        else:
+            raise TypeError('Unknown voting type: %s' % type(voting).__name__)
+        self.invalidate()
+
+    def remove_voting(self, voting):
+        """Remove a voting from the group.
+
+        Args:
+            voting (MedianVotingSkeleton or SchulzeVotingSkeleton): The voting to remove.
+
+        Raises:
+            ValueError: If the voting is not in the group.
+        """
+        if isinstance(voting, MedianVotingSkeleton):
+            self.median_votings.remove(voting)
+        elif isinstance(voting, SchulzeVotingSkeleton):
+            self.schulze_votings.remove(voting)
+        else:
+            raise TypeError('Unknown voting type: %s' % type(voting).__name__)
+        self.invalidate()
 
     def __len__(self):
         """Return the number of votings in the group.
@@ -152,10 +415,30 @@ class VotingGroup(object):
         Returns:
             str: The representation of the group in the Markdown-like format.
         """
-        all_votings = self.get_votings()
+        all_votings = self._sorted_votings()
         return '## %s\n\n%s' % (self.name,
                                 '\n\n'.join(voting.output() for voting in all_votings))
 
+    def iter_lines(self):
+        """Iterate over the lines of the group in the Markdown-like format.
+
+        Joining the lines with '\\n' gives the same string as output().
+
+        Yields:
+            str: The lines (without newline).
+        """
+        yield '## %s' % self.name
+        yield ''
+        yield from _join_blocks(voting.iter_lines() for voting in self._sorted_votings())
+
+    def write_to(self, stream):
+        """Write the group in the Markdown-like format to a stream, line by line.
+
+        Args:
+            stream: A file like object opened for writing text.
+        """
+        _write_lines(self.iter_lines(), stream)
+
 
 
 class MedianVotingSkeleton(object):
@@ -172,6 +455,8 @@ class MedianVotingSkeleton(object):
         id (int): An internal id that is used for sorting skeletons.
 
     """
+    __slots__ = ('name', 'value', 'currency', 'id')
+
     def __init__(self, name, value, currency, id=None):
         self.name = name
         self.value = value
@@ -186,6 +471,15 @@ class MedianVotingSkeleton(object):
         """
         return '### %s\n- %s' % (self.name, output_currency(self.value, self.currency))
 
+    def iter_lines(self):
+        """Iterate over the lines of the voting in the Markdown-like format.
+
+        Yields:
+            str: The lines (without newline).
+        """
+        yield '### %s' % self.name
+        yield '- %s' % output_currency(self.value, self.currency)
+
 
 class SchulzeVotingSkeleton(object):
     """A Schulze voting skeleton (contains no votes, just defines the basic structure).
@@ -198,6 +492,8 @@ class SchulzeVotingSkeleton(object):
         options (list of str): All possible options of the voting.
         id (int): An internal id that is used for sorting skeletons.
     """
+    __slots__ = ('name', 'options', 'id')
+
     def __init__(self, name, options, id=None):
         self.name = name
         self.options = options
@@ -210,3 +506,15 @@ class SchulzeVotingSkeleton(object):
             str: The representation of the voting in the Markdown-like format.
         """
         return '### %s\n%s' % (self.name, '\n'.join( '* %s' % option for option in self.options ))
+
+    def iter_lines(self):
+        """Iterate over the lines of the voting in the Markdown-like format.
+
+        Yields:
+            str: The lines (without newline).
+        """
+        yield '### %s' % self.name
+        if not self.options:
+            yield ''
+        for option in self.options:
+            yield '* %s' % option
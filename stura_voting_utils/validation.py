@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Validation of ballot csv files (see parse_csv) that reports all problems in a file instead of only the first one.
+
+import csv
+from time import perf_counter
+
+from .utils import MedianVotingSkeleton, SchulzeVotingSkeleton
+from .parser import ParseException, _parse_csv_head, _csv_votings
+from .stats import get_hooks
+
+# kinds of problems
+HEAD = 'head'
+COLUMNS = 'columns'
+WEIGHT = 'weight'
+SCHULZE_SYNTAX = 'schulze_syntax'
+OPTIONS = 'options'
+RANK_RANGE = 'rank_range'
+RANK_DUPLICATE = 'rank_duplicate'
+MEDIAN_SYNTAX = 'median_syntax'
+MEDIAN_RANGE = 'median_range'
+
+# rows are validated in blocks of this size, so the memory required doesn't grow with the size of the file
+_BLOCK_ROWS = 1 << 16
+
+
+class ValidationProblem(object):
+    """A single problem found in a csv file.
+
+    Attributes:
+        row (int): The row number (the head is row 1).
+        voting (int): The index of the voting (column) the problem belongs to, None if the problem concerns the
+            whole row (for example the number of columns or the weight).
+        kind (str): The kind of the problem, one of the constants HEAD, COLUMNS, WEIGHT, SCHULZE_SYNTAX, OPTIONS,
+            RANK_RANGE, RANK_DUPLICATE, MEDIAN_SYNTAX and MEDIAN_RANGE.
+        message (str): A human readable description.
+    """
+
+    __slots__ = ('row', 'voting', 'kind', 'message')
+
+    def __init__(self, row, voting, kind, message):
+        self.row = row
+        self.voting = voting
+        self.kind = kind
+        self.message = message
+
+    def to_dict(self):
+        return {'row': self.row, 'voting': self.voting, 'kind': self.kind, 'message': self.message}
+
+    def __repr__(self):
+        return 'ValidationProblem(%d, %r, %r, %r)' % (self.row, self.voting, self.kind, self.message)
+
+
+class ValidationReport(object):
+    """The result of validate_csv.
+
+    Attributes:
+        all_votings (list of MedianVotingSkeleton and SchulzeVotingSkeleton): The votings from the head, None if
+            the head is invalid.
+        num_rows (int): The number of rows (without the head).
+        problems (list of ValidationProblem): All problems sorted by row and voting.
+    """
+
+    def __init__(self, all_votings, num_rows, problems):
+        self.all_votings = all_votings
+        self.num_rows = num_rows
+        self.problems = problems
+
+    @property
+    def valid(self):
+        return not self.problems
+
+    def count_kinds(self):
+        """Count the problems of each kind.
+
+        Returns:
+            dict of str to int: Maps each kind that occurred to the number of problems of this kind.
+        """
+        res = dict()
+        for problem in self.problems:
+            res[problem.kind] = res.get(problem.kind, 0) + 1
+        return res
+
+    def to_dict(self):
+        """Return the report as a dict that can be serialized with json."""
+        return {'valid': self.valid, 'num_rows': self.num_rows, 'kinds': self.count_kinds(),
+                'problems': [problem.to_dict() for problem in self.problems]}
+
+    def summary(self, max_problems=None):
+        """Return a human readable summary.
+
+        Args:
+            max_problems (int): The maximal number of problems listed, None lists all problems.
+
+        Returns:
+            str: The summary (multiple lines).
+        """
+        if self.valid:
+            return 'No problems found in %d rows' % self.num_rows
+        lines = ['Found %d problems in %d rows:' % (len(self.problems), self.num_rows)]
+        shown = self.problems if max_problems is None else self.problems[:max_problems]
+        lines.extend(problem.message for problem in shown)
+        if len(shown) < len(self.problems):
+            lines.append('... and %d more' % (len(self.problems) - len(shown)))
+        return '\n'.join(lines)
+
+
+# the check functions return a list of (kind, prefix, detail) for a single cell, the message of a problem is
+# "<prefix> in row <row>: <detail>"
+
+def _check_weight(cell):
+    try:
+        int(cell)
+    except ValueError as e:
+        return [(WEIGHT, "Can't parse weight as int", str(e))]
+    return []
+
+
+def _check_schulze(cell, n, strict):
+    try:
+        positions = [int(as_str) for as_str in cell.split('/')]
+    except ValueError as e:
+        return [(SCHULZE_SYNTAX, "Can't parse options for Schulze voting", str(e))]
+    if len(positions) != n:
+        return [(OPTIONS, 'Invalid options', 'Must contain exactly %d options, got %d' % (n, len(positions)))]
+    if not strict:
+        return []
+    res = []
+    for pos in positions:
+        if not 0 <= pos < n:
+            res.append((RANK_RANGE, 'Invalid options', 'Position %d is out of range, must be between 0 and %d' %
+                        (pos, n - 1)))
+            break
+    if len(set(positions)) != n:
+        duplicates = sorted(set(pos for pos in positions if positions.count(pos) > 1))
+        res.append((RANK_DUPLICATE, 'Invalid options', 'Positions used more than once: %s' %
+                    ', '.join(str(pos) for pos in duplicates)))
+    return res
+
+
+def _check_median(cell, value, strict):
+    try:
+        v = int(cell)
+    except ValueError as e:
+        return [(MEDIAN_SYNTAX, 'Invalid value for median voting', str(e))]
+    if strict and not 0 <= v <= value:
+        return [(MEDIAN_RANGE, 'Invalid value for median voting', '%d is not between 0 and %d' % (v, value))]
+    return []
+
+
+def _column_problems(cells, row_nums, voting, check, problems, skip_empty=True):
+    # checks each distinct cell of a column once and adds the problems for all rows containing an invalid cell, empty
+    # cells (no vote) are valid if skip_empty is True
+    invalid = dict()
+    for cell in set(cells):
+        if cell or not skip_empty:
+            cell_problems = check(cell)
+            if cell_problems:
+                invalid[cell] = cell_problems
+    if not invalid:
+        return
+    for cell, row_num in zip(cells, row_nums):
+        cell_problems = invalid.get(cell)
+        if cell_problems is not None:
+            for kind, prefix, detail in cell_problems:
+                problems.append(ValidationProblem(row_num, voting, kind, '%s in row %d: %s' % (prefix, row_num,
+                                                                                                 detail)))
+
+
+def _validate_block(all_votings, rows, row_nums, strict, problems):
+    if not rows:
+        return
+    columns = list(zip(*rows))
+    # the weight is required in each row
+    _column_problems(columns[1], row_nums, None, _check_weight, problems, skip_empty=False)
+    for i, (skel, cells) in enumerate(zip(all_votings, columns[2:])):
+        if isinstance(skel, SchulzeVotingSkeleton):
+            n = len(skel.options)
+            # a ranking without ties is a permutation of the positions, this is checked for each cell at once
+            expected = sorted(str(pos) for pos in range(n))
+            check = lambda cell: [] if sorted(cell.split('/')) == expected else _check_schulze(cell, n, strict)
+        elif isinstance(skel, MedianVotingSkeleton):
+            check = lambda cell: _check_median(cell, skel.value, strict)
+        else:
+            assert False
+        _column_problems(cells, row_nums, i, check, problems)
+
+
+def validate_csv(reader, delimiter=',', strict=False):
+    """Validate a csv file (see parse_csv) and report all problems.
+
+    The file is read once. The rows are transposed into columns in blocks, and each distinct entry of a column is
+    checked only once, so files with many identical ballots are validated quickly.
+
+    By default exactly the problems parse_csv rejects are reported. If strict is True the following entries (accepted
+    by parse_csv and the evaluation) are reported too: positions in Schulze rankings that are not between 0 and the
+    number of options - 1, positions used more than once in a Schulze ranking (ties) and median values that are not
+    between 0 and the value of the voting.
+
+    Args:
+        reader: File like object to read from (a list will also do); something to iterate over and receive lines.
+        delimiter (str): The csv delimiter.
+        strict (bool): If True also report positions and values out of range and ties.
+
+    Returns:
+        ValidationReport: The report, if the head is invalid it contains only this problem.
+
+    Examples:
+        >>> lines = ['Name,Gewicht,Schulze (3),Median (100)', 'G1,5,0/1/2,20', 'G2,x,0/0/1,200', 'G3,2,0/1,',
+        ...          'G4,1,1/2/0', 'G5,,,']
+        >>> for problem in validate_csv(lines).problems: print(problem.message)
+        Can't parse weight as int in row 3: invalid literal for int() with base 10: 'x'
+        Invalid options in row 4: Must contain exactly 3 options, got 2
+        Invalid syntax in row 5: Expected 4 columns, got 3
+        Can't parse weight as int in row 6: invalid literal for int() with base 10: ''
+        >>> for problem in validate_csv(lines, strict=True).problems[:3]: print(problem.message)
+        Can't parse weight as int in row 3: invalid literal for int() with base 10: 'x'
+        Invalid options in row 3: Positions used more than once: 0
+        Invalid value for median voting in row 3: 200 is not between 0 and 100
+    """
+    start = perf_counter()
+    csv_reader = csv.reader(reader, delimiter=delimiter)
+    try:
+        head = next(csv_reader)
+    except StopIteration:
+        return ValidationReport(None, 0, [ValidationProblem(1, None, HEAD, 'No header found in csv file')])
+    try:
+        all_votings = _csv_votings(_parse_csv_head(head))
+    except ParseException as e:
+        return ValidationReport(None, 0, [ValidationProblem(1, None, HEAD, str(e))])
+    num_columns = len(all_votings) + 2
+    problems = []
+    rows, row_nums = [], []
+    num_rows = 0
+    for row_num, row in enumerate(csv_reader, 2):
+        num_rows += 1
+        if len(row) != num_columns:
+            problems.append(ValidationProblem(row_num, None, COLUMNS, 'Invalid syntax in row %d: Expected %d columns, '
+                                                                      'got %d' % (row_num, num_columns, len(row))))
+            continue
+        rows.append(row)
+        row_nums.append(row_num)
+        if len(rows) >= _BLOCK_ROWS:
+            _validate_block(all_votings, rows, row_nums, strict, problems)
+            rows, row_nums = [], []
+    _validate_block(all_votings, rows, row_nums, strict, problems)
+    # the problems of a block are grouped by column, sorting is stable so problems of a cell stay in order
+    problems.sort(key=lambda problem: (problem.row, -1 if problem.voting is None else problem.voting))
+    hooks = get_hooks()
+    if hooks is not None:
+        hooks.phase('validate', perf_counter() - start, num_rows)
+    return ValidationReport(all_votings, num_rows, problems)
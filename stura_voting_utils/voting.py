@@ -25,12 +25,8 @@
 import sys
 import argparse
 
-from .parser import *
 
-from schulze_voting import evaluate_schulze
-from median_voting import MedianStatistics
-
-if __name__ == '__main__':
+def _build_parser():
     parser = argparse.ArgumentParser(
         description='Command line tool for evaluating Schulze and Median votings',
         formatter_class=argparse.RawTextHelpFormatter)
@@ -38,7 +34,7 @@ if __name__ == '__main__':
     parser.add_argument(
         '--file',
         '-f',
-        help='Path to the csv file',
+        help='Path to the csv file (may be compressed with gzip, bz2 or xz)',
         required=True)
 
     parser.add_argument(
@@ -47,36 +43,209 @@ if __name__ == '__main__':
         required=False,
         default=',')
 
-    args = parser.parse_args()
+    parser.add_argument(
+        '--encoding',
+        help='The encoding of the csv file, default is "utf-8"',
+        required=False,
+        default='utf-8')
+
+    parser.add_argument(
+        '--stream',
+        help='Don\'t store the votes but tally them while reading the file,\nuse this for very large files',
+        action='store_true')
+
+    parser.add_argument(
+        '--aggregate',
+        help='Combine identical rankings / values before evaluating the votings\n(ignored with --stream, tallies are already aggregated)',
+        action='store_true')
+
+    parser.add_argument(
+        '--jobs',
+        '-j',
+        help='Number of processes used to evaluate the votings (and to parse the file\nwith --stream), default is 1',
+        type=int,
+        required=False,
+        default=1)
+
+    parser.add_argument(
+        '--save-binary',
+        help='Save the votes in the binary ballot format to this path, the file\ncan be passed to --file instead of the csv file',
+        required=False,
+        default=None)
+
+    parser.add_argument(
+        '--stats',
+        help='Print the time spent in each phase (parsing, evaluation, ...) and the number\nof votes of each voting',
+        action='store_true')
+
+    parser.add_argument(
+        '--stats-json',
+        help='Write the statistics as JSON to this path ("-" for stdout)',
+        required=False,
+        default=None)
+
+    parser.add_argument(
+        '--validate',
+        help='Only check the csv file and report all problems instead of stopping at the first one',
+        action='store_true')
+
+    parser.add_argument(
+        '--strict',
+        help='With --validate: Also report ties in Schulze rankings and positions / values out of range\n'
+             '(they are accepted when evaluating the votings)',
+        action='store_true')
+
+    parser.add_argument(
+        '--cache',
+        help='Store the results in a cache directory and take the results of votings that didn\'t change\n'
+             'from it (the files in the directory are written and deleted by this tool)',
+        action='store_true')
+
+    parser.add_argument(
+        '--cache-dir',
+        help='With --cache: The directory of the result cache, default is\n'
+             '$XDG_CACHE_HOME/stura_voting_utils (or ~/.cache/stura_voting_utils)',
+        required=False,
+        default=None)
+
+    parser.add_argument(
+        '--cache-size',
+        help='With --cache: The maximal size of the result cache in MB, default is 64',
+        type=int,
+        required=False,
+        default=None)
+    return parser
+
+
+def _report_stats(recorder, args):
+    from .stats import set_hooks
+    set_hooks(None)
+    if args.stats:
+        print()
+        print('Statistics:')
+        print(recorder.summary())
+    if args.stats_json == '-':
+        recorder.dump(sys.stdout)
+        print()
+    elif args.stats_json is not None:
+        with open(args.stats_json, 'w') as f:
+            recorder.dump(f)
+
+
+def main(argv=None):
+    """Run the command line tool.
+
+    Args:
+        argv (list of str): The arguments, None uses sys.argv.
+
+    Returns:
+        int: The exit status, 1 if the file is invalid (with --validate).
+    """
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error('--jobs must be at least 1')
 
-    with open(args.file, 'r') as f:
-        try:
-            all_votings, votes = parse_csv(f, args.delimiter)
-        except ParseException as e:
-            print('Error while parsing csv file:')
-            print(e)
-            sys.exit(1)
+    # the modules are imported after parsing the arguments, so --help and invalid arguments don't have to wait for them
+    recorder = None
+    if args.stats or args.stats_json is not None:
+        from .stats import StatsRecorder, set_hooks
+        recorder = StatsRecorder()
+        set_hooks(recorder)
+
+    from .compression import open_input, detect_compression
+
+    if args.validate:
+        from .validation import validate_csv
+        with open_input(args.file, args.encoding) as f:
+            report = validate_csv(f, args.delimiter, args.strict)
+        print(report.summary(max_problems=100))
+        if recorder is not None:
+            _report_stats(recorder, args)
+        return 0 if report.valid else 1
+
+    from .utils import MedianVotingSkeleton, SchulzeVotingSkeleton
+    from .parser import ParseException, parse_csv, tally_csv, parse_csv_parallel
+    from .binary import is_ballot_file, load_ballot_table, save_ballot_table
+    from .cache import ResultCache, DEFAULT_MAX_SIZE, evaluate_votings_cached
+
+    try:
+        if is_ballot_file(args.file):
+            all_votings, votes = load_ballot_table(args.file)
+        elif args.save_binary is not None:
+            with open_input(args.file, args.encoding) as f:
+                all_votings, votes = parse_csv(f, args.delimiter, as_table=True)
+        elif args.stream and args.jobs > 1 and detect_compression(args.file) is None:
+            all_votings, votes = parse_csv_parallel(args.file, args.jobs, args.delimiter, args.encoding)
+        else:
+            with open_input(args.file, args.encoding) as f:
+                if args.stream:
+                    all_votings, votes = tally_csv(f, args.delimiter)
+                else:
+                    all_votings, votes = parse_csv(f, args.delimiter)
+    except ParseException as e:
+        print('Error while parsing csv file:')
+        print(e)
+        return 1
+
+    if args.save_binary is not None:
+        save_ballot_table(args.save_binary, votes)
+
+    cache = None
+    if args.cache:
+        max_size = DEFAULT_MAX_SIZE if args.cache_size is None else args.cache_size * 1024 * 1024
+        cache = ResultCache(args.cache_dir, max_size)
+
+    # the votes are aggregated only for the votings not found in the cache
+    aggregated_stats = []
+    prepare = None
+    if args.aggregate and not args.stream:
+        from .aggregation import aggregate_votes
+
+        def prepare(sub_votings, sub_votes):
+            sub_votes, sub_stats = aggregate_votes(sub_votings, sub_votes)
+            aggregated_stats.extend(sub_stats)
+            return sub_votes
 
     print('Evaluating votings...')
     print()
+    results, cache_stats = evaluate_votings_cached(all_votings, votes, cache, args.jobs, prepare)
+    stats = None
+    if prepare is not None:
+        it = iter(aggregated_stats)
+        stats = [None if cached else next(it) for cached in cache_stats.cached]
     for i, skel in enumerate(all_votings, 1):
         print('Voting %d ' % i, end='')
         if isinstance(skel, SchulzeVotingSkeleton):
             print('Schulze voting with %d options' % len(skel.options))
             print('The ranking groups are as follows:')
-            s_res = evaluate_schulze(votes[i-1], len(skel.options))
+            s_res = results[i-1]
             eq_list = [' = '.join(str(i) for i in l) for l in s_res.candidate_wins]
             out = ' > '.join(eq_list)
             print(out)
         elif isinstance(skel, MedianVotingSkeleton):
             print('Median voting with value %d' % skel.value)
-            stat = MedianStatistics(votes[i-1])
-            agreed_value = stat.median()
+            agreed_value = results[i-1]
             if agreed_value is None:
                 print('No value agreed upon')
             else:
                 print('Agreed on value', agreed_value)
         else:
             assert False
+        if cache is not None and cache_stats.cached[i-1]:
+            print('Result taken from the cache')
+        elif stats is not None:
+            print('Aggregated %d votes into %d distinct votes (compression ratio %.2f)' %
+                  (stats[i-1].num_votes, stats[i-1].num_distinct, stats[i-1].compression_ratio))
         print()
+    if cache is not None:
+        print('Result cache: %d hits, %d misses' % (cache_stats.hits, cache_stats.misses))
     print('Note that the capabilities of this tool are very limited, it is rather a demonstration of the voting packages')
+
+    if recorder is not None:
+        _report_stats(recorder, args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import pytest
+
+from stura_voting_utils.analysis import load_schulze_analyses
+from stura_voting_utils.parser import ParseException
+
+
+def test_duplicate_name_row():
+    with pytest.raises(ParseException) as info:
+        load_schulze_analyses(['Name,Gewicht,Schulze (2)', 'G1,5,0/1', 'G2,3,1/0', ' G1 ,1,1/0'])
+    assert str(info.value) == 'Invalid ballot in row 4: Voter "G1" is already part of voting "Voting 1"'
+
+
+def test_syntax_error_row():
+    with pytest.raises(ParseException) as info:
+        load_schulze_analyses(['Name,Gewicht,Schulze (2)', 'G1,5,0/1', 'G2,x,1/0'])
+    assert 'row 3' in str(info.value)
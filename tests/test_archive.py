@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from stura_voting_utils.archive import SessionArchive
+from stura_voting_utils.utils import WeightedVoter
+
+
+def test_unknown_session_is_rejected():
+    with SessionArchive() as archive:
+        with pytest.raises(KeyError):
+            archive.add_voters(999, [WeightedVoter('Alice', 2)])
+        with pytest.raises(KeyError):
+            archive.add_ballots(999, ['Name,Gewicht,Median (100)', 'Alice,2,50'])
+        assert archive.connection.execute('SELECT COUNT(*) FROM voters').fetchone()[0] == 0
+        assert archive.connection.execute('SELECT COUNT(*) FROM ballots').fetchone()[0] == 0
+        assert archive.connection.execute('SELECT COUNT(*) FROM voting_groups').fetchone()[0] == 0
+
+
+def test_foreign_keys_are_enforced():
+    with SessionArchive() as archive:
+        with pytest.raises(sqlite3.IntegrityError):
+            archive.connection.execute('INSERT INTO voters (session_id, position, name, weight) '
+                                       'VALUES (999, 0, "A", 1)')
+
+
+def test_dates_round_trip(tmp_path):
+    path = str(tmp_path / 'archive.db')
+    date = datetime(2018, 5, 3, 18, 30)
+    with SessionArchive(path) as archive:
+        session = archive.add_session('Session', date)
+        archive.add_voters(session, [WeightedVoter('Alice', 2)])
+    with SessionArchive(path) as archive:
+        assert archive.sessions() == [(session, 'Session', date)]
+        assert [(voter.name, voter.weight) for voter in archive.get_voters(session)] == [('Alice', 2)]
+
+
+def test_store_results_unknown_session():
+    with SessionArchive() as archive:
+        with pytest.raises(KeyError):
+            archive.store_results(999, [42])
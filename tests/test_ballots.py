@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import pytest
+
+from stura_voting_utils.ballots import BallotTable, MISSING
+from stura_voting_utils.parser import ParseException, parse_csv
+from stura_voting_utils.utils import MedianVotingSkeleton, SchulzeVotingSkeleton
+
+
+def test_append_row_rejects_missing():
+    table = BallotTable([SchulzeVotingSkeleton('Chair', ['A', 'B'], 0), MedianVotingSkeleton('Budget', 100, None, 1)])
+    table.append_row(5, [[0, 1], None])
+    for entries in ([[0, 1], MISSING], [[MISSING, 0], 5]):
+        with pytest.raises(ValueError):
+            table.append_row(1, entries)
+    # the table is unchanged
+    assert table.num_rows == 1
+    assert [list(col) for col in table.columns] == [[0, 1], [MISSING]]
+
+
+@pytest.mark.parametrize('row', ['G2,1,0/1,%d' % MISSING, 'G2,1,%d/0,5' % MISSING])
+def test_parse_csv_rejects_missing(row):
+    with pytest.raises(ParseException) as info:
+        parse_csv(['Name,Gewicht,Schulze (2),Median (100)', 'G1,5,0/1,20', row], as_table=True)
+    assert 'row 3' in str(info.value)
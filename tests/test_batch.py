@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import random
+
+from schulze_voting import SchulzeVote, compute_d
+
+from stura_voting_utils import batch
+from stura_voting_utils.batch import compute_d_batch
+from stura_voting_utils.ballots import MISSING
+
+
+def _random_ballots(rand, n, num_rows, max_position, missing_ratio=0.1, max_weight=10):
+    rankings, weights = [], []
+    for _ in range(num_rows):
+        if rand.random() < missing_ratio:
+            rankings.append([MISSING] * n)
+        else:
+            rankings.append([rand.randint(0, max_position) for _ in range(n)])
+        weights.append(rand.randint(0, max_weight))
+    return rankings, weights
+
+
+def _expected(rankings, weights, n):
+    return compute_d([SchulzeVote(r, w) for r, w in zip(rankings, weights) if r[0] != MISSING], n)
+
+
+def _column(rankings):
+    return [pos for ranking in rankings for pos in ranking]
+
+
+def test_compute_d_batch_random():
+    rand = random.Random(0)
+    for _ in range(200):
+        n = rand.randint(1, 8)
+        rankings, weights = _random_ballots(rand, n, rand.randint(0, 60), rand.choice([n - 1, n + 2, 254]))
+        assert compute_d_batch(_column(rankings), weights, n) == _expected(rankings, weights, n)
+
+
+def test_compute_d_batch_generic_path():
+    # negative weights and positions > 254 can't be encoded into masks
+    rand = random.Random(1)
+    for _ in range(50):
+        n = rand.randint(1, 6)
+        rankings, weights = _random_ballots(rand, n, rand.randint(1, 40), 1000)
+        weights = [w - 3 for w in weights]
+        assert compute_d_batch(_column(rankings), weights, n) == _expected(rankings, weights, n)
+
+
+def test_compute_d_batch_small_blocks(monkeypatch):
+    # blocks are split to keep the masks within the budget, the result must not change
+    monkeypatch.setattr(batch, '_BLOCK_ROWS', 7)
+    monkeypatch.setattr(batch, '_MASK_BUDGET', 200)
+    rand = random.Random(2)
+    for _ in range(50):
+        n = rand.randint(1, 10)
+        rankings, weights = _random_ballots(rand, n, rand.randint(0, 100), n - 1)
+        assert compute_d_batch(_column(rankings), weights, n) == _expected(rankings, weights, n)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+
+import pytest
+
+from stura_voting_utils.binary import MAGIC, VERSION, _length_struct, load_ballot_table, save_ballot_table
+from stura_voting_utils.parser import ParseException, parse_csv
+
+
+def _write_header(path, header):
+    data = json.dumps(header).encode('utf-8')
+    path.write_bytes(MAGIC + _length_struct.pack(len(data)) + data)
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'ballots.bin')
+    all_votings, table = parse_csv(['Name,Gewicht,Schulze (2),Median (100)', 'G1,5,0/1,20', 'G2,3,,42'], as_table=True)
+    save_ballot_table(path, table)
+    votings, loaded = load_ballot_table(path)
+    assert [skel.name for skel in votings] == [skel.name for skel in all_votings]
+    assert list(loaded.weights) == [5, 3]
+    loaded.close()
+
+
+@pytest.mark.parametrize('header, message', [
+    ([], 'Must be a JSON object'),
+    ({'version': VERSION, 'num_rows': 0}, 'Entry "votings" is missing'),
+    ({'version': VERSION, 'votings': []}, 'Entry "num_rows" is missing'),
+    ({'version': VERSION, 'votings': [], 'num_rows': -1}, 'Invalid number of rows'),
+    ({'version': VERSION, 'votings': [{'type': 'median'}], 'num_rows': 0}, 'Invalid voting'),
+])
+def test_malformed_header(tmp_path, header, message):
+    path = tmp_path / 'ballots.bin'
+    _write_header(path, header)
+    with pytest.raises(ParseException) as info:
+        load_ballot_table(str(path))
+    assert message in str(info.value)
+
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+
+import pytest
+
+from stura_voting_utils import cache as cache_module
+from stura_voting_utils.cache import ResultCache, evaluate_votings_cached, voting_key
+from stura_voting_utils.parser import parse_csv
+from stura_voting_utils.stats import record_stats
+from stura_voting_utils.voting import main
+
+LINES = ['Name,Gewicht,Schulze (3),Median (100),Median (100)', 'G1,5,0/1/2,20,10', 'G2,3,2/0/1,40,30']
+
+
+def test_stats_indices_with_cached_votings(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    all_votings, votes = parse_csv(LINES)
+    evaluate_votings_cached(all_votings, votes, cache)
+    # change only the last voting, the first two are taken from the cache
+    all_votings, votes = parse_csv(LINES[:2] + ['G2,3,2/0/1,40,35'])
+    with record_stats() as recorder:
+        _, stats = evaluate_votings_cached(all_votings, votes, cache)
+    assert stats.cached == [True, True, False]
+    assert [(voting.index, voting.name) for voting in recorder.votings] == [(2, all_votings[2].name)]
+
+
+def test_failed_put_leaves_no_temporary_file(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path))
+    all_votings, _ = parse_csv(LINES)
+
+    def fail(*args, **kwargs):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(cache_module.json, 'dump', fail)
+    with pytest.raises(OSError):
+        cache.put('key', all_votings[1], 20)
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_evict_removes_stale_temporary_files(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    stale = tmp_path / 'old.tmp'
+    stale.write_text('x')
+    os.utime(str(stale), (0, 0))
+    fresh = tmp_path / 'new.tmp'
+    fresh.write_text('x')
+    cache.evict()
+    assert sorted(os.listdir(str(tmp_path))) == ['new.tmp']
+
+
+def test_cli_cache_is_opt_in(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'xdg'))
+    path = tmp_path / 'ballots.csv'
+    path.write_text('\n'.join(LINES) + '\n')
+    assert main(['-f', str(path)]) == 0
+    assert not (tmp_path / 'xdg').exists()
+    assert main(['-f', str(path), '--cache']) == 0
+    assert main(['-f', str(path), '--cache']) == 0
+    assert 'Result cache: 3 hits, 0 misses' in capsys.readouterr().out
+    assert len(os.listdir(str(tmp_path / 'xdg' / 'stura_voting_utils'))) == 3
+
+
+def test_key_with_values_too_large_for_the_array(tmp_path):
+    # the weights don't fit into an int64, the key must still depend on all of them
+    cache = ResultCache(str(tmp_path))
+    head = 'Name,Gewicht,Median (100)'
+    first = [head, 'G1,0,50', 'G2,%d,90' % 10 ** 20, 'G3,%d,10' % 10 ** 20]
+    second = [head, 'G1,1,50', 'G2,%d,90' % 10 ** 20, 'G3,%d,10' % 10 ** 20]
+    keys = []
+    for lines in (first, second):
+        all_votings, votes = parse_csv(lines)
+        keys.append(voting_key(all_votings[0], votes[0]))
+    assert keys[0] != keys[1]
+    evaluate_votings_cached(*parse_csv(first), cache=cache)
+    results, stats = evaluate_votings_cached(all_votings, votes, cache)
+    assert stats.hits == 0
+    assert results == [50]
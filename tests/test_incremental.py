@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import random
+
+from stura_voting_utils import parse_voting_collection, IncrementalCollectionParser
+from stura_voting_utils.incremental import same_collection
+from stura_voting_utils.parser import ParseException
+
+
+def _random_lines(rand):
+    lines = ['# Session']
+    for g in range(rand.randint(0, 4)):
+        lines.append('## G%d' % g)
+        for v in range(rand.randint(1, 3)):
+            lines.append('### V%d' % v)
+            if rand.random() < 0.5:
+                lines.append('- %d' % rand.randint(1, 99))
+            else:
+                lines.extend('* O%d' % o for o in range(rand.randint(1, 3)))
+    return lines
+
+
+def _parse(parse, lines):
+    try:
+        return parse(lines), None
+    except ParseException as e:
+        return None, str(e)
+
+
+def test_collections_are_hashable():
+    collection = parse_voting_collection(_random_lines(random.Random(0)) + ['## G', '### V', '- 5', '### W', '* A'])
+    group = collection.groups[-1]
+    assert len({collection, group, group.median_votings[0], group.schulze_votings[0]}) == 4
+
+
+def test_incremental_same_as_full_parse():
+    rand = random.Random(1)
+    for _ in range(200):
+        lines = _random_lines(rand)
+        parser = IncrementalCollectionParser(lines)
+        for _ in range(5):
+            start = rand.randint(1, len(lines))
+            end = rand.randint(start, min(len(lines), start + 3))
+            new = _random_lines(rand)[1:]
+            new = new[:rand.randint(0, len(new))]
+            lines[start:end] = new
+            parser.replace_lines(start, end, new)
+            expected, expected_error = _parse(parse_voting_collection, lines)
+            res, error = _parse(lambda _: parser.collection(), lines)
+            assert error == expected_error
+            assert expected is None or same_collection(res, expected)
+
+
+def test_same_collection_compares_votings():
+    lines = ['# Session', '## G', '### V', '- 5']
+    assert same_collection(parse_voting_collection(lines), parse_voting_collection(lines))
+    assert not same_collection(parse_voting_collection(lines), parse_voting_collection(lines[:-1] + ['- 6']))
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import random
+import asyncio
+
+import pytest
+
+from stura_voting_utils.parser import ParseException, parse_csv
+from stura_voting_utils.evaluation import evaluate_votings
+from stura_voting_utils.server import BallotServer, load_live_tally, main
+
+_HEAD = 'Name,Gewicht,Schulze (3),Median (1000),Schulze (2)'
+
+
+def _random_row(rand, name):
+    entries = ['/'.join(str(rand.randint(0, 2)) for _ in range(3)), str(rand.randint(0, 1000)),
+               '/'.join(str(rand.randint(0, 1)) for _ in range(2))]
+    entries = [entry if rand.random() < 0.8 else '' for entry in entries]
+    return ','.join([name, str(rand.randint(0, 5))] + entries)
+
+
+def _expected(lines):
+    all_votings, votes = parse_csv(lines)
+    return [result.candidate_wins if hasattr(result, 'candidate_wins') else result
+            for result in evaluate_votings(all_votings, votes)]
+
+
+async def _session(live, commands):
+    srv = await BallotServer(live).start('127.0.0.1', 0)
+    reader, writer = await asyncio.open_connection('127.0.0.1', srv.sockets[0].getsockname()[1])
+    answers = []
+    for command in commands:
+        writer.write(command.encode('utf-8') + b'\n')
+        answers.append((await reader.readline()).decode('utf-8').rstrip())
+    writer.close()
+    srv.close()
+    await srv.wait_closed()
+    return answers
+
+
+def test_round_trip_matches_parse_csv():
+    rand = random.Random(0)
+    for _ in range(5):
+        rows = [_random_row(rand, 'Voter %d' % i) for i in range(rand.randint(0, 30))]
+        split = rand.randint(0, len(rows))
+        live = load_live_tally([_HEAD] + rows[:split])
+        answers = asyncio.run(_session(live, ['VOTE ' + row for row in rows[split:]] + ['RESULTS', 'QUIT']))
+        assert answers[:-2] == ['OK %d' % i for i in range(split + 1, len(rows) + 1)]
+        assert answers[-1] == 'BYE'
+        results = json.loads(answers[-2][len('RESULTS '):])
+        assert results['ballots'] == len(rows)
+        got = [voting['ranking'] if voting['type'] == 'schulze' else voting['value'] for voting in results['votings']]
+        assert got == _expected([_HEAD] + rows)
+
+
+@pytest.mark.parametrize('row, message', [
+    ('Alice,1,0/1/2,5,0/1', 'Voter Alice already voted in row 2'),
+    (',1,0/1/2,5,0/1', 'Name of the voter is missing'),
+    ('Bob,-1,0/1/2,5,0/1', 'Weight must not be negative'),
+    ('Bob,1,0/1/2,1001,0/1', 'Must be between 0 and 1000'),
+])
+def test_rows_parse_csv_counts_differently_are_rejected(row, message):
+    with pytest.raises(ParseException) as info:
+        load_live_tally([_HEAD, 'Alice,2,0/1/2,5,1/0', row])
+    assert message in str(info.value)
+    assert 'row 3' in str(info.value)
+
+
+def test_main_reports_invalid_files(tmp_path, capsys):
+    path = tmp_path / 'ballots.csv'
+    path.write_bytes('\n'.join([_HEAD, 'Jürgen,1,0/1/2,5,0/1', 'Jürgen,2,0/1/2,5,0/1']).encode('latin-1'))
+    assert main(['-f', str(path), '--encoding', 'latin-1']) == 1
+    assert 'Voter Jürgen already voted in row 2' in capsys.readouterr().out
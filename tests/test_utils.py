@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import pickle
+
+import pytest
+
+from stura_voting_utils.utils import output_currency, VotingCollection, VotingGroup, MedianVotingSkeleton, \
+    SchulzeVotingSkeleton
+
+
+def _collection():
+    median = [MedianVotingSkeleton('Budget', 10000, '€', 1)]
+    schulze = [SchulzeVotingSkeleton('Chair', ['A', 'B'], 0)]
+    return median, schulze, VotingCollection('Session', None, [VotingGroup('G', median, schulze)])
+
+
+def test_lists_are_not_copied():
+    median, schulze, collection = _collection()
+    group = collection.groups[0]
+    assert group.median_votings is median and group.schulze_votings is schulze
+    assert collection.find_voting('Audit') is None
+    # direct modifications of the lists must be followed by invalidate
+    median.append(MedianVotingSkeleton('Audit', 500, '€', 2))
+    collection.invalidate()
+    assert collection.find_voting('Audit') is median[-1]
+    assert group.get_voting(2) is median[-1]
+
+
+def test_group_changes_update_the_index():
+    median, schulze, collection = _collection()
+    group = collection.groups[0]
+    assert group.get_voting(1) is median[0]
+    assert collection.find_voting('Budget') is median[0]
+    group.remove_voting(median[0])
+    group.add_voting(MedianVotingSkeleton('Audit', 500, '€', 1))
+    assert group.get_voting(1).name == 'Audit'
+    assert collection.find_voting('Budget') is None
+    assert collection.find_voting('Audit') is median[0]
+    group.median_votings = [MedianVotingSkeleton('Budget', 5, None, 1)]
+    assert collection.find_voting('Budget') is group.median_votings[0]
+    other = VotingGroup('H', [], [SchulzeVotingSkeleton('Treasurer', ['A', 'B'], 0)])
+    collection.add_group(other)
+    assert collection.find_voting('Treasurer') is other.schulze_votings[0]
+    collection.remove_group(other)
+    assert collection.find_voting('Treasurer') is None
+    other.add_voting(MedianVotingSkeleton('Budget', 1, None, 1))
+    assert collection.find_voting('Budget') is group.median_votings[0]
+
+
+def test_group_in_two_collections():
+    median, schulze, collection = _collection()
+    group = collection.groups[0]
+    second = VotingCollection('Other', None, [group])
+    assert collection.find_voting('Chair') is second.find_voting('Chair') is schulze[0]
+    chair = schulze[0]
+    group.remove_voting(chair)
+    assert collection.find_voting('Chair') is None and second.find_voting('Chair') is None
+
+
+def test_renames_require_invalidate():
+    median, schulze, collection = _collection()
+    assert collection.find_voting('Chair') is schulze[0]
+    schulze[0].name = 'President'
+    schulze[0].id = 3
+    collection.invalidate()
+    assert collection.find_voting('President') is schulze[0]
+    assert collection.find_voting('Chair') is None
+    assert collection.groups[0].get_voting(3) is schulze[0]
+
+
+def test_pickle():
+    _, _, collection = _collection()
+    collection.find_voting('Chair')
+    copy = pickle.loads(pickle.dumps(collection))
+    assert copy.output() == collection.output()
+    assert copy.find_voting('Budget') is copy.groups[0].median_votings[0]
+
+
+@pytest.mark.parametrize('val, currency, expected', [
+    (-5, '€', '-0,05 €'),
+    (-100, '€', '-1,00 €'),
+    (-4284, None, '-42,84'),
+    (-1, None, '-0,01'),
+    (0, '€', '0,00 €'),
+])
+def test_output_currency_negative(val, currency, expected):
+    # negative values are formatted like positive ones with a leading minus
+    assert output_currency(val, currency) == expected
+    assert output_currency(-val, currency) == expected.lstrip('-')
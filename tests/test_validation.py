@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import random
+
+import pytest
+
+from stura_voting_utils.parser import ParseException, parse_csv
+from stura_voting_utils.validation import validate_csv, WEIGHT, RANK_DUPLICATE, RANK_RANGE, MEDIAN_RANGE
+from stura_voting_utils.voting import main
+
+HEAD = 'Name,Gewicht,Schulze (3),Median (100)'
+
+
+def test_empty_weight():
+    lines = ['Name,Gewicht,Median (100)', 'G1,,20']
+    with pytest.raises(ParseException):
+        parse_csv(lines)
+    report = validate_csv(lines)
+    assert not report.valid
+    assert [(problem.row, problem.kind) for problem in report.problems] == [(2, WEIGHT)]
+
+
+def test_default_matches_parser():
+    # ties and entries out of range are accepted by parse_csv, so they're only reported with strict
+    lines = [HEAD, 'G1,1,0/0/1,20', 'G2,1,0/1/7,200', 'G3,1,-1/0/1,-5']
+    parse_csv(lines)
+    assert validate_csv(lines).valid
+    kinds = [problem.kind for problem in validate_csv(lines, strict=True).problems]
+    assert kinds == [RANK_DUPLICATE, RANK_RANGE, MEDIAN_RANGE, RANK_RANGE, MEDIAN_RANGE]
+
+
+def test_random_rows_match_parser():
+    rand = random.Random(0)
+    weights = ['1', '5', '', 'x', ' 2', '-1', '1.5']
+    schulze = ['0/1/2', '2/0/1', '0/0/0', '0/1', '0/1/2/3', 'a/b/c', '', '0//1', '5/1/0']
+    median = ['20', '0', '', '200', 'x', '-3', ' 7']
+    for _ in range(500):
+        lines = [HEAD]
+        for i in range(rand.randint(0, 4)):
+            row = ['G%d' % i, rand.choice(weights), rand.choice(schulze), rand.choice(median)]
+            if rand.random() < 0.05:
+                row.pop()
+            lines.append(','.join(row))
+        try:
+            parse_csv(lines)
+            parsed = True
+        except ParseException:
+            parsed = False
+        assert validate_csv(lines).valid == parsed, lines
+
+
+def test_cli_validate_prints_stats(tmp_path, capsys):
+    path = tmp_path / 'ballots.csv'
+    path.write_text('\n'.join([HEAD, 'G1,1,0/1/2,20', 'G2,,0/1/2,20']) + '\n')
+    assert main(['-f', str(path), '--validate', '--stats']) == 1
+    out = capsys.readouterr().out
+    assert "Can't parse weight as int in row 3" in out
+    assert 'Statistics:' in out
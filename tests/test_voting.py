@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+# MIT License
+#
+# Copyright (c) 2018 Fabian Wenzelmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import pytest
+
+from stura_voting_utils.voting import main
+
+_LINES = ['Name,Gewicht,Schulze (3),Median (100)', 'Jürgen,2,0/1/2,20', 'Günther,1,2/1/0,50', 'Änne,3,1/0/2,']
+
+
+@pytest.mark.parametrize('args', [[], ['--stream'], ['--stream', '-j', '2']])
+def test_cli_encoding(tmp_path, capsys, args):
+    # the serial and the parallel path read the file with the same encoding
+    path = tmp_path / 'ballots.csv'
+    path.write_bytes(('\n'.join(_LINES) + '\n').encode('latin-1'))
+    assert main(['-f', str(path), '--encoding', 'latin-1'] + args) == 0
+    out = capsys.readouterr().out
+    assert '1 > 0 > 2' in out
+    assert 'Agreed on value 20' in out
+    with pytest.raises(UnicodeDecodeError):
+        main(['-f', str(path)] + args)